@@ -1,14 +1,19 @@
 import asyncio
 from typing import Annotated, Any
 
-from fastapi import APIRouter, Depends, Request, Query, HTTPException
+from fastapi import APIRouter, Body, Depends, Request, Query, HTTPException
 from fastcrud.paginated import PaginatedListResponse, compute_offset, paginated_response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.dependencies import get_current_superuser
 from app.core.db.database import async_get_db
 from app.core.exceptions.http_exceptions import NotFoundException
+from app.core.utils import queue
 from app.core.web3_services.arbitrum_one.websocket_service import WebSocketMonitor
+from app.core.web3_services.admins import invalidate_admin_emails
+from app.core.web3_services.deadletter import DeadLetterQueue
+from app.core.web3_services.metrics import read_metrics, read_metrics_matching
+from app.core.utils.redis_queue import POOL_METRICS_COMPONENT
 from app.crud.crud_users import crud_users
 from app.schemas.users import AdminUpdate, UserRead
 from app.core.web3_services.get_functions.usdt.functions import (
@@ -46,6 +51,84 @@ async def start_websocket():
     return {"status": "WebSocket monitor started"}
 
 
+@router.get("/ingest-providers", dependencies=[Depends(get_current_superuser)])
+async def read_ingest_providers(request: Request) -> dict:
+    """
+    - Returns websocket providers ranked by how often they deliver a log first, then by their mean lag.
+    - Lags are measured against the first provider that delivered the same log.
+    """
+    stats = await read_metrics(queue.pool, "ingest_providers")
+    if stats is None:
+        raise NotFoundException("No provider statistics published yet")
+    return stats
+
+
+@router.get("/ingest-backpressure", dependencies=[Depends(get_current_superuser)])
+async def read_ingest_backpressure(request: Request) -> dict:
+    """
+    - Returns the ingest queue depth against its watermarks.
+    - Includes the size of the local disk spill and the rate it drains back into the queue.
+    """
+    stats = await read_metrics(queue.pool, "ingest_backpressure")
+    if stats is None:
+        raise NotFoundException("No backpressure statistics published yet")
+    return stats
+
+
+@router.get("/mail-digests", dependencies=[Depends(get_current_superuser)])
+async def read_mail_digests(request: Request) -> dict:
+    """
+    - Returns how many user notifications were coalesced into per-recipient digests, and the digests sent.
+    - `reduction` is the share of sends saved, `1 - sends / notifications`.
+    """
+    stats = await read_metrics(queue.pool, "mail_digests")
+    if stats is None:
+        raise NotFoundException("No digest statistics published yet")
+    return stats
+
+
+@router.get("/redis-queue-pools", dependencies=[Depends(get_current_superuser)])
+async def read_redis_queue_pools(request: Request) -> dict:
+    """
+    - Returns the queue Redis connection pool of every running process: connections in use and created so far, against its limit.
+    - `peak_in_use` is the highest number of connections in use since the previous snapshot.
+    """
+    stats = await read_metrics_matching(queue.pool, f"{POOL_METRICS_COMPONENT}:")
+    if not stats:
+        raise NotFoundException("No connection pool statistics published yet")
+    return stats
+
+
+@router.get("/ingest-dead-letters", dependencies=[Depends(get_current_superuser)])
+async def read_ingest_dead_letters(
+    request: Request,
+    status: str = Query("dead", pattern="^(dead|retrying)$", description="`dead` (parked) or `retrying`"),
+    page: int = Query(1, ge=1),
+    items_per_page: int = Query(50, ge=1, le=500)
+) -> dict:
+    """
+    - Returns chain logs whose handler failed: handler key, last error, attempts and next retry.
+    - `dead` logs exhausted their retries and wait for a replay.
+    """
+    dead_letters = DeadLetterQueue(queue.pool)
+    result = await dead_letters.inspect(status, compute_offset(page, items_per_page), items_per_page)
+    result["counts"] = await dead_letters.stats()
+    return result
+
+
+@router.post("/ingest-dead-letters/replay", dependencies=[Depends(get_current_superuser)])
+async def replay_ingest_dead_letters(
+    request: Request,
+    ids: list[str] | None = Body(None, embed=True, description="Log ids (`<tx hash>:<log index>`), all dead logs if omitted")
+) -> dict:
+    """
+    - Schedules dead logs for an immediate retry with a fresh attempt budget.
+    - Running consumers pick them up on their next retry poll.
+    """
+    replayed = await DeadLetterQueue(queue.pool).replay(ids)
+    return {"replayed": replayed}
+
+
 @router.get("/admins", response_model=PaginatedListResponse[UserRead])
 async def read_admins(
     request: Request,
@@ -103,9 +186,10 @@ async def update_admin(
 
     await crud_users.update(
         db,
-        AdminUpdate(is_superuser=values.is_admin),
+        AdminUpdate(is_admin=values.is_admin),
         public_address=address
     )
+    await invalidate_admin_emails()
     return {"message": f"Admin Status for {address} updated to {values.is_admin}"}
 
 
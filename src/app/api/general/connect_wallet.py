@@ -7,10 +7,12 @@ from web3.auto import w3
 
 from app.core.config import settings
 from app.core.db.database import async_get_db
+from app.core.utils import queue
 from app.core.exceptions.http_exceptions import UnauthorizedException
 from app.core.schemas import Token
 from app.crud.crud_users import crud_users
 from app.core.address_verification import verify_signature, generate_random
+from app.core.web3_services.users import publish_user_created
 from app.schemas.users import (
     UserNonce,
     SignatureVerificationRequest,
@@ -57,6 +59,8 @@ async def fetch_user_nonce(
             db,
             UserCreate(public_address=public_address, nonce=_nonce)
         )
+        # Log consumers may have cached this address as unknown
+        await publish_user_created(queue.pool, public_address)
         return new_user_nonce
     
     return wallet
@@ -7,6 +7,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.dependencies import get_current_superuser, get_current_user
 from app.core.db.database import async_get_db
+from app.core.web3_services.balances import current_balance
 from app.core.exceptions.http_exceptions import DuplicateValueException, NotFoundException
 from app.crud.crud_rate_limit import crud_rate_limits
 from app.crud.crud_users import crud_users
@@ -21,10 +22,11 @@ async def read_user_balance(
     db: Annotated[AsyncSession, Depends(async_get_db)],
     public_address: str = Query(..., description="User Address")
 ) -> QuickBalanceRead:
-    user_balance: QuickBalanceRead | None = await crud_users.get(
-        db=db, schema_to_select=QuickBalanceRead, public_address=public_address.lower()
-    )
-    return user_balance
+    # Includes the ledger movements not folded into `user.balance` yet
+    balance = await current_balance(db, public_address.lower())
+    if balance is None:
+        return None
+    return {"balance": balance}
 
 
 @router.get("/users", response_model=PaginatedListResponse[UserRead])
@@ -0,0 +1,109 @@
+import pickle
+import time
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from redis.asyncio import Redis
+
+from app.core.logger import logging
+from app.core.config import settings
+from app.core.web3_services.metrics import publish_metrics
+
+logger = logging.getLogger(__name__)
+
+DIGEST_PENDING_KEY = "mail_digest:pending"
+DIGEST_ITEMS_PREFIX = "mail_digest:items:"
+DIGEST_STATS_KEY = "mail_digest:stats"
+
+# Pops up to ARGV[2] recipients whose window closed by ARGV[1], each followed by
+# the notifications buffered for it
+_POP_DUE_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+local popped = {}
+for _, recipient in ipairs(due) do
+    local key = ARGV[3] .. recipient
+    redis.call('ZREM', KEYS[1], recipient)
+    popped[#popped + 1] = recipient
+    popped[#popped + 1] = redis.call('LRANGE', key, 0, -1)
+    redis.call('DEL', key)
+end
+return popped
+"""
+
+# (subject, body) of a notification
+Notification = Tuple[str, str]
+
+
+def compose_digest(notifications: List[Notification]) -> Notification:
+    """
+    Folds the notifications of one recipient into a single email.
+
+    A lone notification is sent unchanged; repeated ones are listed once with
+    their count.
+    """
+    counts = Counter(notifications)
+    if len(notifications) == 1:
+        return notifications[0]
+
+    subjects = {subject for subject, _ in counts}
+    subject = f"{subjects.pop()} ({len(notifications)})" if len(subjects) == 1 else f"{len(notifications)} new notifications"
+    entries = [
+        f"{subject_}\n{body}" + (f"\n(x{count})" if count > 1 else "")
+        for (subject_, body), count in counts.items()
+    ]
+    body = f"You have {len(notifications)} new notifications:\n\n" + "\n\n".join(entries)
+    return subject, body
+
+
+class DigestCoalescer:
+    """
+    Collapses the notifications of a recipient within `window` seconds into one digest.
+
+    The first notification of a recipient opens its window; every notification
+    until the window closes is buffered in Redis and `pop_due` hands them back
+    together, so a settlement wave costs one send per recipient rather than one
+    per prediction.
+    """
+
+    def __init__(self, redis: Redis, window: int = settings.MAIL_DIGEST_WINDOW):
+        self.redis = redis
+        self.window = window
+        self._pop_due = redis.register_script(_POP_DUE_SCRIPT)
+
+    async def add(self, notifications: List[Dict[str, str]]) -> None:
+        """Buffers queued notifications (`address`, `subject`, `body`) per recipient."""
+        closes_at = time.time() + self.window
+        async with self.redis.pipeline(transaction=True) as pipe:
+            for notification in notifications:
+                address = notification["address"]
+                pipe.rpush(f"{DIGEST_ITEMS_PREFIX}{address}", pickle.dumps((notification["subject"], notification["body"])))
+                pipe.zadd(DIGEST_PENDING_KEY, {address: closes_at}, nx=True)
+            await pipe.execute()
+
+    async def pop_due(self, limit: int = settings.MAIL_DRAIN_CHUNK) -> Dict[str, List[Notification]]:
+        """Removes and returns up to `limit` recipients whose window closed, with their notifications."""
+        popped = await self._pop_due(keys=[DIGEST_PENDING_KEY], args=[time.time(), max(1, limit), DIGEST_ITEMS_PREFIX])
+        due = {}
+        for i in range(0, len(popped), 2):
+            address = popped[i].decode() if isinstance(popped[i], bytes) else popped[i]
+            if popped[i + 1]:
+                due[address] = [pickle.loads(item) for item in popped[i + 1]]
+        return due
+
+    async def record(self, notifications: int, sends: int) -> None:
+        """Counts coalesced notifications against digests sent, and publishes the reduction."""
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hincrby(DIGEST_STATS_KEY, "notifications", notifications)
+            pipe.hincrby(DIGEST_STATS_KEY, "sends", sends)
+            totals, sent = (await pipe.execute())
+        await publish_metrics(self.redis, "mail_digests", digest_stats(totals, sent, self.window))
+
+
+def digest_stats(notifications: int, sends: int, window: int) -> Dict[str, int | float]:
+    """Sends saved by coalescing: `reduction` is the share of notifications not sent as an email of their own."""
+    return {
+        "window_s": window,
+        "notifications": notifications,
+        "sends": sends,
+        "reduction": round(1 - sends / notifications, 4) if notifications else 0.0
+    }
@@ -1,16 +1,18 @@
+import asyncio
 import os
 import pickle
 from typing import List, Dict
 from jinja2 import Environment, FileSystemLoader, select_autoescape
 from redis.asyncio import Redis
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail, To
 from app.core.logger import logging
 from app.core.config import settings
-from app.core.akabokisi.topics import event_queue_dict
+from app.core.utils.redis_queue import get_queue_redis
+from app.core.akabokisi.topics import digest_queues, event_queue_dict
 from app.core.constants import USER_NAME
 from app.core.akabokisi.messages import support_link
 from app.core.akabokisi.helper import current_year
+from app.core.akabokisi.transport import MailTransport, build_messages, get_mail_transport
+from app.core.akabokisi.digest import DigestCoalescer, compose_digest
 
 logger = logging.getLogger(__name__)
 
@@ -22,8 +24,11 @@ env = Environment(
 )
 
 class MailboxManager:
-    def __init__(self):
-        self.redis = Redis(host=settings.REDIS_QUEUE_HOST, port=settings.REDIS_QUEUE_PORT, db=0)
+    def __init__(self, redis: Redis | None = None, transport: MailTransport | None = None):
+        self.redis = redis or get_queue_redis()
+        # Resolved on the first send, so processes that only queue mail never open a client
+        self.transport = transport
+        self.digests = DigestCoalescer(self.redis)
 
     async def add_data_to_list(self, addresses: List[str], relevant_queue_name: str, subject: str, body: str) -> None:
         """Adds email data for multiple addresses to Redis queue."""
@@ -39,18 +44,66 @@ class MailboxManager:
         try:
             event_queues = event_queue_dict()
             for queue_name in event_queues.values():
-                data = await self.redis.lrange(queue_name, 0, -1)
-                await self.redis.ltrim(queue_name, 1, 0)  # Clear the queue after fetching
-
-                # Batch emails by subject and body
-                batch = self._group_emails_by_content(data)
-
-                # Send emails in batches
-                for (subject, body), email_addresses in batch.items():
-                    await self._process_emails(email_addresses, subject, body)
+                await self._drain_queue(queue_name)
+            await self._send_digests()
         except Exception as e:
             logger.error(f"Failed to process emails: {e}")
 
+    async def _drain_queue(self, queue_name: str, chunk_size: int = settings.MAIL_DRAIN_CHUNK) -> int:
+        """
+        Pops a queue in chunks of `chunk_size` and sends each chunk before popping the next;
+        chunks of `digest_queues` are buffered per recipient for `_send_digests` instead.
+
+        `LPOP` with a count removes a chunk atomically, so notifications pushed while
+        draining are never dropped; the drain stops at the length found on entry and
+        leaves later ones to the next run. Returns how many notifications were popped.
+        """
+        remaining = await self.redis.llen(queue_name)
+        drained = 0
+        while remaining > 0:
+            data = await self.redis.lpop(queue_name, min(max(1, chunk_size), remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            drained += len(data)
+
+            if queue_name in digest_queues and self.digests.window > 0:
+                await self.digests.add([pickle.loads(_data) for _data in data])
+                continue
+
+            # Batch emails by subject and body
+            batch = self._group_emails_by_content(data)
+
+            # Send emails in batches, concurrently up to the transport's limit
+            await asyncio.gather(*(
+                self._process_emails(email_addresses, subject, body)
+                for (subject, body), email_addresses in batch.items()
+            ))
+        if drained:
+            logger.info(f"Drained {drained} notifications from {queue_name}.")
+        return drained
+
+    async def _send_digests(self) -> int:
+        """
+        Sends one email per recipient whose digest window closed, folding all of its
+        notifications; returns how many digests were sent.
+        """
+        sent = 0
+        while due := await self.digests.pop_due():
+            batch: Dict[tuple, List[str]] = {}
+            for address, notifications in due.items():
+                batch.setdefault(compose_digest(notifications), []).append(address)
+
+            await asyncio.gather(*(
+                self._process_emails(email_addresses, subject, body)
+                for (subject, body), email_addresses in batch.items()
+            ))
+            await self.digests.record(sum(len(n) for n in due.values()), len(due))
+            sent += len(due)
+        if sent:
+            logger.info(f"Sent {sent} notification digests.")
+        return sent
+
     def _group_emails_by_content(self, data: List[bytes]) -> Dict[tuple, List[str]]:
         """
         Groups emails by subject and body for batch processing.
@@ -72,7 +125,7 @@ class MailboxManager:
         return batch
 
     async def _process_emails(self, emails: List[str], subject: str, body: str):
-        """Send batch emails using SendGrid"""
+        """Send batch emails through the mail transport, in chunks of personalizations"""
         try:
             template = env.get_template("email_template.html")
             html_content = template.render(
@@ -82,17 +135,11 @@ class MailboxManager:
                 current_year=current_year()
             )
 
-            to_emails = [To(email) for email in emails]
-            message = Mail(
-                from_email=settings.FROM_EMAIL,
-                to_emails=to_emails,
-                subject=subject,
-                html_content=html_content
-            )
-
-            sg = SendGridAPIClient(settings.SENDGRID_API_KEY)
-            response = sg.send(message)
-            logger.info(f"Batch email sent successfully to recipients. Status code: {response.status_code}")
+            messages = build_messages(emails, subject, html_content)
+            if self.transport is None:
+                self.transport = get_mail_transport()
+            accepted = await self.transport.send_all(messages)
+            logger.info(f"Batch email sent: {accepted}/{len(messages)} requests accepted for {len(emails)} recipients.")
 
         except Exception as e:
             logger.error(f"Failed to send batch email: {e}")
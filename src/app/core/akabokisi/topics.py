@@ -1,4 +1,4 @@
-from typing import Dict
+from typing import Dict, Set
 
 from app.core.logger import logging
 from app.core.constants import MAIL_QUEUE, ALERTS_QUEUE
@@ -11,6 +11,9 @@ events_dict: Dict[str, str] = {
     "alerts": ALERTS_QUEUE
 }
 
+# Queues coalesced into per-recipient digests; alerts are sent as soon as they are drained
+digest_queues: Set[str] = {MAIL_QUEUE}
+
 def event_queue_dict() -> Dict[str, str]:
     """Returns a dict of event names and their queue names"""
     try:
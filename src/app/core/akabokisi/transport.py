@@ -0,0 +1,187 @@
+import abc
+import asyncio
+import random
+from typing import Any, Dict, List
+
+import httpx
+
+from app.core.logger import logging
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SENDGRID_API_URL = "https://api.sendgrid.com"
+SENDGRID_SEND_PATH = "/v3/mail/send"
+# SendGrid accepts at most 1000 personalizations per request
+SENDGRID_MAX_PERSONALIZATIONS = 1000
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def build_messages(
+    emails: List[str],
+    subject: str,
+    html_content: str,
+    recipients_per_request: int = settings.MAIL_RECIPIENTS_PER_REQUEST
+) -> List[Dict[str, Any]]:
+    """
+    SendGrid v3 payloads sending `html_content` to every address.
+
+    Every recipient gets a personalization of their own, so none sees the others,
+    and each payload carries at most `recipients_per_request` of them.
+    """
+    size = max(1, min(recipients_per_request, SENDGRID_MAX_PERSONALIZATIONS))
+    return [
+        {
+            "personalizations": [{"to": [{"email": email}]} for email in emails[i:i + size]],
+            "from": {"email": settings.FROM_EMAIL},
+            "subject": subject,
+            "content": [{"type": "text/html", "value": html_content}]
+        }
+        for i in range(0, len(emails), size)
+    ]
+
+
+class MailTransport(abc.ABC):
+    """
+    Sends mail payloads, at most `concurrency` at a time per process.
+
+    `send_all` fans the payloads of a batch out concurrently; subclasses implement
+    `_post` for a single payload, holding `semaphore` only while a request is in flight.
+    """
+
+    def __init__(self, concurrency: int = settings.MAIL_SEND_CONCURRENCY):
+        self.semaphore = asyncio.Semaphore(max(1, concurrency))
+        self.sent = 0
+        self.failed = 0
+
+    @abc.abstractmethod
+    async def _post(self, message: Dict[str, Any]) -> int:
+        """Sends one payload; returns the provider's HTTP status."""
+
+    async def send(self, message: Dict[str, Any]) -> bool:
+        """Sends one payload; True once accepted by the provider."""
+        try:
+            status = await self._post(message)
+        except Exception as e:
+            logger.error(f"Failed to send email: {e}")
+            status = None
+        recipients = len(message["personalizations"])
+        if status is not None and status < 300:
+            self.sent += recipients
+            return True
+        self.failed += recipients
+        return False
+
+    async def send_all(self, messages: List[Dict[str, Any]]) -> int:
+        """Sends payloads concurrently; returns how many were accepted."""
+        results = await asyncio.gather(*(self.send(message) for message in messages))
+        return sum(results)
+
+    async def aclose(self) -> None:
+        pass
+
+    def stats(self) -> Dict[str, int]:
+        return {"sent": self.sent, "failed": self.failed}
+
+
+class SendGridTransport(MailTransport):
+    """
+    SendGrid v3 API over a persistent, pooled `httpx.AsyncClient`.
+
+    Rate limited (429) and failed (5xx) requests are retried up to `max_retries`
+    times with jittered exponential backoff, honouring `Retry-After` when sent. Waits
+    are capped at `max_delay` seconds and do not hold a concurrency slot.
+    """
+
+    def __init__(
+        self,
+        api_key: str = settings.SENDGRID_API_KEY,
+        concurrency: int = settings.MAIL_SEND_CONCURRENCY,
+        max_retries: int = settings.MAIL_MAX_RETRIES,
+        base_delay_ms: int = settings.MAIL_RETRY_BASE_DELAY_MS,
+        max_delay: float = settings.MAIL_RETRY_MAX_DELAY,
+        timeout: float = settings.MAIL_TIMEOUT,
+        base_url: str = SENDGRID_API_URL
+    ):
+        super().__init__(concurrency)
+        self.max_retries = max_retries
+        self.base_delay_ms = base_delay_ms
+        self.max_delay = max_delay
+        self.client = httpx.AsyncClient(
+            base_url=base_url,
+            headers={"Authorization": f"Bearer {api_key}"},
+            limits=httpx.Limits(max_connections=max(1, concurrency), max_keepalive_connections=max(1, concurrency)),
+            timeout=timeout
+        )
+
+    def _delay(self, attempt: int, response: httpx.Response | None) -> float:
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after is not None and retry_after.isdigit():
+            delay = float(retry_after)
+        else:
+            delay = self.base_delay_ms * 2 ** attempt * random.uniform(0.8, 1.2) / 1000
+        return min(delay, self.max_delay)
+
+    async def _post(self, message: Dict[str, Any]) -> int:
+        for attempt in range(self.max_retries + 1):
+            response = None
+            try:
+                async with self.semaphore:
+                    response = await self.client.post(SENDGRID_SEND_PATH, json=message)
+                if response.status_code not in RETRY_STATUSES:
+                    if response.status_code >= 300:
+                        logger.error(f"SendGrid rejected a batch email: {response.status_code} {response.text}")
+                    return response.status_code
+                error = f"status {response.status_code}"
+            except httpx.TransportError as e:
+                error = str(e) or type(e).__name__
+            if attempt == self.max_retries:
+                raise Exception(f"SendGrid request failed after {attempt + 1} attempts: {error}")
+            delay = self._delay(attempt, response)
+            logger.warning(f"SendGrid request failed ({error}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+class LocalMailTransport(MailTransport):
+    """
+    Offline stand-in for `SendGridTransport`: accepts every payload after `latency_ms`.
+
+    Accepted payloads are kept in `messages` (up to `keep`), for benchmarks and local runs.
+    """
+
+    def __init__(self, concurrency: int = settings.MAIL_SEND_CONCURRENCY, latency_ms: int = 0, keep: int = 10_000):
+        super().__init__(concurrency)
+        self.latency_ms = latency_ms
+        self.keep = keep
+        self.messages: List[Dict[str, Any]] = []
+        self.requests = 0
+
+    async def _post(self, message: Dict[str, Any]) -> int:
+        async with self.semaphore:
+            self.requests += 1
+            if self.latency_ms:
+                await asyncio.sleep(self.latency_ms / 1000)
+        if len(self.messages) < self.keep:
+            self.messages.append(message)
+        return 202
+
+
+_transport: MailTransport | None = None
+
+
+def get_mail_transport() -> MailTransport:
+    """Process-wide transport selected by `MAIL_TRANSPORT` ("sendgrid" or "local")."""
+    global _transport
+    if _transport is None:
+        _transport = LocalMailTransport() if settings.MAIL_TRANSPORT == "local" else SendGridTransport()
+    return _transport
+
+
+async def close_mail_transport() -> None:
+    global _transport
+    if _transport is not None:
+        await _transport.aclose()
+    _transport = None
@@ -65,6 +65,52 @@ class ClientSideCacheSettings(BaseSettings):
 class RedisQueueSettings(BaseSettings):
     REDIS_QUEUE_HOST: str = config("REDIS_QUEUE_HOST", default="localhost")
     REDIS_QUEUE_PORT: int = config("REDIS_QUEUE_PORT", default=6379)
+    REDIS_QUEUE_MAX_CONNECTIONS: int = config("REDIS_QUEUE_MAX_CONNECTIONS", default=64)
+    REDIS_QUEUE_POOL_TIMEOUT: int = config("REDIS_QUEUE_POOL_TIMEOUT", default=10)
+    REDIS_QUEUE_HEALTH_CHECK_INTERVAL: int = config("REDIS_QUEUE_HEALTH_CHECK_INTERVAL", default=30)
+
+
+class IngestQueueSettings(BaseSettings):
+    INGEST_BATCH_SIZE: int = config("INGEST_BATCH_SIZE", default=256)
+    INGEST_FLUSH_INTERVAL_MS: int = config("INGEST_FLUSH_INTERVAL_MS", default=20)
+    INGEST_HOLD_MAX_PAYLOADS: int = config("INGEST_HOLD_MAX_PAYLOADS", default=50000)
+    INGEST_TRANSPORT: str = config("INGEST_TRANSPORT", default="list")
+    INGEST_READ_COUNT: int = config("INGEST_READ_COUNT", default=100)
+    INGEST_READ_BLOCK_MS: int = config("INGEST_READ_BLOCK_MS", default=5000)
+    INGEST_STREAM_GROUP: str = config("INGEST_STREAM_GROUP", default="alchemy_log_processors")
+    INGEST_STREAM_CLAIM_IDLE_MS: int = config("INGEST_STREAM_CLAIM_IDLE_MS", default=60000)
+    INGEST_CONSUMER_NAME: str | None = config("INGEST_CONSUMER_NAME", default=None)
+    INGEST_VISIBILITY_TIMEOUT_MS: int = config("INGEST_VISIBILITY_TIMEOUT_MS", default=300000)
+    INGEST_RETRY_MAX_ATTEMPTS: int = config("INGEST_RETRY_MAX_ATTEMPTS", default=8)
+    INGEST_RETRY_BASE_DELAY_MS: int = config("INGEST_RETRY_BASE_DELAY_MS", default=2000)
+    INGEST_RETRY_MAX_DELAY_MS: int = config("INGEST_RETRY_MAX_DELAY_MS", default=600000)
+    INGEST_RETRY_POLL_MS: int = config("INGEST_RETRY_POLL_MS", default=1000)
+    INGEST_DEDUP_CAPACITY: int = config("INGEST_DEDUP_CAPACITY", default=50000)
+    INGEST_DEDUP_TTL: int = config("INGEST_DEDUP_TTL", default=3600)
+    INGEST_USER_CACHE_CAPACITY: int = config("INGEST_USER_CACHE_CAPACITY", default=100000)
+    INGEST_ADMIN_CACHE_TTL: int = config("INGEST_ADMIN_CACHE_TTL", default=600)
+    INGEST_BALANCE_FOLD_BATCH: int = config("INGEST_BALANCE_FOLD_BATCH", default=5000)
+    INGEST_BALANCE_FOLD_INTERVAL_MS: int = config("INGEST_BALANCE_FOLD_INTERVAL_MS", default=500)
+    INGEST_BACKFILL_WINDOW: int = config("INGEST_BACKFILL_WINDOW", default=2000)
+    INGEST_BACKFILL_MAX_WINDOW: int = config("INGEST_BACKFILL_MAX_WINDOW", default=100000)
+    INGEST_BACKFILL_GROW_BELOW: int = config("INGEST_BACKFILL_GROW_BELOW", default=2000)
+    INGEST_BACKFILL_CONCURRENCY: int = config("INGEST_BACKFILL_CONCURRENCY", default=4)
+    INGEST_BACKFILL_TIMEOUT: int = config("INGEST_BACKFILL_TIMEOUT", default=3600)
+    INGEST_GAP_RETRY_DELAY: int = config("INGEST_GAP_RETRY_DELAY", default=30)
+    INGEST_GAP_RETRY_MAX_DELAY: int = config("INGEST_GAP_RETRY_MAX_DELAY", default=600)
+    INGEST_HIGH_WATERMARK: int = config("INGEST_HIGH_WATERMARK", default=200000)
+    INGEST_LOW_WATERMARK: int = config("INGEST_LOW_WATERMARK", default=100000)
+    INGEST_BACKPRESSURE_CHECK_MS: int = config("INGEST_BACKPRESSURE_CHECK_MS", default=1000)
+    INGEST_SPILL_DIR: str = config("INGEST_SPILL_DIR", default=os.path.join(os.path.dirname(os.path.dirname(__file__)), "spill"))
+    INGEST_SPILL_SEGMENT_BYTES: int = config("INGEST_SPILL_SEGMENT_BYTES", default=64 * 1024 * 1024)
+    INGEST_SPILL_DRAIN_BATCH: int = config("INGEST_SPILL_DRAIN_BATCH", default=1000)
+    INGEST_PROCESSOR_POOL_SIZE: int = config("INGEST_PROCESSOR_POOL_SIZE", default=4)
+    INGEST_PARTITION_QUEUE_SIZE: int = config("INGEST_PARTITION_QUEUE_SIZE", default=100)
+    INGEST_APPLY_MODE: str = config("INGEST_APPLY_MODE", default="block")
+    INGEST_APPLY_MAX_GROUP: int = config("INGEST_APPLY_MAX_GROUP", default=500)
+    INGEST_DRAIN_TIMEOUT: int = config("INGEST_DRAIN_TIMEOUT", default=30)
+    INGEST_CONSUMER_HEALTH_PORT: int = config("INGEST_CONSUMER_HEALTH_PORT", default=8001)
+    INGEST_CONSUMER_STALL_SECONDS: int = config("INGEST_CONSUMER_STALL_SECONDS", default=120)
 
 
 class RedisRateLimiterSettings(BaseSettings):
@@ -89,9 +135,20 @@ class ApiFootballSettings(BaseSettings):
 class SendgridSettings(BaseSettings):
     SENDGRID_API_KEY: str = config("SENDGRID_API_KEY", default="SENDGRID_API_KEY")
     FROM_EMAIL: str = config("FROM_EMAIL", default="FROM_EMAIL")
+    MAIL_TRANSPORT: str = config("MAIL_TRANSPORT", default="sendgrid")
+    MAIL_SEND_CONCURRENCY: int = config("MAIL_SEND_CONCURRENCY", default=8)
+    MAIL_RECIPIENTS_PER_REQUEST: int = config("MAIL_RECIPIENTS_PER_REQUEST", default=1000)
+    MAIL_MAX_RETRIES: int = config("MAIL_MAX_RETRIES", default=5)
+    MAIL_RETRY_BASE_DELAY_MS: int = config("MAIL_RETRY_BASE_DELAY_MS", default=500)
+    MAIL_RETRY_MAX_DELAY: int = config("MAIL_RETRY_MAX_DELAY", default=60)
+    MAIL_TIMEOUT: int = config("MAIL_TIMEOUT", default=30)
+    MAIL_DRAIN_CHUNK: int = config("MAIL_DRAIN_CHUNK", default=500)
+    MAIL_DIGEST_WINDOW: int = config("MAIL_DIGEST_WINDOW", default=300)
 
 class GeneralWebsocketSettings(BaseSettings):
     WEBSOCKET_TIMEOUT: int = config("WEBSOCKET_TIMEOUT", default=300)
+    # Comma separated WSS endpoints subscribed alongside Alchemy, e.g. "wss://a/...,wss://b/..."
+    WEBSOCKET_EXTRA_PROVIDER_URIS: str = config("WEBSOCKET_EXTRA_PROVIDER_URIS", default="")
 
 class EnvironmentOption(Enum):
     LOCAL = "local"
@@ -112,6 +169,7 @@ class Settings(
     RedisCacheSettings,
     ClientSideCacheSettings,
     RedisQueueSettings,
+    IngestQueueSettings,
     RedisRateLimiterSettings,
     DefaultRateLimitSettings,
     AlchemySettings,
@@ -0,0 +1,10 @@
+class LogCodecError(Exception):
+    def __init__(self, message: str = "Queued log could not be encoded or decoded.") -> None:
+        self.message = message
+        super().__init__(self.message)
+
+
+class HandlerNotFoundError(Exception):
+    def __init__(self, message: str = "No log handler registered for queued log.") -> None:
+        self.message = message
+        super().__init__(self.message)
@@ -32,6 +32,7 @@ from app.core.config import (
 )
 from app.core.db.database import async_engine as engine
 from app.core.utils import cache, queue, rate_limit
+from app.core.utils.redis_queue import close_queue_redis
 from app.models import *
 
 websocket_task = None
@@ -68,6 +69,7 @@ async def create_redis_queue_pool() -> None:
 
 async def close_redis_queue_pool() -> None:
     await queue.pool.aclose()  # type: ignore
+    await close_queue_redis()
 
 
 # -------------- rate limit --------------
@@ -0,0 +1,107 @@
+"""
+Process-wide pooled client of the queue Redis database.
+
+Mailboxes, websocket handlers and consumers share `get_queue_redis()` instead of
+opening a client each, so a process holds at most `REDIS_QUEUE_MAX_CONNECTIONS`
+connections; callers beyond that wait up to `REDIS_QUEUE_POOL_TIMEOUT` seconds.
+"""
+import asyncio
+import os
+import socket
+from typing import Dict, Set
+
+from redis.asyncio import BlockingConnectionPool, Redis
+from redis.asyncio.connection import AbstractConnection
+
+from app.core.logger import logging
+from app.core.config import settings
+from app.core.web3_services.metrics import publish_metrics
+
+logger = logging.getLogger(__name__)
+
+POOL_METRICS_COMPONENT = "redis_queue_pool"
+
+
+
+class TrackedConnectionPool(BlockingConnectionPool):
+    """`BlockingConnectionPool` counting its checkouts and the connections it creates, for `pool_stats()`."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.created = 0
+        self._checked_out: Set[int] = set()
+
+    @property
+    def in_use(self) -> int:
+        return len(self._checked_out)
+
+    def make_connection(self) -> AbstractConnection:
+        self.created += 1
+        return super().make_connection()
+
+    async def get_connection(self, *args, **kwargs) -> AbstractConnection:
+        connection = await super().get_connection(*args, **kwargs)
+        self._checked_out.add(id(connection))
+        return connection
+
+    async def release(self, connection: AbstractConnection) -> None:
+        self._checked_out.discard(id(connection))
+        await super().release(connection)
+
+
+pool: TrackedConnectionPool | None = None
+client: Redis | None = None
+
+
+def get_queue_redis() -> Redis:
+    """Returns the shared queue client, creating its pool on first use."""
+    global pool, client
+    if client is None:
+        pool = TrackedConnectionPool(
+            host=settings.REDIS_QUEUE_HOST,
+            port=settings.REDIS_QUEUE_PORT,
+            db=0,
+            max_connections=settings.REDIS_QUEUE_MAX_CONNECTIONS,
+            timeout=settings.REDIS_QUEUE_POOL_TIMEOUT,
+            health_check_interval=settings.REDIS_QUEUE_HEALTH_CHECK_INTERVAL
+        )
+        client = Redis.from_pool(pool)
+    return client
+
+
+async def close_queue_redis() -> None:
+    """Closes the shared client and its connections; the next `get_queue_redis()` starts a new pool."""
+    global pool, client
+    if client is not None:
+        await client.aclose()
+    pool = client = None
+
+
+def pool_stats() -> Dict[str, int | float]:
+    """Connections of the shared pool: checked out and created so far, against its limit."""
+    if pool is None:
+        return {"max_connections": settings.REDIS_QUEUE_MAX_CONNECTIONS, "created": 0, "in_use": 0, "utilization": 0.0}
+    return {
+        "max_connections": pool.max_connections,
+        "created": pool.created,
+        "in_use": pool.in_use,
+        "utilization": round(pool.in_use / pool.max_connections, 3)
+    }
+
+
+async def publish_pool_stats(process: str, interval: float = 30) -> None:
+    """
+    Periodically publishes `pool_stats()` under `redis_queue_pool:<process>:<host>:<pid>`.
+
+    Every process owns a pool, so each publishes its own snapshot; the highest
+    utilization seen since the previous snapshot is reported as `peak_in_use`.
+    """
+    component = f"{POOL_METRICS_COMPONENT}:{process}:{socket.gethostname()}:{os.getpid()}"
+    peak, elapsed = 0, 0.0
+    while True:
+        await asyncio.sleep(1)
+        elapsed += 1
+        peak = max(peak, pool_stats()["in_use"])
+        if elapsed >= interval:
+            await publish_metrics(get_queue_redis(), component, {**pool_stats(), "peak_in_use": peak})
+            peak, elapsed = 0, 0.0
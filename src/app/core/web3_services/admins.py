@@ -0,0 +1,102 @@
+import asyncio
+import json
+import time
+from typing import Awaitable, Callable, Dict, List
+
+from redis.asyncio import Redis
+
+from app.core.logger import logging
+from app.core.config import settings
+from app.core.utils.redis_queue import get_queue_redis
+
+logger = logging.getLogger(__name__)
+
+ADMIN_EMAILS_KEY = "cache:admin_emails"
+ADMIN_INVALIDATION_CHANNEL = "ingest:admins:invalidate"
+
+
+class AdminEmailCache:
+    """
+    Emails of the administrators, cached in-process and shared through Redis.
+
+    A process serves the list from memory, then from `ADMIN_EMAILS_KEY`, and only
+    queries the database when both are empty. `AdminAdded`/`AdminRemoved` and
+    `/update-admin` call `invalidate_admin_emails`, which drops the shared copy and
+    tells every `listen`ing process to drop its own. Both copies also expire after
+    `ttl` seconds, in case an invalidation is missed.
+    """
+
+    def __init__(self, ttl: int = settings.INGEST_ADMIN_CACHE_TTL):
+        self.ttl = max(1, ttl)
+        self._emails: List[str] | None = None
+        self._expires_at = 0.0
+        self.hits = 0
+        self.shared_hits = 0
+        self.queries = 0
+
+    def _store(self, emails: List[str]) -> None:
+        self._emails = emails
+        self._expires_at = time.monotonic() + self.ttl
+
+    async def get(self, load: Callable[[], Awaitable[List[str]]], redis: Redis | None = None) -> List[str]:
+        """Cached admin emails; `load` queries the database when no copy is fresh."""
+        if self._emails is not None and time.monotonic() < self._expires_at:
+            self.hits += 1
+            return list(self._emails)
+
+        redis = redis or get_queue_redis()
+        try:
+            raw = await redis.get(ADMIN_EMAILS_KEY)
+            if raw is not None:
+                self.shared_hits += 1
+                self._store(json.loads(raw))
+                return list(self._emails)
+        except Exception as e:
+            logger.warning(f"Shared admin emails unavailable, querying the database: {e}")
+
+        self.queries += 1
+        emails = await load()
+        self._store(emails)
+        try:
+            await redis.set(ADMIN_EMAILS_KEY, json.dumps(emails), ex=self.ttl)
+        except Exception as e:
+            logger.warning(f"Failed to share admin emails: {e}")
+        return list(emails)
+
+    def clear(self) -> None:
+        self._emails = None
+
+    async def listen(self, redis: Redis) -> None:
+        """Drops the local copy whenever `invalidate_admin_emails` is published, until cancelled."""
+        while True:
+            try:
+                async with redis.pubsub() as pubsub:
+                    await pubsub.subscribe(ADMIN_INVALIDATION_CHANNEL)
+                    # Changes made while unsubscribed were never announced to this process
+                    self.clear()
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self.clear()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Admin cache invalidation listener failed, resubscribing: {e}")
+                await asyncio.sleep(1)
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "shared_hits": self.shared_hits, "queries": self.queries}
+
+
+async def invalidate_admin_emails(redis: Redis | None = None) -> None:
+    """Drops every cached copy of the admin emails, here, in Redis and in the listening processes."""
+    admin_email_cache.clear()
+    redis = redis or get_queue_redis()
+    try:
+        await redis.delete(ADMIN_EMAILS_KEY)
+        await redis.publish(ADMIN_INVALIDATION_CHANNEL, b"")
+    except Exception as e:
+        logger.error(f"Failed to invalidate admin emails: {e}")
+
+
+# One cache per process, shared by alert handlers and websocket notifications
+admin_email_cache = AdminEmailCache()
@@ -1,42 +1,116 @@
-import json
-from hexbytes import HexBytes
+from typing import Any, Dict, List
 
 from app.core.logger import logging
-from app.core.web3_services.arbitrum_one.event_topics import usdtv1_event_topics_dict
-from app.core.web3_services.arbitrum_one.handler import usdtv1_event_handlers
+from app.core.web3_services.dispatch import DispatchTable
+from app.core.web3_services.ledger import claim_events, release_events
+from app.core.web3_services.users import user_cache
+from app.core.web3_services.arbitrum_one.event_topics import usdtv1_event_topics_dict, usdtv1_event_decoders
+from app.core.web3_services.arbitrum_one.handler import usdtv1_event_handlers, usdtv1_event_partitions
+from app.core.web3_services.arbitrum_one.handlers.bulk import bulk_insert_predictions, bulk_insert_backs
 
 
 logger = logging.getLogger(__name__)
 
+# Chain of the logs in the processed-events ledger
+ARBITRUM_CHAIN = "arbitrum_one"
+
+# Events whose handler resolves a user -> field of the decoded event holding its address
+USER_FIELDS = {"Predicted": "user", "Deposited": "_from", "Claimed": "user", "UserBalance": "_address"}
+
+
+def build_usdtv1_dispatch_table() -> DispatchTable:
+    """Builds the topic0 -> (decoder, handler) routes of USDTv1 events from their ABIs."""
+    table = DispatchTable("usdtv1", chain=ARBITRUM_CHAIN)
+    decoders = {name: record.decode for name, record in usdtv1_event_decoders().items()}
+    table.extend(
+        usdtv1_event_topics_dict(),
+        usdtv1_event_handlers(),
+        decoders=decoders,
+        partitions=usdtv1_event_partitions()
+    )
+    if not table:
+        logger.error("No event topics loaded; USDTv1 logs cannot be dispatched.")
+    return table
+
+
+# Built once per process: ABIs are read and topics hashed at import, not per log.
+# Contracts register their events on it with `usdtv1_dispatch_table.register(...)`.
+usdtv1_dispatch_table = build_usdtv1_dispatch_table()
+
+
 async def process_arbitrum_callbacklogs(message, db):
-    """Callback function for updating/persisting data to database."""
-    try:
-        payload = message['result']
-        event_topics = usdtv1_event_topics_dict()
-        event_handlers = usdtv1_event_handlers()
-        event_signature: HexBytes = payload['topics'][0]
-
-        if not event_topics:
-            logger.error("No event topics loaded; aborting log processing.")
-            return
-
-        for event, topic in event_topics.items():
-            if event_signature == topic:
-                if handler := event_handlers.get(event):
-                    await handler(
-                        payload, db
-                    )
-                    logger.info(f"Event '{event}' processed.")
-                    break
-                else:
-                    logger.warning(f"No handler defined for event '{event}'.")
-                    break
-        else:
-            logger.error("Event log cannot be identified!")
-
-    except FileNotFoundError:
-        logger.error("ABI file not found.")
-    except json.JSONDecodeError:
-        logger.error("Invalid JSON format in ABI file.")
-    except Exception as e:
-        logger.error(f"Error processing event log: {e}")
+    """
+    Callback function for updating/persisting data to database.
+
+    Handler errors propagate, so the processor can roll back the event's savepoint.
+    """
+    await usdtv1_dispatch_table.dispatch(message['result'], db)
+
+
+def partition_arbitrum_log(message) -> bytes:
+    """Partition key of a queued log: logs updating the same entity share it."""
+    return usdtv1_dispatch_table.partition_key(message['result'])
+
+
+async def bulk_apply_arbitrum_logs(messages: List[Dict[str, Any]], db) -> List[int]:
+    """
+    Bulk applier of USDTv1 logs queued by a backfill.
+
+    `Predicted` and `Backed` logs are applied with a few set-based statements, new
+    predictions first so backs of the same batch find them. Returns the indexes of
+    every other log, and of those the bulk statements could not apply; the processor
+    applies them one by one afterwards, in order. Going ahead of the other events of
+    the batch is safe: those never change what a lay or a back writes.
+
+    Logs are claimed in the processed-events ledger first: those already in it are
+    skipped, and the claims of the logs handed back are released.
+    """
+    predicted, backed, remaining = [], [], []
+    for position, message in enumerate(messages):
+        log = message['result']
+        route = usdtv1_dispatch_table.route(log['topics'][0]) if log['topics'] else None
+        if route is None or route.decoder is None or route.name not in ("Predicted", "Backed"):
+            remaining.append(position)
+            continue
+        try:
+            event = route.decoder(log)
+        except Exception as e:
+            logger.warning(f"Bulk apply: cannot decode '{route.name}' log: {e}")
+            remaining.append(position)
+            continue
+        (predicted if route.name == "Predicted" else backed).append((position, log, event))
+
+    if not predicted and not backed:
+        return remaining
+
+    claimed = await claim_events(
+        db, ARBITRUM_CHAIN, [(log, "Predicted") for _, log, _ in predicted] + [(log, "Backed") for _, log, _ in backed]
+    )
+    backed = [item for item, fresh in zip(backed, claimed[len(predicted):]) if fresh]
+    predicted = [item for item, fresh in zip(predicted, claimed) if fresh]
+
+    skipped = []
+    if predicted:
+        skipped.extend(await bulk_insert_predictions(db, predicted))
+    if backed:
+        skipped.extend(await bulk_insert_backs(db, backed))
+    if skipped:
+        await release_events(db, ARBITRUM_CHAIN, [messages[position]['result'] for position in skipped])
+    return sorted(remaining + skipped)
+
+
+async def prefetch_arbitrum_users(messages: List[Dict[str, Any]], db) -> None:
+    """Loads the users of every log of a group in `USER_FIELDS` into `user_cache`, in one query."""
+    addresses = []
+    for message in messages:
+        log = message['result']
+        route = usdtv1_dispatch_table.route(log['topics'][0]) if log['topics'] else None
+        if route is None or route.decoder is None or route.name not in USER_FIELDS:
+            continue
+        try:
+            addresses.append(getattr(route.decoder(log), USER_FIELDS[route.name]))
+        except Exception:
+            # Left to the handler, which reports it
+            continue
+    if addresses:
+        await user_cache.prefetch(db, addresses)
@@ -2,6 +2,7 @@ from typing import Dict
 from hexbytes import HexBytes
 
 from app.core.web3_services.utils import load_abi, get_event_topic
+from app.core.web3_services.decoders import EventRecord, compile_abi_decoders
 from ...logger import logging
 
 
@@ -31,8 +32,46 @@ def usdtv1_event_topics_dict() -> Dict[str, HexBytes]:
             "UserBalance": get_event_topic(USDTV1_ABI, "UserBalance"),
             "ReceivedFallback": get_event_topic(USDTV1_ABI, "ReceivedFallback"),
             "EtherWithdrawn": get_event_topic(BALANCE_ABI, "EtherWithdrawn"),
-            "RevenueWithdrawn": get_event_topic(BALANCE_ABI, "RevenueWithdrawn")
+            "RevenueWithdrawn": get_event_topic(BALANCE_ABI, "RevenueWithdrawn"),
+            "AdminAdded": get_event_topic(USDTV1_ABI, "AdminAdded"),
+            "AdminRemoved": get_event_topic(USDTV1_ABI, "AdminRemoved")
         }
     except Exception as e:
         logger.error(f"Failed to construct event topics dictionary: {e}")
-        return {}
\ No newline at end of file
+        return {}
+
+
+def usdtv1_event_decoders() -> Dict[str, type[EventRecord]]:
+    """
+    Constructs a dictionary of precompiled decoders for USDTv1 events.
+
+    Each event is decoded with the ABI its topic is taken from, so the indexed
+    inputs line up with the log topics.
+    """
+    try:
+        usdtv1 = compile_abi_decoders(load_abi(USDTV1_ABI_PATH))
+        balance = compile_abi_decoders(load_abi(BALANCE_USDT_ABI_PATH))
+        games = compile_abi_decoders(load_abi(GAMES_MANAGER))
+        return {
+            "Deposited": balance["Deposited"],
+            "Predicted": usdtv1["Predicted"],
+            "Backed": usdtv1["Backed"],
+            "Claimed": balance["Claimed"],
+            "GameRegistered": games["GameRegistered"],
+            "PredictionSettled": usdtv1["PredictionSettled"],
+            "BetSold": usdtv1["BetSold"],
+            "BetSellInitiated": usdtv1["BetSellInitiated"],
+            "SellingPriceChanged": usdtv1["SellingPriceChanged"],
+            "GameResolved": games["GameResolved"],
+            "UserBalance": usdtv1["UserBalance"],
+            "ReceivedFallback": usdtv1["ReceivedFallback"],
+            "EtherWithdrawn": balance["EtherWithdrawn"],
+            "RevenueWithdrawn": balance["RevenueWithdrawn"],
+            "AdminAdded": usdtv1["AdminAdded"],
+            "AdminRemoved": usdtv1["AdminRemoved"],
+            "OwnershipTransferInitiated": usdtv1["OwnershipTransferInitiated"],
+            "OwnershipTransferCompleted": usdtv1["OwnershipTransferCompleted"]
+        }
+    except Exception as e:
+        logger.error(f"Failed to construct event decoders dictionary: {e}")
+        return {}
@@ -55,26 +55,15 @@ async def queue_missed_events_for_usdtv1_arb_alchemy(
     manager = FallBackSubscriptionHandler(WSS_URL, AL, AS)
 
     try:
-        # Apply timeout to the entire connection and log-fetching process
-        await asyncio.wait_for(
-            manager.fetch_logs(process_arbitrum_callbacklogs, filter_params),
-            timeout=float(settings.WEBSOCKET_TIMEOUT)
-        )
-
-        # Connection check with a timeout loop
-        while not manager.is_connected():
-            logger.info("Fallback WebSocket Not Connected Yet!")
-            await asyncio.sleep(5)
-        
-    except asyncio.TimeoutError:
-        logger.error("WebSocket operation timed out.")
-        await manager.disconnect()
+        # Windows are fetched with their own timeout and streamed as they complete,
+        # so the range as a whole is only bounded by the worker job timeout
+        await manager.fetch_logs(process_arbitrum_callbacklogs, filter_params)
     except asyncio.CancelledError:
         logger.error("Task was canceled, disconnecting WebSocket...")
-        await manager.disconnect()
         raise 
     except Exception as e:
-        logger.error(f"Failed to subscribe to fallback events: {e}")
+        logger.error(f"Failed to fetch fallback events: {e}")
+        raise
     finally:
         await manager.disconnect()
         logger.info("WebSocket disconnected.")
@@ -1,4 +1,4 @@
-from typing import Dict
+from typing import Any, Dict, Mapping
 
 from app.core.web3_services.arbitrum_one.handlers.usdtv1 import (
     process_usdtv1_deposits,
@@ -48,3 +48,43 @@ def usdtv1_event_handlers() -> Dict[str, callable]:
         "OwnershipTransferInitiated": transfer_ownership_initiated,
         "OwnershipTransferCompleted": transfer_ownership_completed
     }
+
+
+# ------ partition keys: events touching the same entity share a key ------
+def user_partition(payload: Mapping[str, Any]) -> bytes:
+    """Balance events, keyed by the user address (first indexed topic)."""
+    return bytes(payload['topics'][1][-20:])
+
+
+def game_partition(payload: Mapping[str, Any]) -> bytes:
+    """Game events, keyed by match id."""
+    return b"game:" + bytes(payload['topics'][1])
+
+
+def prediction_partition(payload: Mapping[str, Any]) -> bytes:
+    """`Predicted`/`Backed`, keyed by (contract, match id, bet id)."""
+    topics = payload['topics']
+    return payload['address'].encode() + bytes(topics[3]) + bytes(topics[1])
+
+
+def listed_prediction_partition(payload: Mapping[str, Any]) -> bytes:
+    """Prediction updates indexing `(bet id, match id)`, keyed like `prediction_partition`."""
+    topics = payload['topics']
+    return payload['address'].encode() + bytes(topics[2]) + bytes(topics[1])
+
+
+def usdtv1_event_partitions() -> Dict[str, callable]:
+    """Maps events to the partition key of the entity they update."""
+    return {
+        "Deposited": user_partition,
+        "Claimed": user_partition,
+        "UserBalance": user_partition,
+        "Predicted": prediction_partition,
+        "Backed": prediction_partition,
+        "BetSellInitiated": listed_prediction_partition,
+        "BetSold": listed_prediction_partition,
+        "SellingPriceChanged": listed_prediction_partition,
+        "PredictionSettled": listed_prediction_partition,
+        "GameRegistered": game_partition,
+        "GameResolved": game_partition
+    }
@@ -3,6 +3,7 @@ from eth_abi.abi import decode
 from app.core.logger import logging
 from app.core.web3_services.arbitrum_one.handlers.helper import usdt_to_decimal, get_admin_emails
 from app.core.akabokisi.manager import MailboxManager
+from app.core.web3_services.admins import invalidate_admin_emails
 from app.core.constants import (
     revenue_alert,
     admin_added_alert,
@@ -28,20 +29,17 @@ from app.schemas.users import QuickAdminRead, QuickEmailRead
 
 logger = logging.getLogger(__name__)
 
-async def revenue_withdrawn(payload, db):
+async def revenue_withdrawn(payload, db, event):
     """
     Handler for `RevenueWithdrawn` event
 
     Pushes notifications to queue.
     """
     try:
-        _user: str = decode(['address'], payload['topics'][1])[0]
-        _amount: int = decode(['uint256'], payload['topics'][1])[1]
+        public_address: str = event._address
+        amount = usdt_to_decimal(event.amount)
 
-        public_address = _user.lower()
-        amount = usdt_to_decimal(_amount)
-
-        caller: QuickEmailRead | None = crud_users.get(
+        caller: QuickEmailRead | None = await crud_users.get(
             db=db,
             schema_to_select=QuickEmailRead,
             public_address=public_address
@@ -66,16 +64,17 @@ async def revenue_withdrawn(payload, db):
     except Exception as e:
         logger.error(f"Error processing 'RevenueWithdrawn' event: {e}")
 
-async def admin_added(payload, db):
+async def admin_added(payload, db, event):
     """
     Handler for `AdminAdded` event
 
-    Pushes notifications to queue.
+    Invalidates the cached admin emails and pushes notifications to queue.
     """
     try:
         _address: str = payload['address']
-        _user: str = decode(['address'], payload['topics'][1])[0]
+        _user: str = event.admin
 
+        await invalidate_admin_emails()
         mail = MailboxManager()
         emails_list = await get_admin_emails(db, QuickAdminRead)
         message = on_admin_added(_user, _address)
@@ -91,16 +90,17 @@ async def admin_added(payload, db):
     except Exception as e:
         logger.error(f"Error processing 'AdminAdded' event: {e}")
 
-async def admin_removed(payload, db):
+async def admin_removed(payload, db, event):
     """
     Handler for `AdminRemoved` event
 
-    Pushes notifications to queue.
+    Invalidates the cached admin emails and pushes notifications to queue.
     """
     try:
         _address: str = payload['address']
-        _user: str = decode(['address'], payload['topics'][1])[0]
+        _user: str = event.admin
 
+        await invalidate_admin_emails()
         mail = MailboxManager()
         emails_list = await get_admin_emails(db, QuickAdminRead)
         message = on_admin_removed(_user, _address)
@@ -193,7 +193,7 @@ async def updated_blacklist(payload, db):
     except Exception as e:
         logger.error(f"Error processing 'RemovedFromWhitelist' event: {e}")
 
-async def transfer_ownership_initiated(payload, db):
+async def transfer_ownership_initiated(payload, db, event):
     """
     Handler for `OwnershipTransferInitiated` event
 
@@ -201,8 +201,8 @@ async def transfer_ownership_initiated(payload, db):
     """
     try:
         _address: str = payload['address']
-        current_owner: str = decode(['address'], payload['topics'][1])[0]
-        future_owner: str = decode(['address'], payload['topics'][1])[1]
+        current_owner: str = event.current_owner
+        future_owner: str = event.future_owner
 
         mail = MailboxManager()
         emails_list = await get_admin_emails(db, QuickAdminRead)
@@ -219,7 +219,7 @@ async def transfer_ownership_initiated(payload, db):
     except Exception as e:
         logger.error(f"Error processing 'OwnershipTransferInitiated' event: {e}")
 
-async def transfer_ownership_completed(payload, db):
+async def transfer_ownership_completed(payload, db, event):
     """
     Handler for `OwnershipTransferCompleted` event
 
@@ -227,8 +227,8 @@ async def transfer_ownership_completed(payload, db):
     """
     try:
         _address: str = payload['address']
-        previous_owner: str = decode(['address'], payload['topics'][1])[0]
-        new_owner: str = decode(['address'], payload['topics'][1])[1]
+        previous_owner: str = event.previous_owner
+        new_owner: str = event.new_owner
 
         mail = MailboxManager()
         emails_list = await get_admin_emails(db, QuickAdminRead)
@@ -0,0 +1,145 @@
+from typing import Any, Dict, List, Mapping, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.logger import logging
+from app.core.web3_services.users import user_cache
+from app.core.web3_services.ledger import event_key
+from app.models.user import Prediction
+from .helper import generate_unique_id, usdt_to_decimal
+
+logger = logging.getLogger(__name__)
+
+# (position in the applied batch, log, decoded event)
+BulkEvent = Tuple[int, Mapping[str, Any], Any]
+
+# Keeps multi-row INSERTs well under the 32767 bind parameters Postgres accepts
+PREDICTION_CHUNK_ROWS = 2000
+
+
+async def bulk_insert_predictions(db, events: List[BulkEvent]) -> List[int]:
+    """
+    Set-based `Predicted` handler: one user prefetch and multi-row
+    `INSERT ... ON CONFLICT DO NOTHING` statements for the whole batch.
+
+    Returns the positions of events whose layer is not a known user; they are left
+    to `process_usdtv1_lays`, which fails (and dead-letters) them like before.
+    """
+    await user_cache.prefetch(db, (event.user for _, _, event in events))
+
+    rows, skipped = [], []
+    for position, log, event in events:
+        user = await user_cache.get(db, event.user)
+        if user is None:
+            skipped.append(position)
+            continue
+        contract_address = log['address'].lower()
+        rows.append({
+            "user_id": user.id,
+            "index": event.prediction_id,
+            "layer": event.user,
+            "hash_identifier": generate_unique_id(event.prediction_id, event.game_id, contract_address),
+            "match_id": event.game_id,
+            "contract_address": contract_address,
+            "result": event.result,
+            "amount": usdt_to_decimal(event.amount)
+        })
+
+    inserted = 0
+    for start in range(0, len(rows), PREDICTION_CHUNK_ROWS):
+        stmt = insert(Prediction).values(rows[start:start + PREDICTION_CHUNK_ROWS])
+        result = await db.execute(stmt.on_conflict_do_nothing(index_elements=['hash_identifier']))
+        inserted += result.rowcount
+    logger.info(f"Bulk processed {len(rows)} Lays: {inserted} new, {len(rows) - inserted} duplicates")
+    return skipped
+
+
+# Stages the batch with `unnest`, inserts its backs (already deduplicated by the
+# processed-events ledger claims) and adds their wagers to each prediction with one aggregated
+# UPDATE. Returns the positions of backs whose prediction does not exist.
+_BULK_BACKS_QUERY = text("""
+WITH staged AS (
+    SELECT * FROM unnest(
+        CAST(:positions AS integer[]),
+        CAST(:hash_identifiers AS varchar[]),
+        CAST(:match_ids AS integer[]),
+        CAST(:prediction_indexes AS integer[]),
+        CAST(:opponent_addresses AS varchar[]),
+        CAST(:opponent_wagers AS numeric[]),
+        CAST(:results AS integer[]),
+        CAST(:block_numbers AS integer[]),
+        CAST(:tx_hashes AS varchar[]),
+        CAST(:log_indexes AS integer[])
+    ) AS s(
+        position, hash_identifier, match_id, prediction_index, opponent_address, opponent_wager, result, block_number,
+        tx_hash, log_index
+    )
+),
+matched AS (
+    SELECT s.*, p.id AS prediction_id
+    FROM staged s
+    JOIN prediction p ON p.hash_identifier = s.hash_identifier
+),
+inserted AS (
+    INSERT INTO opponent (
+        prediction_id, match_id, prediction_index, opponent_address, opponent_wager, result, block_number, tx_hash, log_index
+    )
+    SELECT prediction_id, match_id, prediction_index, opponent_address, opponent_wager, result, block_number, tx_hash, log_index
+    FROM matched
+    RETURNING prediction_id, opponent_wager
+),
+totals AS (
+    SELECT prediction_id, sum(opponent_wager) AS wager
+    FROM inserted
+    GROUP BY prediction_id
+),
+updated AS (
+    UPDATE prediction p
+    SET total_opponent_wager = p.total_opponent_wager + t.wager,
+        f_matched = CASE WHEN p.total_opponent_wager + t.wager >= p.amount THEN true ELSE p.f_matched END,
+        p_matched = true
+    FROM totals t
+    WHERE p.id = t.prediction_id
+    RETURNING p.id
+)
+SELECT
+    (SELECT array_agg(s.position) FROM staged s WHERE NOT EXISTS (
+        SELECT 1 FROM matched m WHERE m.position = s.position
+    )) AS skipped,
+    (SELECT count(*) FROM inserted) AS inserted,
+    (SELECT count(*) FROM updated) AS updated
+""")
+
+
+async def bulk_insert_backs(db, events: List[BulkEvent]) -> List[int]:
+    """
+    Set-based `Backed` handler: inserts every new opponent of the batch and applies
+    the summed wagers per prediction, in a single statement.
+
+    Expects logs claimed in the processed-events ledger, so no back is applied twice.
+    Returns the positions of backs whose prediction is unknown, left to `process_usdtv1_backs`.
+    """
+    columns: Dict[str, List[Any]] = {
+        "positions": [], "hash_identifiers": [], "match_ids": [], "prediction_indexes": [],
+        "opponent_addresses": [], "opponent_wagers": [], "results": [], "block_numbers": [],
+        "tx_hashes": [], "log_indexes": []
+    }
+    for position, log, event in events:
+        columns["positions"].append(position)
+        columns["hash_identifiers"].append(
+            generate_unique_id(event.prediction_id, event.game_id, log['address'].lower())
+        )
+        columns["match_ids"].append(event.game_id)
+        columns["prediction_indexes"].append(event.prediction_id)
+        columns["opponent_addresses"].append(event.backer)
+        columns["opponent_wagers"].append(usdt_to_decimal(event.amount))
+        columns["results"].append(event.result)
+        columns["block_numbers"].append(log['blockNumber'])
+        tx_hash, log_index = event_key(log)
+        columns["tx_hashes"].append(tx_hash)
+        columns["log_indexes"].append(log_index)
+
+    row = (await db.execute(_BULK_BACKS_QUERY, columns)).one()
+    logger.info(f"Bulk processed {len(events)} Backs: {row.inserted} new opponents on {row.updated} predictions")
+    return list(row.skipped or [])
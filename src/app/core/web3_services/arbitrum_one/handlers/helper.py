@@ -6,6 +6,7 @@ from fastcrud import JoinConfig
 from app.crud.crud_users import crud_users
 from app.crud.crud_predictions import crud_predictions
 from app.core.logger import logging
+from app.core.web3_services.admins import admin_email_cache
 
 logger = logging.getLogger(__name__)
 
@@ -19,42 +20,27 @@ def usdt_to_decimal(value: int) -> Decimal:
     """Converts amount from on-chain to a human readable format in USDT"""
     return (Decimal(value) / Decimal(10**6)).quantize(Decimal("0.01"), rounding=ROUND_DOWN)
 
-def validate_block_number(prev_block_number: int, latest_block_number: int, block_number: int) -> List[int]:
-    """
-    Validates block number uniqueness to avoid duplicate deposits
+async def load_admin_emails(db, schema: Any) -> List[str]:
+    """Queries the emails of the administrators."""
+    users = await crud_users.get_multi(
+        db=db,
+        schema_to_select=schema,
+        is_admin=True
+    )
+
+    if users is None:
+        raise Exception("Unable to fetch Administrators!")
+
+    return [
+        item['email']
+        for item in users['data']
+        if item.get('email') is not None
+    ]
 
-    Returns a list of previous and latest block numbers
-    """
-    if prev_block_number or latest_block_number != block_number:
-        if block_number < latest_block_number:
-            _prev = block_number
-            _latest = latest_block_number
-            return [_prev, _latest]
-        else:
-            _prev = latest_block_number
-            _latest = block_number
-            return [_prev, _latest]
-    else:
-        raise Exception(f"Deposit at {block_number} is already registered!")
-    
 async def get_admin_emails(db, schema: Any) -> List[str]:
+    """Emails of the administrators, served from `admin_email_cache`."""
     try:
-        users = await crud_users.get_multi(
-            db=db,
-            schema_to_select=schema,
-            is_admin=True
-        )
-        
-        if users is None:
-            raise Exception("Unable to fetch Administrators!")
-        
-        emails_list = [
-            item['email']
-            for item in users['data']
-            if item.get('email') is not None
-        ]
-        
-        return emails_list
+        return await admin_email_cache.get(lambda: load_admin_emails(db, schema))
     except Exception as e:
         logger.error(f"Failed to fetch admin details: {e}")
         return []
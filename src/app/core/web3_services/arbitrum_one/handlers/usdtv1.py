@@ -1,27 +1,21 @@
-import random
-from eth_abi.abi import decode
 from sqlalchemy import text
-import asyncio
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.dialects.postgresql import insert
 
 from app.core.logger import logging
 from app.models.user import Prediction, Opponent
 from app.crud.crud_predictions import crud_predictions
-from app.crud.crud_users import crud_users
-from app.crud.crud_opponent import crud_opponent
 from app.crud.crud_matches import crud_matches
-from app.schemas.opponents import OpponentCreate, QuickOppRead, OnsettledOppRead
+from app.schemas.opponents import OnsettledOppRead
 from app.schemas.games import GameCreate, GameIdRead, GameStatusUpdate
 from app.core.akabokisi.manager import MailboxManager
+from app.core.web3_services.transaction import autocommit
+from app.core.web3_services.users import user_cache
+from app.core.web3_services.ledger import event_key
+from app.core.web3_services.balances import CLAIM, DEPOSIT, SNAPSHOT, record_movement
 from app.core.constants import game_registered_notify, pred_settled_notify
 from app.core.akabokisi.messages import on_game_register, on_pred_settlement
-from app.schemas.users import (
-    UserRead,
-    UserBalanceRead,
-    QuickUpdateUserBalance,
-    QuickAdminRead
-)
+from app.schemas.users import QuickAdminRead
 from .....schemas.predictions import (
     QuickPredRead,
     PredInitialUpdate,
@@ -34,7 +28,6 @@ from .....schemas.predictions import (
 from .helper import (
     generate_unique_id,
     usdt_to_decimal,
-    validate_block_number,
     get_admin_emails,
     load_settled_prediction_data,
     fetch_addresses
@@ -45,14 +38,14 @@ logger = logging.getLogger(__name__)
 
 
 # ------usdtv1 handlers-----------------------
-async def register_games(payload, db):
+async def register_games(payload, db, event):
     """
     Handler for `GameRegistered` event
 
     Updates game model
     """
     try:
-        _id: int = decode(['uint256'], payload['topics'][1])[0]
+        _id: int = event.game_id
 
         game: GameIdRead | None = await crud_matches.get(
         db=db, schema_to_select=GameIdRead, match_id=_id
@@ -64,7 +57,8 @@ async def register_games(payload, db):
                 GameCreate(
                     match_id=_id,
                     resolved=False
-                )
+                ),
+                commit=autocommit()
             )
             logger.info(f"New game registered: ID={_id}")
 
@@ -83,15 +77,16 @@ async def register_games(payload, db):
             logger.info(f"Game {_id} already registered!")
     except Exception as e:
         logger.error(f"Error processing 'GameRegistered' event: {e}")
+        raise
 
-async def game_resolved(payload, db):
+async def game_resolved(payload, db, event):
     """
     Handler for `GameResolved` event
 
     Updates game model
     """
     try:
-        _id: int = decode(['uint256'], payload['topics'][1])[0]
+        _id: int = event.game_id
 
         game: GameIdRead | None = await crud_matches.get(
         db=db, schema_to_select=GameIdRead, match_id=_id
@@ -104,142 +99,59 @@ async def game_resolved(payload, db):
             GameStatusUpdate(
                 resolved=True
             ),
-            match_id=_id
+            match_id=_id,
+            commit=autocommit()
         )
         logger.info(f"Game Resolved: ID={_id}")
     except Exception as e:
         logger.error(f"Error processing 'GameResolved' event: {e}")
+        raise
 
-async def process_usdtv1_deposits(payload, db, max_retries=3, retry_delay=0.1):
+async def process_usdtv1_deposits(payload, db, event):
     """
     Handler for 'Deposited' event.
-    Atomically updates user balance.
+    Appends the deposit to the balance ledger.
     """
     try:
-        block_number: int = payload['blockNumber']
-        src: str = decode(['address'], payload['topics'][1])[0]
-        amount: int = decode(['uint256'], payload['topics'][2])[0]
-        public_address = src.lower()
+        public_address: str = event._from
 
-        wallet: UserBalanceRead | None = await crud_users.get(
-            db=db, schema_to_select=UserBalanceRead, public_address=public_address
-        )
-        if wallet is None:
+        user = await user_cache.get(db, public_address)
+        if user is None:
             raise Exception(f"User {public_address} not found")
 
-        bn_list = validate_block_number(
-            wallet['prev_block_number'],
-            wallet['latest_block_number'],
-            block_number
-        )
-
-        _prev = bn_list[0]
-        _latest = bn_list[1]
-        converted_amount = usdt_to_decimal(amount)
-
-        for attempt in range(max_retries):
-            update_query = text("""
-            UPDATE "user"
-            SET balance = balance + :amount,
-                prev_block_number = :prev_block,
-                latest_block_number = :latest_block
-            WHERE public_address = :public_address AND latest_block_number < :latest_block
-            RETURNING balance
-            """)
-
-            result = await db.execute(
-                update_query,
-                {
-                    "amount": converted_amount,
-                    "public_address": public_address,
-                    "prev_block": _prev,
-                    "latest_block": _latest
-                }
-            )
-
-            if result.rowcount > 0:
-                logger.info(f"Processed deposit: src={public_address}, amount={converted_amount}")
-                break
-            else:
-                logger.warning(f"Attempt {attempt + 1}: Concurrent modification for user {public_address}. Retrying...")
-                await asyncio.sleep(retry_delay * (2 ** attempt) * random.uniform(0.8, 1.2))
-        else:
-            raise Exception(f"Balance update failed for user {public_address} after {max_retries} attempts.")
-    except IntegrityError:
-        logger.error(f"IntegrityError: possible duplicate deposit for {public_address}")
+        converted_amount = usdt_to_decimal(event.amount)
+        await record_movement(db, user.id, DEPOSIT, converted_amount, payload)
+        if autocommit():
+            await db.commit()
+        logger.info(f"Processed deposit: src={public_address}, amount={converted_amount}")
     except Exception as e:
         logger.error(f"Error Processing 'Deposited' event: {e}")
+        raise
 
 
-
-async def process_usdtv1_claims(payload, db, max_retries=3, retry_delay=0.1):
+async def process_usdtv1_claims(payload, db, event):
     """
     Handler for `Claimed` event.
-    Updates user balance atomically.
+    Appends the claim to the balance ledger.
     """
     try:
-        block_number: int = payload['blockNumber']
-        dst: str = decode(['address'], payload['topics'][1])[0]
-        amount: int = decode(['uint256'], payload['topics'][2])[0]
-        public_address = dst.lower()
+        public_address: str = event.user
 
-        wallet: UserBalanceRead | None = await crud_users.get(
-            db=db, schema_to_select=UserBalanceRead, public_address=public_address
-        )
-        if wallet is None:
+        user = await user_cache.get(db, public_address)
+        if user is None:
             raise Exception(f"User {public_address} not found")
 
-        # Determine the correct block numbers for atomic update
-        bn_list = validate_block_number(
-            wallet['prev_block_number'],
-            wallet['latest_block_number'],
-            block_number
-        )
-        _prev = bn_list[0]
-        _latest = bn_list[1]
-
-        converted_amount = usdt_to_decimal(amount)
-
-        # Retry loop with exponential backoff and jitter
-        for attempt in range(max_retries):
-            try:
-                update_query = text("""
-                UPDATE "user"
-                SET balance = balance - :amount,
-                    prev_block_number = :prev_block,
-                    latest_block_number = :latest_block
-                WHERE public_address = :public_address AND latest_block_number < :latest_block
-                RETURNING balance
-                """)
-
-                result = await db.execute(
-                    update_query,
-                    {
-                        "amount": converted_amount,
-                        "public_address": public_address,
-                        "prev_block": _prev,
-                        "latest_block": _latest
-                    }
-                )
-
-                if result.rowcount > 0:
-                    logger.info(f"Processed claim: dst={public_address}, amount={converted_amount}")
-                    break
-                else:
-                    logger.warning(f"Concurrent modification detected for user {public_address}. Retrying...")
-                    await asyncio.sleep(retry_delay * (2 ** attempt) * random.uniform(0.8, 1.2))  # Exponential backoff with jitter
-
-            except IntegrityError:
-                logger.error(f"Integrity error during balance update for user {public_address}, attempt {attempt + 1}")
-                await asyncio.sleep(retry_delay * (2 ** attempt) * random.uniform(0.8, 1.2))  # Exponential backoff with jitter
-        else:
-            raise Exception(f"Balance update failed for user {public_address} after {max_retries} attempts.")
-
+        converted_amount = usdt_to_decimal(event.amount)
+        await record_movement(db, user.id, CLAIM, -converted_amount, payload)
+        if autocommit():
+            await db.commit()
+        logger.info(f"Processed claim: dst={public_address}, amount={converted_amount}")
     except Exception as e:
         logger.error(f"Error processing 'Claimed' event: {e}")
+        raise
 
 
-async def process_usdtv1_lays(payload, db):
+async def process_usdtv1_lays(payload, db, event):
     '''
     Handler for `Predicted` event.
 
@@ -247,21 +159,17 @@ async def process_usdtv1_lays(payload, db):
     '''
     try:
         _address: str = payload['address']
-        bet_id: int = decode(['uint256'], payload['topics'][1])[0]
-        layer: str = decode(['address'], payload['topics'][2])[0]
-        gameid: int = decode(['uint256'], payload['topics'][3])[0]
-        non_indexed_data = decode(["uint256", "uint256"], payload['data'])
-        lay_amount: int = non_indexed_data[0]
-        result: int = non_indexed_data[1]
-        
-        public_address = layer.lower()
+        bet_id: int = event.prediction_id
+        public_address: str = event.user
+        gameid: int = event.game_id
+        lay_amount: int = event.amount
+        result: int = event.result
+
         _contract_address = _address.lower()
         hash_id = generate_unique_id(bet_id, gameid, _contract_address)
         _key = (bet_id, gameid, _contract_address)
 
-        wallet: UserRead | None = await crud_users.get(
-            db=db, schema_to_select=UserRead, public_address=public_address
-        )
+        wallet = await user_cache.get(db, public_address)
 
         if wallet is None:
             raise Exception(f"User {public_address} not found")
@@ -270,9 +178,9 @@ async def process_usdtv1_lays(payload, db):
 
         # Use the ON CONFLICT upsert to avoid duplicate entries
         stmt = insert(Prediction).values(
-            user_id=wallet['id'],
+            user_id=wallet.id,
             index=bet_id,
-            layer=layer,
+            layer=public_address,
             hash_identifier=hash_id,
             match_id=gameid,
             contract_address=_contract_address,
@@ -281,7 +189,8 @@ async def process_usdtv1_lays(payload, db):
         ).on_conflict_do_nothing(index_elements=['hash_identifier'])
         
         result = await db.execute(stmt)
-        await db.commit()
+        if autocommit():
+            await db.commit()
 
         if result.rowcount == 0:
             logger.warning(f"Duplicate detected and ignored for {_key}")
@@ -290,98 +199,88 @@ async def process_usdtv1_lays(payload, db):
     
     except IntegrityError:
         logger.error(f"Duplicate prediction detected for Index={bet_id} and Game ID={gameid}")
+        raise
     except Exception as e:
         logger.error(f"Error Processing 'Predicted' event: {e}")
+        raise
+
+
+# Inserts the back and adds its wager to the prediction in one round-trip. Replays are
+# skipped by the processed-events ledger before the handler runs; `uq_opponent_back`
+# only rejects what slips past it. Always returns one row, with a NULL `prediction_id`
+# when the prediction is unknown.
+_BACK_QUERY = text("""
+WITH pred AS (
+    SELECT id FROM prediction WHERE hash_identifier = :hash_identifier
+),
+inserted AS (
+    INSERT INTO opponent (
+        prediction_id, match_id, prediction_index, opponent_address, opponent_wager, result, block_number, tx_hash, log_index
+    )
+    SELECT id, :match_id, :prediction_index, :opponent_address, :opponent_wager, :result, :block_number, :tx_hash, :log_index
+    FROM pred
+    RETURNING prediction_id, opponent_wager
+),
+updated AS (
+    UPDATE prediction p
+    SET total_opponent_wager = p.total_opponent_wager + i.opponent_wager,
+        f_matched = CASE WHEN p.total_opponent_wager + i.opponent_wager >= p.amount THEN true ELSE p.f_matched END,
+        p_matched = true
+    FROM inserted i
+    WHERE p.id = i.prediction_id
+    RETURNING p.total_opponent_wager, p.f_matched, p.p_matched
+)
+SELECT (SELECT id FROM pred) AS prediction_id, u.total_opponent_wager, u.f_matched, u.p_matched
+FROM (SELECT 1) AS one
+LEFT JOIN updated u ON true
+""")
 
 
-async def process_usdtv1_backs(payload, db):
+async def process_usdtv1_backs(payload, db, event):
     """
     Handler for `Backed` event.
 
-    Creates new `Opponent` and updates existing `Prediction` with atomic increment.
+    Creates new `Opponent` and updates existing `Prediction` with atomic increment,
+    in a single statement.
     """
     try:
-        # Decode and prepare data
         _address: str = payload['address']
-        bet_id: int = decode(['uint256'], payload['topics'][1])[0]
-        backer: str = decode(['address'], payload['topics'][2])[0]
-        gameid: int = decode(['uint256'], payload['topics'][3])[0]
-        non_indexed_data = decode(["uint256", "uint256"], payload['data'])
-        back_amount: int = non_indexed_data[0]
-        result: int = non_indexed_data[1]
+        bet_id: int = event.prediction_id
+        gameid: int = event.game_id
         block_number: int = payload['blockNumber']
-
-        public_address = backer.lower()
+        public_address: str = event.backer
         _contract_address = _address.lower()
-        hash_id = generate_unique_id(bet_id, gameid, _contract_address)
+        tx_hash, log_index = event_key(payload)
 
-
-        # Check for duplicate back registration by `block_number`
-        opp = await crud_opponent.get(
-            db=db,
-            schema_to_select=QuickOppRead,
-            match_id=gameid,
-            prediction_index=bet_id,
-            opponent_address=public_address,
-            block_number=block_number
-        )
-        if opp:
-            raise Exception(f"Back already registered! Block_Number={block_number}")
-
-        pred = await crud_predictions.get(
-            db=db,
-            schema_to_select=QuickPredRead,
-            hash_identifier=hash_id
-        )
-        if pred is None:
-            raise Exception(f"No prediction of index {bet_id} for Game: {gameid} from {_contract_address}")
-        
-        converted_amount = usdt_to_decimal(back_amount)
-
-        # Create a new opponent entry
-        await crud_opponent.create(
-            db,
-            OpponentCreate(
-                prediction_id=pred['id'],
-                match_id=gameid,
-                prediction_index=bet_id,
-                opponent_address=public_address,
-                opponent_wager=converted_amount,
-                result=result,
-                block_number=block_number
-            )
-        )
-        logger.info("Opponent Processed Successfully.")
-
-        # Atomic update of total_opponent_wager
-        update_query = text("""
-        UPDATE prediction
-        SET total_opponent_wager = total_opponent_wager + :amount,
-            f_matched = CASE WHEN total_opponent_wager + :amount >= amount THEN true ELSE f_matched END,
-            p_matched = true
-        WHERE index = :bet_id AND match_id = :gameid AND contract_address = :contract_address
-        RETURNING total_opponent_wager
-        """)
-
-        # Execute atomic increment update query
-        result = await db.execute(
-            update_query,
+        row = (await db.execute(
+            _BACK_QUERY,
             {
-                "amount": converted_amount,
-                "bet_id": bet_id,
-                "gameid": gameid,
-                "contract_address": _contract_address
+                "hash_identifier": generate_unique_id(bet_id, gameid, _contract_address),
+                "match_id": gameid,
+                "prediction_index": bet_id,
+                "opponent_address": public_address,
+                "opponent_wager": usdt_to_decimal(event.amount),
+                "result": event.result,
+                "block_number": block_number,
+                "tx_hash": tx_hash,
+                "log_index": log_index
             }
-        )
+        )).one()
+        if autocommit():
+            await db.commit()
 
-        if result.rowcount == 0:
+        if row.prediction_id is None:
             raise Exception(f"No prediction of index {bet_id} for Game: {gameid} from {_contract_address}")
-        logger.info("Prediction Updated successfully.")
+        logger.info(
+            f"Processed Back on prediction {row.prediction_id}: total_opponent_wager={row.total_opponent_wager}, "
+            f"f_matched={row.f_matched}"
+        )
     except Exception as e:
         logger.error(f"Error Processing 'Backed' event: {e}")
+        raise
 
 
-async def process_usdtv1_bet_sell_initiated(payload, db):
+async def process_usdtv1_bet_sell_initiated(payload, db, event):
     """
     Handler for `BetSellInitiated` event.
 
@@ -389,9 +288,9 @@ async def process_usdtv1_bet_sell_initiated(payload, db):
     """
     try:
         _address: str = payload['address']
-        bet_id: int = decode(['uint256'], payload['topics'][1])[0]
-        gameid: int = decode(['uint256'], payload['topics'][2])[0]
-        amount: int = decode(['uint256'], payload['topics'][3])[0]
+        bet_id: int = event.prediction_id
+        gameid: int = event.match_id
+        amount: int = event.amount
 
         _contract_address = _address.lower()
         _id = generate_unique_id(bet_id, gameid, _contract_address)
@@ -414,13 +313,15 @@ async def process_usdtv1_bet_sell_initiated(payload, db):
             ),
             index=bet_id,
             match_id=gameid,
-            contract_address=_contract_address
+            contract_address=_contract_address,
+            commit=autocommit()
         )
         logger.info("Prediction Updated successfully.")
     except Exception as e:
         logger.error(f"Error Processing 'BetsellInitiated' event: {e}")
+        raise
 
-async def process_usdtv1_selling_price_changed(payload, db):
+async def process_usdtv1_selling_price_changed(payload, db, event):
     """
     Handler for `SellingPriceChanged` event.
 
@@ -428,9 +329,9 @@ async def process_usdtv1_selling_price_changed(payload, db):
     """
     try:
         _address: str = payload['address']
-        bet_id: int = decode(['uint256'], payload['topics'][1])[0]
-        gameid: int = decode(['uint256'], payload['topics'][2])[0]
-        new_amount: int = decode(['uint256'], payload['topics'][3])[0]
+        bet_id: int = event.prediction_id
+        gameid: int = event.match_id
+        new_amount: int = event.new_price
 
         _contract_address = _address.lower()
         _id = generate_unique_id(bet_id, gameid, _contract_address)
@@ -452,13 +353,15 @@ async def process_usdtv1_selling_price_changed(payload, db):
             ),
             index=bet_id,
             match_id=gameid,
-            contract_address=_contract_address
+            contract_address=_contract_address,
+            commit=autocommit()
         )
         logger.info("Prediction Updated successfully.")
     except Exception as e:
         logger.error(f"Error Processing 'SellingPriceChanged' event: {e}")
+        raise
 
-async def process_usdtv1_bet_sold(payload, db):
+async def process_usdtv1_bet_sold(payload, db, event):
     """
     Handler for `BetSold` event.
 
@@ -466,10 +369,9 @@ async def process_usdtv1_bet_sold(payload, db):
     """
     try:
         _address: str = payload['address']
-        bet_id: int = decode(['uint256'], payload['topics'][1])[0]
-        gameid: int = decode(['uint256'], payload['topics'][2])[0]
-        buyer: str = decode(['address'], payload['topics'][3])[0]
-        public_address = buyer.lower()
+        bet_id: int = event.prediction_id
+        gameid: int = event.match_id
+        public_address: str = event.to
         _contract_address = _address.lower()
         _id = generate_unique_id(bet_id, gameid, _contract_address)
 
@@ -489,13 +391,15 @@ async def process_usdtv1_bet_sold(payload, db):
             ),
             index=bet_id,
             match_id=gameid,
-            contract_address=_contract_address
+            contract_address=_contract_address,
+            commit=autocommit()
         )
         logger.info("Prediction Updated successfully.")
     except Exception as e:
         logger.error(f"Error Processing 'BetSold' event: {e}")
+        raise
 
-async def process_usdtv1_settled_pred(payload, db):
+async def process_usdtv1_settled_pred(payload, db, event):
     """
     Handler for `PredictionSettled` event.
 
@@ -503,8 +407,8 @@ async def process_usdtv1_settled_pred(payload, db):
     """
     try:
         _address: str = payload['address']
-        bet_id: int = decode(['uint256'], payload['topics'][1])[0]
-        gameid: int = decode(['uint256'], payload['topics'][2])[0]
+        bet_id: int = event.prediction_id
+        gameid: int = event.match_id
 
         _contract_address = _address.lower()
         _id = generate_unique_id(bet_id, gameid, _contract_address)
@@ -523,7 +427,8 @@ async def process_usdtv1_settled_pred(payload, db):
             PredSettledUpdate(
                 settled=True
             ),
-            hash_identifier=_id
+            hash_identifier=_id,
+            commit=autocommit()
         )
         logger.info("Prediction Updated successfully.")
 
@@ -548,36 +453,28 @@ async def process_usdtv1_settled_pred(payload, db):
         )
     except Exception as e:
         logger.error(f"Error Processing 'PredictionSettled' event: {e}")
+        raise
 
-async def process_usdtv1_settled_pred_balance_read(payload, db):
+async def process_usdtv1_settled_pred_balance_read(payload, db, event):
     """
     Handler for `UserBalance` event.
 
-    Updates user balance when a bet is settled.
+    Records the user balance reported when a bet is settled.
     """
     try:
-        user_address: str = decode(['address'], payload['topics'][1])[0]
-        amount: int = decode(['uint256'], payload['topics'][2])[0]
-
-        public_address = user_address.lower()
+        public_address: str = event._address
+        amount: int = event.amount
 
-        user: UserRead | None = await crud_users.get(
-            db=db,
-            schema_to_select=UserRead,
-            public_address=public_address
-        )
+        user = await user_cache.get(db, public_address)
 
         if user is None:
             raise Exception(f"User {public_address} Not found!")
         
         converted_amount = usdt_to_decimal(amount)
-        await crud_users.update(
-            db,
-            QuickUpdateUserBalance(
-                balance=converted_amount
-            ),
-            public_address=public_address
-        )
+        await record_movement(db, user.id, SNAPSHOT, converted_amount, payload)
+        if autocommit():
+            await db.commit()
         logger.info("User Balance Updated successfully.")
     except Exception as e:
-        logger.error(f"Error Processing 'UserBalance' event: {e}")
\ No newline at end of file
+        logger.error(f"Error Processing 'UserBalance' event: {e}")
+        raise
\ No newline at end of file
@@ -17,10 +17,15 @@ class WebSocketMonitor:
     def __init__(self):
         """Monitors and Manages websocket connections"""
         self.alchemy_arb_uri = f"{settings.ALCHEMY_BASE_WSS_URI}{settings.ALCHEMY_API_KEY}"
+        self.wss_urls = [self.alchemy_arb_uri] + [
+            uri.strip()
+            for uri in settings.WEBSOCKET_EXTRA_PROVIDER_URIS.split(",")
+            if uri.strip()
+        ]
         self.redis_queue_name = ALCHEMY_REDIS_QUEUE_NAME
         self.subscriptions_queue_name = ALCHEMY_SUBSCRIPTIONS_QUEUE_NAME
         self.handler = SubscriptionHandler(
-            self.alchemy_arb_uri,
+            self.wss_urls,
             self.redis_queue_name,
             self.subscriptions_queue_name
         )
@@ -46,5 +51,6 @@ class WebSocketMonitor:
     async def shutdown(self):
         """Gracefully shut down the WebSocket monitor, releasing resources."""
         logger.info("Shutting down WebSocket monitor gracefully...")
+        await self.handler.flush_buffer()
         await self.handler._cleanup_subscriptions()
         logger.info("Unsubscribed from all events. Exiting...")
\ No newline at end of file
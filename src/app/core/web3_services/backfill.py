@@ -0,0 +1,182 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Mapping, Tuple
+
+from web3 import AsyncWeb3
+
+from app.core.logger import logging
+from app.core.config import settings
+from app.core.web3_services.codec import encode_log
+from app.core.web3_services.dedup import LogDeduplicator, log_key
+from app.core.web3_services.transport import ListTransport, StreamTransport
+
+logger = logging.getLogger(__name__)
+
+# Substrings of provider errors meaning "split the range and retry", e.g. Alchemy's
+# "Log response size exceeded..." or "query returned more than 10000 results".
+TOO_MANY_RESULTS = (
+    "more than",
+    "too many",
+    "response size",
+    "size exceeded",
+    "limit exceeded",
+    "range is too large",
+    "range too large",
+    "block range",
+)
+
+
+def is_too_many_results(error: Exception) -> bool:
+    message = str(error).lower()
+    return any(marker in message for marker in TOO_MANY_RESULTS)
+
+
+class BackfillEngine:
+    """
+    Streams historical logs of `from_block..to_block` into the ingest queue.
+
+    The range is fetched as block windows of adaptive size: a window the provider
+    rejects for returning too many results is split in halves (and later windows
+    shrink), while windows returning fewer than `grow_below` logs let the next ones
+    double, up to `max_window`. Up to `concurrency` windows are fetched at once;
+    results are published in batches strictly in block order as soon as every
+    earlier window is queued, and progress is reported after each window.
+    """
+
+    def __init__(
+        self,
+        w3_socket: AsyncWeb3,
+        transport: ListTransport | StreamTransport,
+        dedup: LogDeduplicator | None,
+        handler: str,
+        window: int = settings.INGEST_BACKFILL_WINDOW,
+        max_window: int = settings.INGEST_BACKFILL_MAX_WINDOW,
+        grow_below: int = settings.INGEST_BACKFILL_GROW_BELOW,
+        concurrency: int = settings.INGEST_BACKFILL_CONCURRENCY,
+        batch_size: int = settings.INGEST_BATCH_SIZE,
+        window_timeout: float = settings.WEBSOCKET_TIMEOUT,
+        on_progress: Callable[[Dict[str, Any]], Any] | None = None
+    ):
+        self.w3_socket = w3_socket
+        self.transport = transport
+        self.dedup = dedup
+        self.handler = handler
+        self.max_window = max(1, max_window)
+        self.window = min(max(1, window), self.max_window)
+        self.grow_below = grow_below
+        self.concurrency = max(1, concurrency)
+        self.batch_size = max(1, batch_size)
+        self.window_timeout = window_timeout
+        self.on_progress = on_progress
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+
+    async def run(self, filter_params: Mapping[str, Any], from_block: int, to_block: int) -> int:
+        """Backfills the range; returns the number of logs queued."""
+        pending: Deque[Tuple[int, int, asyncio.Task]] = deque()
+        next_block = from_block
+        progress = {
+            "from_block": from_block,
+            "to_block": to_block,
+            "blocks_done": 0,
+            "windows_done": 0,
+            "logs_fetched": 0,
+            "logs_queued": 0,
+        }
+        started = time.monotonic()
+
+        try:
+            while next_block <= to_block or pending:
+                # Keep a bounded lookahead of windows in flight; the semaphore caps actual RPCs
+                while next_block <= to_block and len(pending) < 2 * self.concurrency:
+                    end = min(next_block + self.window - 1, to_block)
+                    pending.append((next_block, end, asyncio.create_task(self._fetch(filter_params, next_block, end))))
+                    next_block = end + 1
+
+                start, end, task = pending.popleft()
+                logs = await task
+                queued = await self._publish(logs)
+
+                progress["blocks_done"] += end - start + 1
+                progress["windows_done"] += 1
+                progress["logs_fetched"] += len(logs)
+                progress["logs_queued"] += queued
+                progress["window"] = [start, end]
+                progress["next_window_size"] = self.window
+                progress["elapsed_s"] = round(time.monotonic() - started, 2)
+                logger.info(
+                    f"Backfilled blocks {start}..{end}: {queued}/{len(logs)} logs queued "
+                    f"({progress['blocks_done']}/{to_block - from_block + 1} blocks)"
+                )
+                await self._report(progress)
+        finally:
+            for _, _, task in pending:
+                task.cancel()
+
+        return progress["logs_queued"]
+
+    async def _fetch(self, filter_params: Mapping[str, Any], start: int, end: int) -> List[Any]:
+        """Fetches a window, splitting it until the provider accepts every part."""
+        try:
+            async with self._semaphore:
+                logs = await asyncio.wait_for(
+                    self.w3_socket.eth.get_logs({**filter_params, "fromBlock": start, "toBlock": end}),
+                    timeout=self.window_timeout
+                )
+        except Exception as e:
+            if end <= start or not is_too_many_results(e):
+                raise
+            self.window = max(1, min(self.window, (end - start + 1) // 2))
+            logger.warning(f"Blocks {start}..{end} returned too many results, splitting: {e}")
+            mid = (start + end) // 2
+            left, right = await asyncio.gather(
+                self._fetch(filter_params, start, mid),
+                self._fetch(filter_params, mid + 1, end)
+            )
+            return left + right
+
+        if len(logs) < self.grow_below and end - start + 1 >= self.window:
+            self.window = min(self.window * 2, self.max_window)
+        return logs
+
+    async def _publish(self, logs: List[Any]) -> int:
+        """
+        Queues the logs of a window in batches, skipping logs already ingested.
+
+        The dedup keys claimed for a batch are released when it cannot be queued,
+        so a retry of the backfill does not skip its logs.
+        """
+        queued = 0
+        for i in range(0, len(logs), self.batch_size):
+            batch = logs[i:i + self.batch_size]
+            claimed = []
+            if self.dedup is not None:
+                keys = [log_key(log) for log in batch]
+                is_new = await self.dedup.filter_new(keys)
+                batch = [log for log, new in zip(batch, is_new) if new]
+                claimed = [key for key, new in zip(keys, is_new) if new]
+            if not batch:
+                continue
+            try:
+                await self.transport.publish([encode_log(self.handler, log, backfill=True) for log in batch])
+            except BaseException:
+                await self._release(claimed)
+                raise
+            queued += len(batch)
+        return queued
+
+    async def _release(self, keys: List[bytes]) -> None:
+        try:
+            await self.dedup.release(keys)
+        except Exception as e:
+            logger.error(f"Failed to release {len(keys)} dedup keys: {e}")
+
+    async def _report(self, progress: Dict[str, Any]) -> None:
+        if self.on_progress is None:
+            return
+        try:
+            result = self.on_progress(dict(progress))
+            if asyncio.iscoroutine(result):
+                await result
+        except Exception as e:
+            logger.error(f"Failed to report backfill progress: {e}")
@@ -0,0 +1,134 @@
+import asyncio
+import time
+from typing import Any, Dict, List
+
+from redis.exceptions import RedisError
+
+from app.core.logger import logging
+from app.core.config import settings
+from app.core.web3_services.metrics import publish_metrics
+from app.core.web3_services.spill import DiskSpill
+from app.core.web3_services.transport import Entry, ListTransport, StreamTransport
+
+logger = logging.getLogger(__name__)
+
+
+class BackpressureTransport:
+    """
+    Ingest transport wrapper that keeps the Redis queue between two watermarks.
+
+    Once the queue holds `high_watermark` entries, published payloads are appended
+    to a local `DiskSpill` instead. `run()` drains the spill back into Redis, oldest
+    first, once the queue fell below `low_watermark`. While anything is spilled new
+    payloads are spilled too, so queue order is preserved.
+
+    Queue depth is tracked locally between periodic `LLEN`/`XLEN` refreshes, so
+    publishing costs no extra round-trip.
+    """
+
+    def __init__(
+        self,
+        transport: ListTransport | StreamTransport,
+        spill: DiskSpill,
+        high_watermark: int = settings.INGEST_HIGH_WATERMARK,
+        low_watermark: int = settings.INGEST_LOW_WATERMARK,
+        drain_batch: int = settings.INGEST_SPILL_DRAIN_BATCH,
+        check_interval_ms: int = settings.INGEST_BACKPRESSURE_CHECK_MS
+    ):
+        self.transport = transport
+        self.redis = transport.redis
+        self.queue_name = transport.queue_name
+        self.spill = spill
+        self.high_watermark = high_watermark
+        self.low_watermark = min(low_watermark, high_watermark)
+        self.drain_batch = max(1, drain_batch)
+        self.check_interval = check_interval_ms / 1000
+        self.depth = 0
+        self.spilled_total = 0
+        self.drained_total = 0
+        self.drain_rate = 0.0
+
+    async def setup(self) -> None:
+        await self.transport.setup()
+
+    async def publish(self, payloads: List[bytes]) -> None:
+        if not payloads:
+            return
+        if self.spill.records or self.depth + len(payloads) > self.high_watermark:
+            if not self.spill.records:
+                logger.warning(f"{self.queue_name} reached {self.depth} entries, spilling to {self.spill.directory}")
+            self.spill.append(payloads)
+            self.spilled_total += len(payloads)
+            return
+
+        await self.transport.publish(payloads)
+        self.depth += len(payloads)
+
+    async def read(self, count: int, block_ms: int) -> List[Entry]:
+        return await self.transport.read(count, block_ms)
+
+    async def ack(self, entry_ids: List[bytes]) -> None:
+        await self.transport.ack(entry_ids)
+
+    async def size(self) -> int:
+        return await self.transport.size()
+
+    async def run(self) -> None:
+        """Refreshes the queue depth, drains the spill below the low watermark and publishes metrics."""
+        last_report = 0.0
+        while True:
+            try:
+                self.depth = await self.transport.size()
+                drained, started = 0, time.monotonic()
+                if self.spill.records and self.depth < self.low_watermark:
+                    drained = await self._drain()
+                if drained:
+                    self.drain_rate = drained / max(time.monotonic() - started, 1e-6)
+                    logger.info(f"Drained {drained} spilled payloads into {self.queue_name}, {self.spill.records} left")
+                elif not self.spill.records:
+                    self.drain_rate = 0.0
+                self.spill.flush()
+
+                if time.monotonic() - last_report >= 10:
+                    await publish_metrics(self.redis, "ingest_backpressure", self.snapshot())
+                    last_report = time.monotonic()
+            except asyncio.CancelledError:
+                raise
+            except (RedisError, OSError) as e:
+                logger.error(f"Backpressure check of {self.queue_name} failed: {e}")
+            await asyncio.sleep(self.check_interval)
+
+    async def _drain(self) -> int:
+        """Moves spilled payloads back into Redis until the spill is empty or the queue is full again."""
+        drained = 0
+        while self.spill.records and self.depth < self.high_watermark:
+            payloads, cursor = self.spill.read(min(self.drain_batch, self.high_watermark - self.depth))
+            if not payloads:
+                break
+            await self.transport.publish(payloads)
+            self.spill.consume(len(payloads), cursor)
+            self.depth += len(payloads)
+            self.drained_total += len(payloads)
+            drained += len(payloads)
+            # Let the websocket loop run between batches
+            await asyncio.sleep(0)
+        return drained
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "queue": self.queue_name,
+            "queue_depth": self.depth,
+            "high_watermark": self.high_watermark,
+            "low_watermark": self.low_watermark,
+            "spilling": bool(self.spill.records),
+            "spill_records": self.spill.records,
+            "spill_bytes": self.spill.pending_bytes,
+            "spill_segments": len(self.spill.segments),
+            "spilled_total": self.spilled_total,
+            "drained_total": self.drained_total,
+            "drain_rate_per_s": round(self.drain_rate, 1),
+        }
+
+    def close(self) -> None:
+        """Syncs the spill to disk; what is left is drained by the next run."""
+        self.spill.flush()
@@ -0,0 +1,206 @@
+import asyncio
+from decimal import Decimal
+from typing import Any, Mapping
+
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import sessionmaker
+
+from app.core.logger import logging
+from app.core.config import settings
+from app.core.db.database import local_session
+from app.core.web3_services.ledger import event_key
+from app.models.events import BalanceLedger
+
+logger = logging.getLogger(__name__)
+
+DEPOSIT = "deposit"
+CLAIM = "claim"
+SNAPSHOT = "snapshot"
+
+# Advisory lock held by the folding transaction, so one folder runs at a time across
+# consumers
+BALANCE_FOLD_LOCK = 0x62616c616e6365
+
+# Folds a batch of pending movements into `user.balance`, in chain order
+# (`block_number`, `log_index`) whatever order they were appended in. A snapshot
+# replaces the balance only when no later snapshot of the user was folded; the
+# movements after it (folded already or not) are then added back on top. Movements
+# at or before the latest folded snapshot are already part of it and are skipped,
+# so backfilled and replayed events never roll a balance back.
+_FOLD_QUERY = text("""
+WITH batch AS (
+    SELECT id FROM balance_ledger WHERE NOT materialized ORDER BY id LIMIT :limit
+),
+marked AS (
+    UPDATE balance_ledger l
+    SET materialized = true
+    FROM batch b
+    WHERE l.id = b.id
+    RETURNING l.id, l.user_id, l.kind, l.amount, l.block_number, l.log_index
+),
+folded_snapshot AS (
+    SELECT DISTINCT ON (l.user_id) l.user_id, l.block_number, l.log_index
+    FROM balance_ledger l
+    WHERE l.materialized AND l.kind = 'snapshot' AND l.user_id IN (SELECT user_id FROM marked)
+    ORDER BY l.user_id, l.block_number DESC, l.log_index DESC
+),
+new_snapshot AS (
+    SELECT DISTINCT ON (m.user_id) m.user_id, m.amount, m.block_number, m.log_index
+    FROM marked m
+    LEFT JOIN folded_snapshot f ON f.user_id = m.user_id
+    WHERE m.kind = 'snapshot'
+      AND (f.user_id IS NULL OR (m.block_number, m.log_index) > (f.block_number, f.log_index))
+    ORDER BY m.user_id, m.block_number DESC, m.log_index DESC
+),
+counted AS (
+    SELECT m.user_id, m.amount
+    FROM marked m
+    LEFT JOIN new_snapshot s ON s.user_id = m.user_id
+    LEFT JOIN folded_snapshot f ON f.user_id = m.user_id
+    WHERE m.kind <> 'snapshot'
+      AND (s.user_id IS NULL OR (m.block_number, m.log_index) > (s.block_number, s.log_index))
+      AND (f.user_id IS NULL OR (m.block_number, m.log_index) > (f.block_number, f.log_index))
+    UNION ALL
+    SELECT l.user_id, l.amount
+    FROM balance_ledger l
+    JOIN new_snapshot s ON s.user_id = l.user_id
+    WHERE l.materialized AND l.kind <> 'snapshot'
+      AND (l.block_number, l.log_index) > (s.block_number, s.log_index)
+),
+totals AS (
+    SELECT u.user_id,
+           s.amount AS snapshot,
+           coalesce((SELECT sum(c.amount) FROM counted c WHERE c.user_id = u.user_id), 0) AS delta,
+           (SELECT max(m.block_number) FROM marked m WHERE m.user_id = u.user_id AND m.kind <> 'snapshot') AS block_number
+    FROM (SELECT DISTINCT user_id FROM marked) u
+    LEFT JOIN new_snapshot s ON s.user_id = u.user_id
+),
+updated AS (
+    UPDATE "user" u
+    SET balance = coalesce(t.snapshot, u.balance) + t.delta,
+        prev_block_number = CASE WHEN t.block_number > u.latest_block_number
+                                 THEN u.latest_block_number ELSE u.prev_block_number END,
+        latest_block_number = GREATEST(u.latest_block_number, t.block_number)
+    FROM totals t
+    WHERE u.id = t.user_id
+    RETURNING u.id
+)
+SELECT (SELECT count(*) FROM marked) AS folded, (SELECT count(*) FROM updated) AS users
+""")
+
+# `user.balance` plus the movements not folded yet, read with the same rules as the
+# fold. Pending movements are few and indexed per user, so this stays O(1).
+_CURRENT_BALANCE_QUERY = text("""
+WITH u AS (
+    SELECT id, balance FROM "user" WHERE public_address = :public_address
+),
+folded_snapshot AS (
+    SELECT l.block_number, l.log_index
+    FROM balance_ledger l
+    JOIN u ON l.user_id = u.id
+    WHERE l.materialized AND l.kind = 'snapshot'
+    ORDER BY l.block_number DESC, l.log_index DESC
+    LIMIT 1
+),
+new_snapshot AS (
+    SELECT l.amount, l.block_number, l.log_index
+    FROM balance_ledger l
+    JOIN u ON l.user_id = u.id
+    WHERE NOT l.materialized AND l.kind = 'snapshot'
+      AND NOT EXISTS (
+          SELECT 1 FROM folded_snapshot f WHERE (f.block_number, f.log_index) >= (l.block_number, l.log_index)
+      )
+    ORDER BY l.block_number DESC, l.log_index DESC
+    LIMIT 1
+),
+counted AS (
+    SELECT l.amount
+    FROM balance_ledger l
+    JOIN u ON l.user_id = u.id
+    WHERE l.kind <> 'snapshot'
+      AND (NOT l.materialized OR EXISTS (SELECT 1 FROM new_snapshot))
+      AND NOT EXISTS (
+          SELECT 1 FROM new_snapshot s WHERE (s.block_number, s.log_index) >= (l.block_number, l.log_index)
+      )
+      AND NOT EXISTS (
+          SELECT 1 FROM folded_snapshot f WHERE (f.block_number, f.log_index) >= (l.block_number, l.log_index)
+      )
+)
+SELECT coalesce((SELECT amount FROM new_snapshot), u.balance)
+       + coalesce((SELECT sum(amount) FROM counted), 0) AS balance
+FROM u
+""")
+
+
+async def record_movement(db, user_id: int, kind: str, amount: Decimal, log: Mapping[str, Any]) -> None:
+    """Appends a balance movement of `log`; never touches the `user` row."""
+    tx_hash, log_index = event_key(log)
+    await db.execute(insert(BalanceLedger).values(
+        user_id=user_id,
+        kind=kind,
+        amount=amount,
+        tx_hash=tx_hash,
+        log_index=log_index,
+        block_number=log['blockNumber']
+    ))
+
+
+async def current_balance(db, public_address: str) -> Decimal | None:
+    """Balance of a user including the movements not folded yet; None for an unknown address."""
+    return (await db.execute(_CURRENT_BALANCE_QUERY, {"public_address": public_address})).scalar_one_or_none()
+
+
+class BalanceMaterializer:
+    """
+    Folds `balance_ledger` movements into `user.balance` in the background.
+
+    Handlers only append movements, so consumers never wait on a user row; each
+    fold updates a user once for all of its pending movements. Replicas can all run
+    one: an advisory lock lets a single folder work at a time.
+    """
+
+    def __init__(
+        self,
+        session_factory: sessionmaker = local_session,
+        batch_size: int = settings.INGEST_BALANCE_FOLD_BATCH,
+        interval_ms: int = settings.INGEST_BALANCE_FOLD_INTERVAL_MS
+    ):
+        self.session_factory = session_factory
+        self.batch_size = max(1, batch_size)
+        self.interval_ms = interval_ms
+
+    async def fold(self) -> int:
+        """Folds one batch of pending movements; returns how many were folded."""
+        async with self.session_factory() as db:
+            locked = (await db.execute(
+                text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": BALANCE_FOLD_LOCK}
+            )).scalar_one()
+            if not locked:
+                await db.rollback()
+                return 0
+            row = (await db.execute(_FOLD_QUERY, {"limit": self.batch_size})).one()
+            await db.commit()
+        if row.folded:
+            logger.debug(f"Folded {row.folded} balance movements into {row.users} users.")
+        return row.folded
+
+    async def fold_all(self) -> int:
+        """Folds until nothing is pending (or another folder holds the lock)."""
+        total = 0
+        while (folded := await self.fold()) > 0:
+            total += folded
+        return total
+
+    async def run(self) -> None:
+        """Keeps folding until cancelled; idles `interval_ms` once caught up."""
+        while True:
+            try:
+                folded = await self.fold()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Failed to fold balance movements: {e}")
+                folded = 0
+            if folded < self.batch_size:
+                await asyncio.sleep(self.interval_ms / 1000)
@@ -0,0 +1,205 @@
+import asyncio
+from typing import List, NamedTuple
+
+from redis.exceptions import RedisError
+
+from app.core.logger import logging
+from app.core.config import settings
+from app.core.web3_services.transport import ListTransport, StreamTransport
+from app.core.web3_services.backpressure import BackpressureTransport
+from app.core.web3_services.dedup import LogDeduplicator
+from app.core.web3_services.gaps import IngestWatermark
+
+logger = logging.getLogger(__name__)
+
+
+class Pending(NamedTuple):
+    key: bytes | None
+    payload: bytes
+    block_number: int | None
+    # The dedup key was claimed in Redis by this buffer
+    claimed: bool = False
+
+
+class EnqueueBuffer:
+    """
+    Accumulates serialized payloads and publishes them to the ingest transport in batches.
+
+    A batch is flushed in a single round-trip (multi-value `RPUSH` or pipelined `XADD`)
+    as soon as `max_batch` payloads are pending, or `max_latency_ms` after the first
+    payload of the batch arrived, whichever happens first.
+
+    NOTE: Payloads are only dropped from the buffer once Redis acknowledged the push.
+    A failed flush puts the batch back in front of the buffer so it is retried,
+    and `close()` flushes whatever is left on shutdown (at-least-once).
+
+    When a `dedup` is given, payloads added with a key are checked against the
+    Redis dedup set in the same flush, and logs already ingested are dropped.
+    Payloads of a failed flush keep their claimed keys, so retries do not drop
+    them as duplicates of themselves; `close()` releases the keys of whatever
+    could not be published at all.
+
+    When a `watermark` is given, every successful flush advances it to the block
+    before the highest one published: that block may still have logs in flight,
+    every earlier one is fully ingested.
+
+    `hold()` pauses flushing (payloads keep accumulating) until `release()`, so a
+    gap backfill can be queued ahead of the live logs received meanwhile. At most
+    `max_held` payloads are kept back: beyond that they are flushed anyway, through
+    the transport's backpressure (and disk spill) like any other batch; the watermark
+    stays pinned below the gap all the same (`IngestWatermark.pin`).
+    """
+
+    def __init__(
+        self,
+        transport: ListTransport | StreamTransport | BackpressureTransport,
+        dedup: LogDeduplicator | None = None,
+        watermark: IngestWatermark | None = None,
+        max_batch: int = settings.INGEST_BATCH_SIZE,
+        max_latency_ms: int = settings.INGEST_FLUSH_INTERVAL_MS,
+        max_held: int = settings.INGEST_HOLD_MAX_PAYLOADS
+    ):
+        self.transport = transport
+        self.queue_name = transport.queue_name
+        self.dedup = dedup
+        self.watermark = watermark
+        self.max_batch = max(1, max_batch)
+        self.max_latency = max_latency_ms / 1000
+        self.max_held = max(self.max_batch, max_held)
+        self._pending: List[Pending] = []
+        self._lock = asyncio.Lock()
+        self._timer: asyncio.Task | None = None
+        self._holds = 0
+        self._released = asyncio.Event()
+        self._released.set()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def hold(self) -> None:
+        """Pauses flushing until a matching `release()`."""
+        self._holds += 1
+        self._released.clear()
+
+    def release(self) -> None:
+        """Resumes flushing once every `hold()` has been released."""
+        self._holds = max(0, self._holds - 1)
+        if self._holds == 0:
+            self._released.set()
+            self._schedule_flush()
+
+    async def add(self, payload: bytes, key: bytes | None = None, block_number: int | None = None) -> None:
+        """Buffers a payload, flushing immediately when the batch is full."""
+        self._pending.append(Pending(key, payload, block_number))
+
+        overflow = not self._released.is_set() and len(self._pending) >= self.max_held
+        if overflow:
+            logger.warning(f"{len(self._pending)} payloads held for a gap backfill, flushing them to {self.queue_name}")
+        if (len(self._pending) >= self.max_batch and self._released.is_set()) or overflow:
+            try:
+                await self.flush(force=overflow)
+            except RedisError as e:
+                logger.error(f"Failed to flush {len(self._pending)} payloads to {self.queue_name}: {e}")
+                self._schedule_flush()
+        else:
+            self._schedule_flush()
+
+    async def flush(self, force: bool = False) -> int:
+        """
+        Pushes all pending payloads in one round-trip. Returns the number of payloads pushed.
+
+        Does nothing while the buffer is held, unless `force` is set.
+        """
+        async with self._lock:
+            if not self._pending or not (force or self._released.is_set()):
+                return 0
+
+            batch = self._pending
+            self._pending = []
+            try:
+                if self.dedup is not None:
+                    batch = await self._drop_ingested(batch)
+                await self.transport.publish([entry.payload for entry in batch])
+            except BaseException:
+                # Keep ordering: the failed batch goes back before anything buffered meanwhile
+                self._pending[:0] = batch
+                raise
+
+        if batch:
+            logger.info(f"Added {len(batch)} payloads to queue: {self.queue_name}")
+            await self._advance_watermark(batch)
+        return len(batch)
+
+    async def _advance_watermark(self, batch: List[Pending]) -> None:
+        blocks = [entry.block_number for entry in batch if entry.block_number is not None]
+        if self.watermark is None or not blocks:
+            return
+        try:
+            await self.watermark.advance(max(blocks) - 1)
+        except RedisError as e:
+            logger.error(f"Failed to advance ingest watermark: {e}")
+
+    async def _drop_ingested(self, batch: List[Pending]) -> List[Pending]:
+        """
+        Drops payloads whose key is already in the Redis dedup set.
+
+        Kept payloads are flagged `claimed`, so a retry after a failed publish does
+        not check them again and mistake them for duplicates of themselves.
+        """
+        keys = [entry.key for entry in batch if entry.key is not None and not entry.claimed]
+        if not keys:
+            return batch
+
+        is_new = iter(await self.dedup.filter_new(keys))
+        kept = [
+            entry._replace(claimed=True) if entry.key is not None and not entry.claimed else entry
+            for entry in batch
+            if entry.key is None or entry.claimed or next(is_new)
+        ]
+        if len(kept) < len(batch):
+            logger.info(f"Dropped {len(batch) - len(kept)} already ingested logs")
+        return kept
+
+    async def close(self) -> None:
+        """Stops the latency timer and flushes the remaining payloads, even while held."""
+        if self._timer is not None and not self._timer.done():
+            self._timer.cancel()
+            try:
+                await self._timer
+            except asyncio.CancelledError:
+                pass
+        self._timer = None
+
+        try:
+            await self.flush(force=True)
+        except RedisError as e:
+            logger.error(f"Failed to flush {len(self._pending)} payloads on shutdown: {e}")
+            await self._release_claimed()
+            raise
+
+    async def _release_claimed(self) -> None:
+        """Unmarks the keys claimed for payloads never published, so another delivery or a backfill can queue them."""
+        keys = [entry.key for entry in self._pending if entry.claimed]
+        if self.dedup is None or not keys:
+            return
+        try:
+            await self.dedup.release(keys)
+        except RedisError as e:
+            logger.error(f"Failed to release {len(keys)} dedup keys: {e}")
+
+    def _schedule_flush(self) -> None:
+        if self._pending and (self._timer is None or self._timer.done()):
+            self._timer = asyncio.create_task(self._flush_after_latency())
+
+    async def _flush_after_latency(self) -> None:
+        """Flushes on the latency trigger, retrying with backoff until the buffer is empty."""
+        delay = self.max_latency
+        while self._pending:
+            await asyncio.sleep(delay)
+            await self._released.wait()
+            try:
+                await self.flush()
+                delay = self.max_latency
+            except RedisError as e:
+                logger.error(f"Failed to flush {len(self._pending)} payloads to {self.queue_name}: {e}")
+                delay = min(max(delay * 2, 0.1), 5.0)
@@ -0,0 +1,129 @@
+import struct
+from typing import Any, Dict, Mapping
+
+from hexbytes import HexBytes
+
+from app.core.exceptions.pipeline_exceptions import LogCodecError
+
+CODEC_VERSION = 2
+# v1 carried the websocket subscription id instead of a handler key; still decoded while draining old entries
+LEGACY_CODEC_VERSION = 1
+
+FLAG_REMOVED = 0x01
+# Queued by a backfill (historical range) rather than the live subscriptions
+FLAG_BACKFILL = 0x02
+
+# version | flags | block_number | log_index | address | block_hash | tx_hash | topic_count | handler_len
+_HEADER = struct.Struct(">BBQI20s32s32sBB")
+_WORD = 32
+_EMPTY_HASH = bytes(_WORD)
+
+
+def _to_bytes(value: Any, size: int | None = None) -> bytes:
+    """Normalizes HexBytes/bytes/hex-strings to raw bytes, optionally enforcing a fixed size."""
+    if value is None:
+        raw = b""
+    elif isinstance(value, (bytes, bytearray)):
+        raw = bytes(value)
+    elif isinstance(value, str):
+        raw = bytes.fromhex(value[2:] if value.startswith(("0x", "0X")) else value)
+    else:
+        raise LogCodecError(f"Unsupported field type: {type(value).__name__}")
+
+    if size is not None:
+        if not raw:
+            return bytes(size)
+        if len(raw) != size:
+            raise LogCodecError(f"Expected {size} bytes, got {len(raw)}")
+    return raw
+
+
+def encode_log(handler: str, log: Mapping[str, Any], backfill: bool = False) -> bytes:
+    """
+    Packs a chain log and the registry key of its handler into the compact wire format.
+
+    `backfill` tags logs queued by a backfill, which consumers may apply in bulk.
+
+    Layout (big-endian):
+        - 100 byte header: version, flags, block number, log index, 20 byte address,
+          32 byte block hash, 32 byte tx hash, topic count, handler key length.
+        - handler key (utf-8), topics as 32 byte words, then the raw `data` bytes.
+    """
+    try:
+        topics = log["topics"]
+        key = handler.encode("utf-8")
+        if len(topics) > 4 or len(key) > 255:
+            raise LogCodecError("Log has more than 4 topics or an oversized handler key")
+
+        header = _HEADER.pack(
+            CODEC_VERSION,
+            (FLAG_REMOVED if log.get("removed") else 0) | (FLAG_BACKFILL if backfill else 0),
+            log["blockNumber"],
+            log["logIndex"],
+            _to_bytes(log["address"], 20),
+            _to_bytes(log.get("blockHash"), _WORD),
+            _to_bytes(log["transactionHash"], _WORD),
+            len(topics),
+            len(key)
+        )
+        return b"".join((header, key, *(_to_bytes(t, _WORD) for t in topics), _to_bytes(log.get("data"))))
+    except (KeyError, TypeError, ValueError, struct.error) as e:
+        raise LogCodecError(f"Failed to encode log: {e}") from e
+
+
+def encode_message(message: Mapping[str, Any]) -> bytes:
+    """Encodes a decoded message, `{'handler': ..., 'result': log}`, back into the wire format."""
+    return encode_log(message["handler"], message["result"], message.get("backfill", False))
+
+
+def decode_message(raw: bytes) -> Dict[str, Any]:
+    """
+    Unpacks a queued log into the `{'handler': ..., 'result': log}` shape handlers expect,
+    with `backfill` set for logs queued by a backfill.
+
+    The address is returned as a lowercase hex string, hashes, topics and data as `HexBytes`.
+    Legacy (v1) logs have no handler key: `handler` is None and `subscription` holds the id.
+    """
+    if len(raw) < _HEADER.size:
+        raise LogCodecError(f"Truncated log: {len(raw)} bytes")
+    if raw[0] not in (CODEC_VERSION, LEGACY_CODEC_VERSION):
+        raise LogCodecError(f"Unsupported log codec version: {raw[0]}")
+
+    (
+        version,
+        flags,
+        block_number,
+        log_index,
+        address,
+        block_hash,
+        tx_hash,
+        topic_count,
+        key_len
+    ) = _HEADER.unpack_from(raw)
+
+    offset = _HEADER.size
+    key = raw[offset:offset + key_len].decode("utf-8")
+    offset += key_len
+
+    topics_end = offset + topic_count * _WORD
+    if len(raw) < topics_end:
+        raise LogCodecError(f"Truncated log topics: {len(raw)} bytes")
+    topics = [HexBytes(raw[i:i + _WORD]) for i in range(offset, topics_end, _WORD)]
+
+    message = {
+        "handler": key if version == CODEC_VERSION else None,
+        "backfill": bool(flags & FLAG_BACKFILL),
+        "result": {
+            "address": "0x" + address.hex(),
+            "topics": topics,
+            "data": HexBytes(raw[topics_end:]),
+            "blockNumber": block_number,
+            "blockHash": HexBytes(block_hash) if block_hash != _EMPTY_HASH else None,
+            "transactionHash": HexBytes(tx_hash),
+            "logIndex": log_index,
+            "removed": bool(flags & FLAG_REMOVED),
+        }
+    }
+    if version == LEGACY_CODEC_VERSION:
+        message["subscription"] = key
+    return message
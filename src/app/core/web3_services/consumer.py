@@ -0,0 +1,157 @@
+"""
+Standalone ingest consumer: applies queued chain logs until told to stop.
+
+Run with `python -m app.core.web3_services.consumer` (from `src/`). Any number of
+replicas can run side by side: every queued log is handed to exactly one of them
+(atomic `BLMOVE`, or consumer groups with the Streams transport).
+
+SIGTERM/SIGINT stop reading new logs and drain the ones already read before
+exiting. `GET /healthz` (liveness) and `GET /readyz` (readiness) are served on
+`INGEST_CONSUMER_HEALTH_PORT`.
+
+Balance movements appended by the handlers are folded into `user.balance` by a
+`BalanceMaterializer` running next to the read loop.
+"""
+import asyncio
+import json
+import signal
+import time
+from typing import Tuple
+
+import uvloop
+from sqlalchemy import text
+
+from app.core.logger import logging
+from app.core.config import settings
+from app.core.constants import ALCHEMY_REDIS_QUEUE_NAME, ALCHEMY_INPROCESSING_QUEUE
+from app.core.db.database import async_engine
+from app.core.utils.redis_queue import close_queue_redis, get_queue_redis, publish_pool_stats
+from app.core.web3_services.processor import BatchProcessor
+from app.core.web3_services.balances import BalanceMaterializer
+
+logger = logging.getLogger(__name__)
+
+
+class IngestConsumer:
+    def __init__(self, health_port: int = settings.INGEST_CONSUMER_HEALTH_PORT):
+        self.health_port = health_port
+        self.redis = get_queue_redis()
+        self.processor = BatchProcessor(ALCHEMY_REDIS_QUEUE_NAME, ALCHEMY_INPROCESSING_QUEUE, self.redis)
+        self.balances = BalanceMaterializer()
+        self.running = False
+        self._reader: asyncio.Task | None = None
+        self._last_tick = time.monotonic()
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, self.stop)
+
+        server = await asyncio.start_server(self._serve_probe, host="0.0.0.0", port=self.health_port)
+        logger.info(f"Ingest consumer started, probes on port {self.health_port}.")
+        self.running = True
+        folding = asyncio.create_task(self.balances.run())
+        pool_metrics = asyncio.create_task(publish_pool_stats("consumer"))
+        heartbeat = asyncio.create_task(self._heartbeat())
+        self._reader = asyncio.create_task(self.processor.batch_process_logs())
+        try:
+            await self._reader
+        finally:
+            self.running = False
+            heartbeat.cancel()
+            pool_metrics.cancel()
+            folding.cancel()
+            try:
+                await folding
+            except asyncio.CancelledError:
+                pass
+            try:
+                await self.balances.fold_all()
+            except Exception as e:
+                logger.error(f"Failed to fold pending balance movements: {e}")
+            server.close()
+            await server.wait_closed()
+            await close_queue_redis()
+            await async_engine.dispose()
+            logger.info("Ingest consumer stopped.")
+
+    def stop(self) -> None:
+        if not self.processor.draining:
+            logger.info("Stop requested, draining ingest consumer...")
+            self.processor.stop()
+
+    def healthy(self) -> Tuple[bool, dict]:
+        """
+        Alive while the reader task, the processor's partition consumers and retry
+        scheduler run, and the event loop keeps ticking.
+
+        Says nothing about Redis or the database (see `ready`): an outage there
+        must not get a consumer that is waiting for them restarted.
+        """
+        reader_alive = self._reader is not None and not self._reader.done()
+        workers_alive = self.processor.alive()
+        loop_lag = time.monotonic() - self._last_tick
+        ok = self.running and reader_alive and workers_alive and loop_lag < settings.INGEST_CONSUMER_STALL_SECONDS
+        return ok, {
+            "running": self.running,
+            "reader": reader_alive,
+            "workers": workers_alive,
+            "loop_lag_s": round(loop_lag, 1)
+        }
+
+    async def _heartbeat(self, interval: float = 1.0) -> None:
+        while True:
+            self._last_tick = time.monotonic()
+            await asyncio.sleep(interval)
+
+    async def ready(self) -> Tuple[bool, dict]:
+        """Ready when not draining and both Redis and the database answer."""
+        status = {"draining": self.processor.draining, "redis": False, "database": False}
+        try:
+            status["redis"] = bool(await asyncio.wait_for(self.redis.ping(), timeout=2))
+        except Exception as e:
+            logger.warning(f"Readiness: Redis unavailable: {e}")
+        try:
+            await asyncio.wait_for(self._ping_database(), timeout=2)
+            status["database"] = True
+        except Exception as e:
+            logger.warning(f"Readiness: database unavailable: {e}")
+        return status["redis"] and status["database"] and not status["draining"], status
+
+    async def _ping_database(self) -> None:
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    async def _serve_probe(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+            parts = request_line.decode("latin-1").split()
+            path = parts[1] if len(parts) > 1 else ""
+
+            if path == "/healthz":
+                ok, body = self.healthy()
+            elif path == "/readyz":
+                ok, body = await self.ready()
+            else:
+                ok, body = False, {"detail": "Not Found"}
+
+            status = "200 OK" if ok else ("404 Not Found" if "detail" in body else "503 Service Unavailable")
+            payload = json.dumps(body).encode()
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode() + payload
+            )
+            await writer.drain()
+        except Exception as e:
+            logger.debug(f"Probe request failed: {e}")
+        finally:
+            writer.close()
+
+
+def main() -> None:
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    asyncio.run(IngestConsumer().run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+import json
+import random
+import time
+from typing import Any, Dict, List, Mapping
+
+from redis.asyncio import Redis
+
+from app.core.logger import logging
+from app.core.config import settings
+from app.core.web3_services.codec import decode_message, encode_message
+
+logger = logging.getLogger(__name__)
+
+DEAD_LETTER_PREFIX = "ingest:dlq"
+
+# Pushes due retries out by a lease, so concurrent consumers never claim the same one
+_CLAIM_SCRIPT = """
+local ids = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+for _, id in ipairs(ids) do
+    redis.call('ZADD', KEYS[1], ARGV[3], id)
+end
+return ids
+"""
+
+
+def log_id(message: Mapping[str, Any]) -> str:
+    """Stable identity of a chain log: `<tx hash>:<log index>`."""
+    log = message["result"]
+    return f"{log['transactionHash'].hex()}:{log['logIndex']}"
+
+
+class DeadLetterQueue:
+    """
+    Chain logs whose handler failed, with their retry schedule.
+
+    Every failed log is stored once under its `log_id` (raw log, handler key, last
+    error, attempt count) in `<prefix>:entries`. Until `max_attempts` is reached it
+    is scheduled in the `<prefix>:retries` ZSET, scored by the time it is due, with
+    exponential backoff and jitter; after that it is parked in `<prefix>:dead` until
+    replayed by an admin. Ordering races (a `Backed` log applied before its
+    `Predicted` log) resolve on a later attempt without holding up the consumers.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        prefix: str = DEAD_LETTER_PREFIX,
+        max_attempts: int = settings.INGEST_RETRY_MAX_ATTEMPTS,
+        base_delay_ms: int = settings.INGEST_RETRY_BASE_DELAY_MS,
+        max_delay_ms: int = settings.INGEST_RETRY_MAX_DELAY_MS
+    ):
+        self.redis = redis
+        self.entries_key = f"{prefix}:entries"
+        self.retries_key = f"{prefix}:retries"
+        self.dead_key = f"{prefix}:dead"
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay_ms = base_delay_ms
+        self.max_delay_ms = max_delay_ms
+        self._claim = redis.register_script(_CLAIM_SCRIPT)
+
+    def backoff_ms(self, attempts: int) -> float:
+        delay = min(self.max_delay_ms, self.base_delay_ms * 2 ** (attempts - 1))
+        return delay * random.uniform(0.8, 1.2)
+
+    async def fail(self, message: Mapping[str, Any], error: Exception | str) -> Dict[str, Any]:
+        """Records a failed attempt of a log and schedules its next retry, or parks it."""
+        entry_id = log_id(message)
+        now = time.time()
+        raw = await self.redis.hget(self.entries_key, entry_id)
+        record = json.loads(raw) if raw is not None else {
+            "id": entry_id,
+            "handler": message["handler"],
+            "log": encode_message(message).hex(),
+            "block_number": message["result"]["blockNumber"],
+            "attempts": 0,
+            "first_failed_at": now
+        }
+        record["attempts"] += 1
+        record["error"] = str(error)
+        record["last_failed_at"] = now
+
+        retry = record["attempts"] < self.max_attempts
+        record["next_retry_at"] = now + self.backoff_ms(record["attempts"]) / 1000 if retry else None
+
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(self.entries_key, entry_id, json.dumps(record))
+            if retry:
+                pipe.zadd(self.retries_key, {entry_id: record["next_retry_at"]})
+            else:
+                pipe.zrem(self.retries_key, entry_id)
+                pipe.zadd(self.dead_key, {entry_id: now})
+            await pipe.execute()
+
+        if record["next_retry_at"] is None:
+            logger.error(f"Log {entry_id} dead-lettered after {record['attempts']} attempts: {error}")
+        return record
+
+    async def due(self, limit: int, lease_ms: int = settings.INGEST_VISIBILITY_TIMEOUT_MS) -> List[Dict[str, Any]]:
+        """
+        Claims up to `limit` logs whose retry is due and returns their decoded messages.
+
+        Claimed logs are pushed `lease_ms` into the future rather than removed, so each
+        is taken by one consumer only and comes back if that consumer dies before
+        `resolve` or the next `fail`.
+        """
+        ids = await self._claim(keys=[self.retries_key], args=[time.time(), limit, time.time() + lease_ms / 1000])
+        raws = await self.redis.hmget(self.entries_key, ids) if ids else []
+        messages = []
+        for entry_id, raw in zip(ids, raws):
+            try:
+                messages.append(decode_message(bytes.fromhex(json.loads(raw)["log"])))
+            except Exception as e:
+                logger.error(f"Dropping unreadable dead letter {entry_id!r}: {e}")
+                async with self.redis.pipeline(transaction=True) as pipe:
+                    pipe.hdel(self.entries_key, entry_id)
+                    pipe.zrem(self.retries_key, entry_id)
+                    await pipe.execute()
+        return messages
+
+    async def resolve(self, message: Mapping[str, Any]) -> None:
+        """Forgets a log once a retry succeeded."""
+        entry_id = log_id(message)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hdel(self.entries_key, entry_id)
+            pipe.zrem(self.retries_key, entry_id)
+            pipe.zrem(self.dead_key, entry_id)
+            await pipe.execute()
+
+    async def replay(self, entry_ids: List[str] | None = None) -> int:
+        """
+        Schedules parked logs (all of them, or `entry_ids`) for an immediate retry
+        with a fresh attempt budget. Returns how many were rescheduled.
+        """
+        if entry_ids is None:
+            entry_ids = [i.decode() for i in await self.redis.zrange(self.dead_key, 0, -1)]
+
+        replayed = 0
+        now = time.time()
+        for entry_id in entry_ids:
+            raw = await self.redis.hget(self.entries_key, entry_id)
+            if raw is None:
+                continue
+            record = json.loads(raw)
+            record["attempts"] = 0
+            record["next_retry_at"] = now
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.hset(self.entries_key, entry_id, json.dumps(record))
+                pipe.zrem(self.dead_key, entry_id)
+                pipe.zadd(self.retries_key, {entry_id: now})
+                await pipe.execute()
+            replayed += 1
+        return replayed
+
+    async def inspect(self, status: str = "dead", offset: int = 0, limit: int = 50) -> Dict[str, Any]:
+        """Page of records parked in the DLQ (`dead`) or waiting for a retry (`retrying`)."""
+        key = self.dead_key if status == "dead" else self.retries_key
+        ids = await self.redis.zrange(key, offset, offset + limit - 1)
+        raws = await self.redis.hmget(self.entries_key, ids) if ids else []
+        records = []
+        for raw in raws:
+            if raw is None:
+                continue
+            record = json.loads(raw)
+            record.pop("log")
+            records.append(record)
+        return {"status": status, "total": await self.redis.zcard(key), "offset": offset, "records": records}
+
+    async def stats(self) -> Dict[str, int]:
+        return {
+            "retrying": await self.redis.zcard(self.retries_key),
+            "dead": await self.redis.zcard(self.dead_key)
+        }
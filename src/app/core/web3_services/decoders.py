@@ -0,0 +1,121 @@
+import keyword
+from typing import Any, Dict, Iterable, List, Mapping, Tuple, Type
+
+from eth_utils import keccak
+
+from app.core.exceptions.pipeline_exceptions import LogCodecError
+
+_WORD = 32
+
+
+class EventRecord:
+    """
+    Base of the records generated by `compile_event_decoder`.
+
+    Every subclass gets a generated static `decode(log)` building it from a log.
+    Subclasses hold one slot per event input, in ABI order. Integers are `int`,
+    addresses lowercase `0x` hex strings, `bytesN` raw bytes and `bool` bool.
+    Indexed dynamic inputs (strings, bytes, arrays) are only available as the
+    32 byte hash held by their topic.
+    """
+
+    __slots__ = ()
+    event: str = ""
+    signature: str = ""
+    topic: bytes = b""
+
+    def values(self) -> Tuple[Any, ...]:
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __eq__(self, other: object) -> bool:
+        return type(other) is type(self) and other.values() == self.values()
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+def _word_expression(source: str, abi_type: str) -> str:
+    """Python expression decoding the 32 byte word `source` as a static `abi_type`."""
+    if abi_type == "address":
+        return f"'0x' + _hex({source}[12:])"
+    if abi_type == "bool":
+        return f"{source}[31] != 0"
+    if abi_type.startswith("uint"):
+        return f"_int({source}, 'big')"
+    if abi_type.startswith("int"):
+        return f"_int({source}, 'big', signed=True)"
+    if abi_type.startswith("bytes") and abi_type[5:].isdigit():
+        return f"bytes({source}[:{int(abi_type[5:])}])"
+    raise LogCodecError(f"Unsupported static ABI type: {abi_type}")
+
+
+def _is_dynamic(abi_type: str) -> bool:
+    return abi_type in ("string", "bytes") or abi_type.endswith("]") or abi_type.startswith("tuple")
+
+
+def _field_name(name: str, index: int) -> str:
+    name = name or f"arg{index}"
+    return f"{name}_" if keyword.iskeyword(name) else name
+
+
+def compile_event_decoder(event_abi: Mapping[str, Any]) -> Type[EventRecord]:
+    """
+    Generates an `EventRecord` subclass for an ABI event entry.
+
+    `Record.decode(log)` reads every input in one pass, straight from the 32 byte
+    words of the log: indexed inputs from `topics[1:]`, the others from `data`.
+    Only static data inputs are supported, which covers every event we index.
+    """
+    inputs: List[Mapping[str, Any]] = event_abi["inputs"]
+    signature = f"{event_abi['name']}({','.join(i['type'] for i in inputs)})"
+    names = [_field_name(i.get("name", ""), index) for index, i in enumerate(inputs)]
+
+    arguments, topic, offset = [], 1, 0
+    for entry in inputs:
+        abi_type = entry["type"]
+        if entry.get("indexed"):
+            source = f"topics[{topic}]"
+            topic += 1
+            # Indexed dynamic values are replaced by their keccak hash
+            arguments.append(f"bytes({source})" if _is_dynamic(abi_type) else _word_expression(source, abi_type))
+        else:
+            if _is_dynamic(abi_type):
+                raise LogCodecError(f"{signature}: dynamic data input '{abi_type}' is not supported")
+            arguments.append(_word_expression(f"data[{offset}:{offset + _WORD}]", abi_type))
+            offset += _WORD
+
+    source = "\n".join([
+        "def __init__(self, " + ", ".join(names) + "):",
+        *(f"    self.{name} = {name}" for name in names),
+        "",
+        "def decode(payload):",
+        "    topics = payload['topics']",
+        "    data = payload['data']",
+        f"    if len(topics) != {topic} or len(data) < {offset}:",
+        f"        raise _error('Log does not match {signature}')",
+        "    return _record(" + ", ".join(arguments) + ")",
+    ]) if names else "def __init__(self):\n    pass\n\ndef decode(payload):\n    return _record()"
+
+    namespace: Dict[str, Any] = {"_int": int.from_bytes, "_hex": bytes.hex, "_error": LogCodecError}
+    exec(compile(source, f"<decoder {signature}>", "exec"), namespace)
+
+    record = type(event_abi["name"], (EventRecord,), {
+        "__slots__": tuple(names),
+        "__init__": namespace["__init__"],
+        "decode": staticmethod(namespace["decode"]),
+        "event": event_abi["name"],
+        "signature": signature,
+        "topic": keccak(text=signature),
+    })
+    namespace["_record"] = record
+    return record
+
+
+def compile_abi_decoders(abi: Iterable[Mapping[str, Any]]) -> Dict[str, Type[EventRecord]]:
+    """Decoders of every non-anonymous event of a contract ABI, by event name."""
+    return {
+        item["name"]: compile_event_decoder(item)
+        for item in abi
+        if item.get("type") == "event" and not item.get("anonymous")
+    }
@@ -0,0 +1,114 @@
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Mapping, Sequence
+
+from redis.asyncio import Redis
+
+from app.core.logger import logging
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+DEDUP_KEY_PREFIX = "ingest:seen:"
+
+
+def log_key(log: Mapping[str, Any]) -> bytes:
+    """
+    Identity of a chain log: `(blockHash, transactionHash, logIndex)`.
+
+    The `removed` flag is part of the key so a reorg notification is not
+    mistaken for a duplicate of the log it retracts.
+    """
+    return b"".join((
+        bytes(log.get("blockHash") or b""),
+        bytes(log["transactionHash"]),
+        log["logIndex"].to_bytes(4, "big"),
+        b"\x01" if log.get("removed") else b"\x00"
+    ))
+
+
+class ProviderStats:
+    """Arrival statistics of one websocket provider relative to the fastest provider."""
+
+    def __init__(self, name: str, window: int = 1000):
+        self.name = name
+        self.received = 0
+        self.first_arrivals = 0
+        self.lags_ms: Deque[float] = deque(maxlen=window)
+
+    def record(self, first: bool, lag_ms: float = 0.0) -> None:
+        self.received += 1
+        if first:
+            self.first_arrivals += 1
+        self.lags_ms.append(lag_ms)
+
+    def snapshot(self) -> Dict[str, Any]:
+        lags = sorted(self.lags_ms)
+        return {
+            "provider": self.name,
+            "received": self.received,
+            "first_arrivals": self.first_arrivals,
+            "win_ratio": round(self.first_arrivals / self.received, 4) if self.received else 0.0,
+            "mean_lag_ms": round(sum(lags) / len(lags), 2) if lags else 0.0,
+            "p95_lag_ms": round(lags[min(len(lags) - 1, int(len(lags) * 0.95))], 2) if lags else 0.0,
+        }
+
+
+class LogDeduplicator:
+    """
+    First-arrival-wins deduplication of logs received from several providers.
+
+    Keys live in a bounded in-memory LRU holding the first arrival time of each log,
+    which also gives every later copy its lag behind the winner. Keys that fell out
+    of the LRU, or were ingested by another process, are caught by the Redis
+    fallback (`SET NX` with a TTL), checked once per batch in `filter_new`.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        capacity: int = settings.INGEST_DEDUP_CAPACITY,
+        ttl: int = settings.INGEST_DEDUP_TTL
+    ):
+        self.redis = redis
+        self.capacity = capacity
+        self.ttl = ttl
+        self._seen: OrderedDict[bytes, float] = OrderedDict()
+        self.stats: Dict[str, ProviderStats] = {}
+
+    def first_arrival(self, key: bytes, provider: str) -> bool:
+        """Records the arrival of `key` from `provider`; True if no provider delivered it before."""
+        stats = self.stats.get(provider)
+        if stats is None:
+            stats = self.stats[provider] = ProviderStats(provider)
+
+        now = time.monotonic()
+        first_seen = self._seen.get(key)
+        if first_seen is not None:
+            self._seen.move_to_end(key)
+            stats.record(False, (now - first_seen) * 1000)
+            return False
+
+        self._seen[key] = now
+        if len(self._seen) > self.capacity:
+            self._seen.popitem(last=False)
+        stats.record(True)
+        return True
+
+    async def filter_new(self, keys: Sequence[bytes]) -> List[bool]:
+        """Marks `keys` as ingested in Redis in one round-trip; False for keys already marked."""
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.set(DEDUP_KEY_PREFIX + key.hex(), 1, nx=True, ex=self.ttl)
+            results = await pipe.execute()
+        return [bool(result) for result in results]
+
+    async def release(self, keys: Sequence[bytes]) -> None:
+        """Unmarks `keys` claimed by `filter_new` whose logs could not be published."""
+        if keys:
+            await self.redis.delete(*(DEDUP_KEY_PREFIX + key.hex() for key in keys))
+
+    def ranking(self) -> List[Dict[str, Any]]:
+        """Providers ordered best first: most first arrivals, then lowest mean lag."""
+        snapshots = [stats.snapshot() for stats in self.stats.values()]
+        return sorted(snapshots, key=lambda s: (-s["win_ratio"], s["mean_lag_ms"]))
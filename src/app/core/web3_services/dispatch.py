@@ -0,0 +1,117 @@
+from typing import Any, Awaitable, Callable, Dict, Mapping, NamedTuple
+
+from hexbytes import HexBytes
+
+from app.core.logger import logging
+from app.core.web3_services.ledger import claim_event
+
+logger = logging.getLogger(__name__)
+
+EventHandler = Callable[..., Awaitable[None]]
+EventDecoder = Callable[[Mapping[str, Any]], Any]
+EventPartitioner = Callable[[Mapping[str, Any]], bytes]
+
+
+class EventRoute(NamedTuple):
+    name: str
+    decoder: EventDecoder | None
+    handler: EventHandler | None
+    partition: EventPartitioner | None = None
+
+
+class DispatchTable:
+    """
+    Maps `topic0` of a chain log straight to the decoder and handler of its event.
+
+    Routes are keyed by the raw 32 byte topic, so dispatching a log is a single dict
+    lookup. Contracts extend a table with `register` (one event) or `extend` (an
+    `event name -> topic` mapping plus an `event name -> handler` mapping).
+
+    Handlers are called as `handler(payload, db)`, or `handler(payload, db, event)`
+    with the output of the route's decoder when it has one.
+
+    A route's partitioner names the entity a log touches (a user, a prediction...):
+    logs with the same partition key must be applied in order, others may run
+    concurrently. Logs without one are partitioned by contract address.
+
+    With a `chain`, every log is first recorded in the processed-events ledger, in
+    the handler's transaction, and logs already recorded there are skipped.
+    """
+
+    def __init__(self, name: str, chain: str | None = None):
+        self.name = name
+        self.chain = chain
+        self._routes: Dict[bytes, EventRoute] = {}
+
+    def __len__(self) -> int:
+        return len(self._routes)
+
+    def __contains__(self, topic: bytes) -> bool:
+        return bytes(topic) in self._routes
+
+    def register(
+        self,
+        topic: bytes,
+        name: str,
+        handler: EventHandler | None,
+        decoder: EventDecoder | None = None,
+        partition: EventPartitioner | None = None
+    ) -> None:
+        """Routes logs whose `topic0` is `topic` to `handler`, replacing any previous route."""
+        topic = bytes(topic)
+        if len(topic) != 32:
+            raise ValueError(f"Event topic of '{name}' must be 32 bytes, got {len(topic)}")
+
+        previous = self._routes.get(topic)
+        if previous is not None and previous.name != name:
+            logger.warning(f"{self.name}: topic of '{previous.name}' rerouted to '{name}'")
+        self._routes[topic] = EventRoute(name, decoder, handler, partition)
+
+    def extend(
+        self,
+        topics: Mapping[str, bytes],
+        handlers: Mapping[str, EventHandler],
+        decoders: Mapping[str, EventDecoder] | None = None,
+        partitions: Mapping[str, EventPartitioner] | None = None
+    ) -> None:
+        """Registers every event of `topics`; events without a handler are routed to a warning."""
+        decoders = decoders or {}
+        partitions = partitions or {}
+        for name, topic in topics.items():
+            self.register(topic, name, handlers.get(name), decoders.get(name), partitions.get(name))
+
+    def route(self, topic0: bytes) -> EventRoute | None:
+        return self._routes.get(topic0)
+
+    def partition_key(self, payload: Mapping[str, Any]) -> bytes:
+        topics = payload['topics']
+        route = self._routes.get(topics[0]) if topics else None
+        if route is not None and route.partition is not None:
+            return route.partition(payload)
+        return payload['address'].encode()
+
+    async def dispatch(self, payload: Mapping[str, Any], db) -> bool:
+        """
+        Runs the handler of a log, unless the ledger shows it was applied already.
+        Returns False when the log matches no route or its route has no handler.
+        """
+        topic0: HexBytes = payload['topics'][0]
+        route = self._routes.get(topic0)
+        if route is None:
+            logger.error("Event log cannot be identified!")
+            return False
+
+        if route.handler is None:
+            logger.warning(f"No handler defined for event '{route.name}'.")
+            return False
+
+        if self.chain is not None and not await claim_event(db, self.chain, payload, route.name):
+            logger.info(f"Event '{route.name}' already processed, skipped.")
+            return True
+
+        if route.decoder is not None:
+            await route.handler(payload, db, route.decoder(payload))
+        else:
+            await route.handler(payload, db)
+        logger.info(f"Event '{route.name}' processed.")
+        return True
@@ -5,9 +5,14 @@ from web3 import AsyncWeb3
 from web3.providers.persistent import WebSocketProvider
 from websockets import ConnectionClosed, ConnectionClosedError
 from redis.asyncio import Redis
-import pickle
 from app.core.logger import logging
-from app.core.config import settings
+from app.core.utils.redis_queue import get_queue_redis
+from app.core.web3_services.transport import create_transport
+from app.core.web3_services.dedup import LogDeduplicator
+from app.core.web3_services.backfill import BackfillEngine
+from app.core.web3_services.metrics import publish_metrics
+from app.core.web3_services.registry import LogHandler, handler_key
+from app.core.exceptions.pipeline_exceptions import LogCodecError
 
 logger = logging.getLogger(__name__)
 
@@ -15,11 +20,13 @@ class FallBackSubscriptionHandler:
 
     w3_socket: AsyncWeb3 = None
 
-    def __init__(self, wss_url, redis_queue_name: str, subscriptions_queue_name: str):
+    def __init__(self, wss_url, redis_queue_name: str, subscriptions_queue_name: str, redis: Redis | None = None):
         self.wss_url = wss_url
-        self.redis = Redis(host=settings.REDIS_QUEUE_HOST, port=settings.REDIS_QUEUE_PORT, db=0)
+        self.redis = redis or get_queue_redis()
         self.redis_queue_name = redis_queue_name
         self.subscriptions_queue_name = subscriptions_queue_name
+        self.transport = create_transport(self.redis, self.redis_queue_name)
+        self.dedup = LogDeduplicator(self.redis)
         self.reconnected = False
     
     async def fetch_logs(self, callback, filter_params) -> None:
@@ -31,44 +38,42 @@ class FallBackSubscriptionHandler:
                     await self._get_logs(callback, filter_params)
                 except (ConnectionClosedError, ConnectionClosed) as e:
                     logger.error(f"Disonnected due to {e}. Uninstalled filters")
+                    raise
                 except asyncio.CancelledError as e:
                     logger.error(f"Uninstalling filters...{e}")
-                except Exception as e:
-                    logger.error(f"Unexpected error: {e}.")
+                    raise
         except Exception as e:
-            logger.error(f"Disconnected. Uninstalling filters..!")
+            logger.error(f"Failed to fetch logs: {e}. Uninstalling filters..!")
+            raise
         
 
-    async def _get_logs(self, callback: callable, filter_params) -> None:
-        """Fetches or gets past logs depending on given filter parameters"""
+    async def _get_logs(self, callback: LogHandler | str, filter_params) -> None:
+        """
+        Fetches past logs of `filter_params['fromBlock']..filter_params['toBlock']`
+        and streams them into the queue, window by window, in block order.
+        """
         if self.is_connected():
-            lead: str = "Katula"
-            fallback_data = {'callback': callback, 'filter_params': filter_params}
-            callback_id = f"{lead}{callback}".format()
-            await self.redis.set(callback_id, pickle.dumps(fallback_data))
-
-            await asyncio.sleep(2)
-
-            _key = await self.redis.get(callback_id)
-            if _key is not None:
-                logger.info(f"Key {callback_id} created.")
-            else:
-                logger.info(f"Key {callback_id} not available")
-
-            logs = await self.w3_socket.eth.get_logs(filter_params)
+            from_block, to_block = filter_params["fromBlock"], filter_params["toBlock"]
+            engine = BackfillEngine(
+                self.w3_socket,
+                self.transport,
+                self.dedup,
+                handler_key(callback),
+                on_progress=self._report_progress
+            )
             try:
-                for log in logs:
-                    log_dict = {'subscription': callback_id, 'result': log}
-                    log_data = pickle.dumps(log_dict)
-
-                    await self.redis.rpush(self.redis_queue_name, log_data)
-                    
-            except (pickle.PickleError, TypeError) as e:
+                queued = await engine.run(filter_params, from_block, to_block)
+                logger.info(f"Added {queued} logs of blocks {from_block}..{to_block} to queue: {self.redis_queue_name}")
+            except LogCodecError as e:
                 logger.error(f"Failed to add payload data to queue: {e}")
+                raise
 
         else:
             raise RuntimeError("Connection not established, it's not possible to fetch logs")
-        
+
+    async def _report_progress(self, progress) -> None:
+        await publish_metrics(self.redis, "backfill", progress)
+
     async def disconnect(self):
         """Gracefully disconnects the WebSocket connection."""
         if self.w3_socket is not None:
@@ -86,4 +91,4 @@ class FallBackSubscriptionHandler:
     
     async def queue_size(self) -> int:
         """Get the current size of the Redis queue."""
-        return await self.redis.llen(self.redis_queue_name)
\ No newline at end of file
+        return await self.transport.size()
\ No newline at end of file
@@ -0,0 +1,153 @@
+import asyncio
+from typing import Callable, List
+
+from arq import create_pool
+from arq.connections import ArqRedis, RedisSettings
+from arq.jobs import Job
+from redis.asyncio import Redis
+from web3 import AsyncWeb3
+
+from app.core.logger import logging
+from app.core.config import settings
+from app.core.utils import queue
+
+logger = logging.getLogger(__name__)
+
+INGEST_WATERMARK_KEY = "ingest:watermark"
+
+# Only moves the watermark forward, so out-of-order flushes never rewind it
+_ADVANCE_SCRIPT = """
+local current = tonumber(redis.call('GET', KEYS[1]) or '-1')
+if tonumber(ARGV[1]) > current then
+    redis.call('SET', KEYS[1], ARGV[1])
+    return 1
+end
+return 0
+"""
+
+
+class IngestWatermark:
+    """
+    Last block whose logs are all in the ingest queue, persisted in Redis.
+
+    While a gap is being backfilled the watermark is pinned below it: `advance`
+    never moves it past the lowest pinned block, so a failed backfill leaves the
+    gap to be found again.
+    """
+
+    def __init__(self, redis: Redis, key: str = INGEST_WATERMARK_KEY):
+        self.redis = redis
+        self.key = key
+        self._advance = redis.register_script(_ADVANCE_SCRIPT)
+        self._pins: List[int] = []
+
+    def pin(self, block_number: int) -> None:
+        self._pins.append(block_number)
+
+    def unpin(self, block_number: int) -> None:
+        self._pins.remove(block_number)
+
+    async def get(self) -> int | None:
+        value = await self.redis.get(self.key)
+        return int(value) if value is not None else None
+
+    async def advance(self, block_number: int) -> None:
+        if self._pins:
+            block_number = min(block_number, *self._pins)
+        await self._advance(keys=[self.key], args=[block_number])
+
+
+class GapFiller:
+    """
+    Queues a backfill for the blocks missed while no provider was connected.
+
+    The missing range runs from the block after the watermark up to the chain head.
+    It is fetched by the `call_usdtv1_arb_alchemy_fallback` worker job, which goes
+    through the same Redis dedup set as the live stream, so logs delivered by both
+    are only queued once. Live flushing is held (`hold`/`release`) until the job
+    finishes, so the catch-up is queued before normal traffic resumes.
+
+    Until the job succeeds the watermark stays pinned below the range. A failed or
+    timed out job is enqueued again after a backoff (`retry_delay`, doubling up to
+    `max_retry_delay`), and live flushing stays held meanwhile.
+    """
+
+    JOB_NAME = "call_usdtv1_arb_alchemy_fallback"
+
+    def __init__(
+        self,
+        watermark: IngestWatermark,
+        hold: Callable[[], None],
+        release: Callable[[], None],
+        timeout: float = settings.INGEST_BACKFILL_TIMEOUT,
+        retry_delay: float = settings.INGEST_GAP_RETRY_DELAY,
+        max_retry_delay: float = settings.INGEST_GAP_RETRY_MAX_DELAY
+    ):
+        self.watermark = watermark
+        self.hold = hold
+        self.release = release
+        self.timeout = timeout
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self._tasks: set[asyncio.Task] = set()
+
+    async def fill(self, w3_socket: AsyncWeb3) -> None:
+        """Enqueues a backfill job for `(watermark, head]`, if anything was missed."""
+        try:
+            last_block = await self.watermark.get()
+            if last_block is None:
+                logger.info("No ingest watermark yet, nothing to backfill.")
+                return
+
+            head = await w3_socket.eth.block_number
+            if head <= last_block:
+                return
+
+            from_block, to_block = last_block + 1, head
+            job = await self._enqueue(from_block, to_block, 0)
+        except Exception as e:
+            logger.error(f"Failed to queue gap backfill: {e}")
+            return
+
+        self.watermark.pin(from_block - 1)
+        self.hold()
+        task = asyncio.create_task(self._release_when_done(from_block, to_block, job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _enqueue(self, from_block: int, to_block: int, attempt: int) -> Job:
+        job_id = f"gap-backfill:{from_block}:{to_block}" + (f":{attempt}" if attempt else "")
+        pool = await self._pool()
+        job = await pool.enqueue_job(self.JOB_NAME, job_id, from_block, to_block, _job_id=job_id)
+        logger.warning(f"Queued backfill of missed blocks {from_block}..{to_block}")
+        return job or Job(job_id, pool)
+
+    async def _release_when_done(self, from_block: int, to_block: int, job: Job | None) -> None:
+        """Waits for the backfill, enqueuing it again until it succeeds; only then resumes live logs."""
+        attempt = 0
+        while True:
+            try:
+                if job is None:
+                    job = await self._enqueue(from_block, to_block, attempt)
+                await job.result(timeout=self.timeout, poll_delay=1)
+                logger.info(f"Gap backfill {job.job_id} completed.")
+                break
+            except Exception as e:
+                attempt += 1
+                delay = min(self.retry_delay * 2 ** (attempt - 1), self.max_retry_delay)
+                if isinstance(e, asyncio.TimeoutError):
+                    e = f"did not finish in {self.timeout}s"
+                logger.error(f"Gap backfill of blocks {from_block}..{to_block} failed ({e}), retrying in {delay}s")
+                job = None
+                await asyncio.sleep(delay)
+
+        self.watermark.unpin(from_block - 1)
+        self.release()
+
+    async def _pool(self) -> ArqRedis:
+        """Uses the application's arq pool, creating one when running outside the API."""
+        if queue.pool is None:
+            queue.pool = await create_pool(
+                RedisSettings(host=settings.REDIS_QUEUE_HOST, port=settings.REDIS_QUEUE_PORT)
+            )
+        return queue.pool
@@ -0,0 +1,74 @@
+from typing import Any, List, Mapping, Sequence, Tuple
+
+from sqlalchemy import tuple_
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.logger import logging
+from app.models.events import ProcessedEvent
+
+logger = logging.getLogger(__name__)
+
+# 5 bind parameters per ledger row, 32767 per statement at most
+LEDGER_CHUNK_ROWS = 5000
+
+
+def event_key(log: Mapping[str, Any]) -> Tuple[str, int]:
+    """Ledger key of a chain log within its chain: (`0x` transaction hash, log index)."""
+    return "0x" + bytes(log['transactionHash']).hex(), log['logIndex']
+
+
+def _row(chain: str, log: Mapping[str, Any], event: str) -> dict:
+    tx_hash, log_index = event_key(log)
+    return {
+        "chain": chain,
+        "tx_hash": tx_hash,
+        "log_index": log_index,
+        "block_number": log['blockNumber'],
+        "event": event
+    }
+
+
+def _claim_statement(rows: List[dict]):
+    return insert(ProcessedEvent).values(rows).on_conflict_do_nothing(
+        index_elements=["chain", "tx_hash", "log_index"]
+    ).returning(ProcessedEvent.tx_hash, ProcessedEvent.log_index)
+
+
+async def claim_event(db, chain: str, log: Mapping[str, Any], event: str) -> bool:
+    """
+    Records a log in the processed-events ledger; False when it was already applied.
+
+    Runs in the caller's transaction, with the handler's writes: if they roll back,
+    so does the ledger entry, and the log can be applied again.
+    """
+    result = await db.execute(_claim_statement([_row(chain, log, event)]))
+    return result.first() is not None
+
+
+async def claim_events(db, chain: str, logs: Sequence[Tuple[Mapping[str, Any], str]]) -> List[bool]:
+    """`claim_event` for many `(log, event name)` pairs, with one statement per chunk."""
+    rows = [_row(chain, log, event) for log, event in logs]
+    claimed = set()
+    for start in range(0, len(rows), LEDGER_CHUNK_ROWS):
+        result = await db.execute(_claim_statement(rows[start:start + LEDGER_CHUNK_ROWS]))
+        claimed.update((tx_hash, log_index) for tx_hash, log_index in result.all())
+
+    fresh = []
+    for row in rows:
+        key = (row["tx_hash"], row["log_index"])
+        # A log listed twice is only claimed by its first occurrence
+        fresh.append(key in claimed)
+        claimed.discard(key)
+    return fresh
+
+
+async def release_events(db, chain: str, logs: Sequence[Mapping[str, Any]]) -> None:
+    """Removes logs claimed in the current transaction that ended up not applied."""
+    keys = [event_key(log) for log in logs]
+    for start in range(0, len(keys), LEDGER_CHUNK_ROWS):
+        await db.execute(
+            ProcessedEvent.__table__.delete().where(
+                ProcessedEvent.chain == chain,
+                tuple_(ProcessedEvent.tx_hash, ProcessedEvent.log_index).in_(keys[start:start + LEDGER_CHUNK_ROWS])
+            )
+        )
@@ -1,5 +1,7 @@
 import re
 import asyncio
+from typing import Any, Dict, List
+from urllib.parse import urlparse
 
 from eth_typing import HexStr
 from web3 import AsyncWeb3
@@ -7,92 +9,201 @@ from web3.providers.persistent import WebSocketProvider
 from web3.types import SubscriptionType
 from websockets import ConnectionClosed, ConnectionClosedError
 from redis.asyncio import Redis
-import pickle
 from app.core.logger import logging
 from app.core.config import settings
+from app.core.utils.redis_queue import get_queue_redis, publish_pool_stats
+from app.core.web3_services.admins import admin_email_cache
 from app.core.akabokisi.manager import MailboxManager
 from app.core.db.database import async_get_db
 from app.core.akabokisi.messages import on_websocket_disconnect, on_websocket_reconnect
 from app.core.web3_services.arbitrum_one.handlers.helper import get_admin_emails
 from app.schemas.users import QuickAdminRead
 from app.core.constants import websocket_disconnected, websocket_reconnected
+from app.core.web3_services.buffer import EnqueueBuffer
+from app.core.web3_services.transport import create_transport
+from app.core.web3_services.backpressure import BackpressureTransport
+from app.core.web3_services.spill import DiskSpill
+from app.core.web3_services.codec import encode_log
+from app.core.web3_services.dedup import LogDeduplicator, log_key
+from app.core.web3_services.gaps import GapFiller, IngestWatermark
+from app.core.web3_services.metrics import publish_metrics
+from app.core.web3_services.registry import LogHandler, handler_key
+from app.core.exceptions.pipeline_exceptions import LogCodecError
 
 logger = logging.getLogger(__name__)
 
-class SubscriptionHandler:
 
-    w3_socket: AsyncWeb3 = None
+def provider_names(wss_urls: List[str]) -> Dict[str, str]:
+    """
+    Loggable provider labels, without the API keys carried in the URLs.
+
+    Endpoints sharing a host are told apart by their position, e.g. `arb-sepolia.g.alchemy.com#2`.
+    """
+    names: Dict[str, str] = {}
+    for position, wss_url in enumerate(wss_urls, start=1):
+        host = urlparse(wss_url).hostname or "unknown"
+        names[wss_url] = host if host not in names.values() else f"{host}#{position}"
+    return names
+
+
+class SubscriptionHandler:
 
-    def __init__(self, wss_url, redis_queue_name: str, subscriptions_queue_name: str):
-        self.wss_url = wss_url
-        self.redis = Redis(host=settings.REDIS_QUEUE_HOST, port=settings.REDIS_QUEUE_PORT, db=0)
+    def __init__(
+        self,
+        wss_urls: str | List[str],
+        redis_queue_name: str,
+        subscriptions_queue_name: str,
+        redis: Redis | None = None
+    ):
+        self.wss_urls = [wss_urls] if isinstance(wss_urls, str) else list(dict.fromkeys(wss_urls))
+        self.providers = provider_names(self.wss_urls)
+        self.redis = redis or get_queue_redis()
         self.redis_queue_name = redis_queue_name
         self.subscriptions_queue_name = subscriptions_queue_name
-        self.reconnected = False
+        self.sockets: Dict[str, AsyncWeb3] = {}
+        self.subscriptions: List[Dict[str, Any]] = []
+        self._sub_providers: Dict[str, str] = {}
+        self._sub_handlers: Dict[str, str] = {}
+        self._subscribe_lock = asyncio.Lock()
+        self.dedup = LogDeduplicator(self.redis)
+        self.watermark = IngestWatermark(self.redis)
+        self.transport = BackpressureTransport(create_transport(self.redis, self.redis_queue_name), DiskSpill(self.redis_queue_name))
+        self.buffer = EnqueueBuffer(self.transport, self.dedup, self.watermark)
+        self.gaps = GapFiller(self.watermark, self.buffer.hold, self.buffer.release)
+        # Startup counts as a gap too: anything after the persisted watermark was missed
+        self._gap_open = True
     
     async def process_subscriptions(self) -> None:
-        """Connect to the WebSocket and listen for subscription messages."""
+        """Connect to every configured WebSocket provider and listen for subscription messages."""
+        await asyncio.gather(
+            *(self._process_provider(url) for url in self.wss_urls),
+            self._publish_provider_stats(),
+            publish_pool_stats("websocket"),
+            admin_email_cache.listen(self.redis),
+            self.transport.run()
+        )
+
+    async def _process_provider(self, wss_url: str) -> None:
+        """Connects to one provider, replays subscriptions on (re)connect and buffers its logs."""
+        provider = self.providers[wss_url]
+        reconnected = False
         try:
-            async for self.w3_socket in AsyncWeb3(WebSocketProvider(self.wss_url)):
+            async for w3_socket in AsyncWeb3(WebSocketProvider(wss_url)):
+                self.sockets[wss_url] = w3_socket
+                await self._subscribe_provider(wss_url)
+
+                # Every provider was down: backfill what was emitted meanwhile
+                if self._gap_open:
+                    self._gap_open = False
+                    await self.gaps.fill(w3_socket)
+
                 # Check if reconnection has occurred
-                if self.reconnected:
-                    await self._resubscribe()
+                if reconnected:
                     await self.monitor_reconnection()
-                self.reconnected = False
+                reconnected = False
 
                 try:
-                    async for payload in self.w3_socket.socket.process_subscriptions():
-                        log_data = pickle.dumps(payload)
-                        try:
-                            await self.redis.rpush(self.redis_queue_name, log_data)
-                            logger.info(f"Added data to queue: {self.redis_queue_name}")
-                        except (pickle.PickleError, TypeError) as e:
-                            logger.error(f"Failed to add payload data to queue: {e}")
+                    async for payload in w3_socket.socket.process_subscriptions():
+                        await self._ingest(provider, payload)
 
                 except (ConnectionClosedError, ConnectionClosed) as e:
-                    logger.error(f"Connection interrupted due to {e}. Reconnecting...")
-                    self.reconnected = True
+                    logger.error(f"Connection to {provider} interrupted due to {e}. Reconnecting...")
+                    reconnected = True
+                    self._drop_provider(wss_url)
                     await self.monitor_disconnection()
                     continue
                 except asyncio.CancelledError as e:
                     logger.error(f"Cancelling subscription processing. Cleaning up....: {e}")
+                    await self.flush_buffer()
                     await self._cleanup_subscriptions()
                     break
                 except Exception as e:
-                    logger.error(f"Unexpected error: {e}. Reconnecting...")
-                    self.reconnected = True
+                    logger.error(f"Unexpected error from {provider}: {e}. Reconnecting...")
+                    reconnected = True
+                    self._drop_provider(wss_url)
                     await self.monitor_disconnection()
                     continue
         except Exception as e:
-            logger.error(f"Max retries 5 reached. Exited loop!")
-
-    
-    async def subscribe(self, callback: callable, event_type: SubscriptionType, **event_params) -> HexStr:
-        """Subscribes to an event using the existing WebSocket connection."""
-        if self.is_connected():
-            sub_id = await self.w3_socket.eth.subscribe(event_type, event_params)
-            logger.info(f"Subscribed to {event_type} with subscription ID {sub_id}")
+            logger.error(f"Max retries 5 reached for {provider}. Exited loop!")
+        finally:
+            self._drop_provider(wss_url)
 
-            subscription_data = {'callback': callback, 'event_type': event_type, 'event_params': event_params}
-            await self.redis.set(sub_id, pickle.dumps(subscription_data))
+    async def _ingest(self, provider: str, payload) -> None:
+        """Buffers the first copy of a log to arrive; later copies only feed provider stats."""
+        try:
+            log = payload["result"]
+            key = log_key(log)
+            if not self.dedup.first_arrival(key, provider):
+                return
+            log_data = encode_log(self._sub_handlers[payload["subscription"]], log)
+        except (LogCodecError, KeyError, TypeError, AttributeError) as e:
+            logger.error(f"Failed to add payload data to queue: {e}")
+            return
+        await self.buffer.add(log_data, key, log["blockNumber"])
 
-            await self.redis.rpush(self.subscriptions_queue_name, sub_id) # store subscription id in queue
+    async def subscribe(self, callback: LogHandler | str, event_type: SubscriptionType, **event_params) -> List[HexStr]:
+        """
+        Subscribes to an event on every connected provider.
 
-            return sub_id
-        else:
+        `callback` is a handler from the log handler registry (or its key); queued logs
+        only carry the key. The subscription is remembered and replayed on providers
+        that connect or reconnect later.
+        """
+        if not self.is_connected():
             raise RuntimeError("WebSocket connection not established, it's not possible to subscribe")
+
+        async with self._subscribe_lock:
+            subscription = {'handler': handler_key(callback), 'event_type': event_type, 'event_params': event_params}
+            self.subscriptions.append(subscription)
+
+            sub_ids = []
+            for wss_url in list(self.sockets):
+                try:
+                    sub_ids.append(await self._subscribe_on(wss_url, subscription))
+                except Exception as e:
+                    logger.error(f"Failed to subscribe to {event_type} on {self.providers[wss_url]}: {e}")
+
+            if not sub_ids:
+                raise RuntimeError(f"Subscription to {event_type} failed on every provider")
+            return sub_ids
+
+    async def _subscribe_provider(self, wss_url: str) -> None:
+        """Replays every known subscription on a freshly (re)connected provider."""
+        async with self._subscribe_lock:
+            for subscription in self.subscriptions:
+                try:
+                    await self._subscribe_on(wss_url, subscription)
+                except Exception as e:
+                    logger.error(f"Failed to resubscribe to {subscription['event_type']} on {self.providers[wss_url]}: {e}")
+
+    async def _subscribe_on(self, wss_url: str, subscription: Dict[str, Any]) -> HexStr:
+        w3_socket = self.sockets[wss_url]
+        event_type = subscription['event_type']
+        sub_id = await w3_socket.eth.subscribe(event_type, subscription['event_params'])
+        logger.info(f"Subscribed to {event_type} on {self.providers[wss_url]} with subscription ID {sub_id}")
+
+        await self.redis.rpush(self.subscriptions_queue_name, sub_id) # store subscription id in queue
+        self._sub_providers[sub_id] = wss_url
+        self._sub_handlers[sub_id] = subscription['handler']
+
+        return sub_id
     
     async def unsubscribe(self, sub_id: HexStr) -> bool:
         """Unsubscribes from a subscription identified by sub_id."""
-        if self.is_connected():
-            unsubscribed = await self.w3_socket.eth.unsubscribe(sub_id)
+        wss_url = self._sub_providers.pop(sub_id, None)
+        self._sub_handlers.pop(sub_id, None)
+        w3_socket = self.sockets.get(wss_url)
+        if w3_socket is None:
+            # Subscription died with its connection, only its data is left to drop
             await self.redis.delete(sub_id)
-            if unsubscribed:
-                return True
-            else:
-                return False
+            return False
+
+        unsubscribed = await w3_socket.eth.unsubscribe(sub_id)
+        await self.redis.delete(sub_id)
+        if unsubscribed:
+            return True
         else:
-            raise RuntimeError("WebSocket connection not established, it's not possible to unsubscribe")
+            return False
         
     async def _cleanup_subscriptions(self) -> None:
         """Unsubscribe from all active subscriptions retrieved from the Redis queue."""
@@ -112,45 +223,27 @@ class SubscriptionHandler:
             except Exception as e:
                 logger.error(f"Failed to unsubscribe from {sub_id_str}: {e}")
 
+    def _drop_provider(self, wss_url: str) -> None:
+        """Forgets a disconnected provider and the subscription ids that died with it."""
+        self.sockets.pop(wss_url, None)
+        for sub_id, url in list(self._sub_providers.items()):
+            if url == wss_url:
+                del self._sub_providers[sub_id]
+                self._sub_handlers.pop(sub_id, None)
 
-    async def _resubscribe(self) -> None:
-        """Resubscribe to events on reconnect."""
-        while await self.redis.llen("subscriptions_queue") > 0:
-            try:
-                # Pop the first sub_id from the subscriptions_queue
-                sub_id = await self.redis.lpop(self.subscriptions_queue_name)
-                if sub_id is None:
-                    logger.warning("No more subscriptions to resubscribe.")
-                    break
-
-                # Decode the sub_id from bytes to a string
-                sub_id_str = sub_id.decode("utf-8")
-
-                # Retrieve the subscription data from Redis
-                subscription_data_bytes = await self.redis.get(sub_id_str)
-                if subscription_data_bytes is None:
-                    logger.warning(f"No subscription data found for ID {sub_id_str}")
-                    continue
-
-                # Deserialize the subscription data
-                subscription_data = pickle.loads(subscription_data_bytes)
-                callback = subscription_data['callback']
-                event_type = str(subscription_data['event_type'])
-                event_params = list(subscription_data['event_params']['address'])
-
-                # Resubscribe with the original data
-                await self.subscribe(callback, event_type, address=event_params)
-                logger.info(f"Successfully resubscribed to {event_type} previously held by subscription ID: {sub_id_str}")
+        if not self.sockets:
+            self._gap_open = True
 
-                break # ensures we only retrieve the first element of the list
-
-            except Exception as e:
-                logger.error(f"Failed to resubscribe to subscription ID {sub_id}: {e}")
+    async def _publish_provider_stats(self, interval: float = 30) -> None:
+        """Periodically publishes the provider ranking under the `ingest_providers` metrics key."""
+        while True:
+            await asyncio.sleep(interval)
+            await publish_metrics(self.redis, "ingest_providers", self.dedup.ranking())
 
     async def monitor_disconnection(self):
         try:
             async for db in async_get_db():
-                mail = MailboxManager()
+                mail = MailboxManager(self.redis)
                 subject, queue_name = websocket_disconnected()
                 message = on_websocket_disconnect()
                     
@@ -168,7 +261,7 @@ class SubscriptionHandler:
     async def monitor_reconnection(self):
         try:
             async for db in async_get_db():
-                mail = MailboxManager()
+                mail = MailboxManager(self.redis)
                 subject, queue_name = websocket_reconnected()
                 message = on_websocket_reconnect()
                     
@@ -184,10 +277,18 @@ class SubscriptionHandler:
             logger.error(f"Error while monitoring reconnects: {e}")
 
     
+    async def flush_buffer(self) -> None:
+        """Pushes any buffered payloads to the queue. Called on shutdown to avoid losing logs."""
+        try:
+            await self.buffer.close()
+        except Exception as e:
+            logger.error(f"Failed to flush buffered payloads: {e}")
+        self.transport.close()
+
     def is_connected(self) -> bool:
-        """Checks if the WebSocket is connected."""
-        return self.w3_socket is not None
+        """Checks if at least one WebSocket provider is connected."""
+        return bool(self.sockets)
     
     async def queue_size(self) -> int:
         """Get the current size of the Redis queue."""
-        return await self.redis.llen(self.redis_queue_name)
\ No newline at end of file
+        return await self.transport.size()
\ No newline at end of file
@@ -0,0 +1,47 @@
+import json
+import time
+from typing import Any, Dict
+
+from redis.asyncio import Redis
+
+from app.core.logger import logging
+
+logger = logging.getLogger(__name__)
+
+METRICS_KEY_PREFIX = "metrics:"
+METRICS_TTL = 300
+
+
+async def publish_metrics(redis: Redis, component: str, values: Any, ttl: int = METRICS_TTL) -> None:
+    """
+    Stores a metrics snapshot of a pipeline component in Redis.
+
+    Snapshots are readable from any process (API, worker, consumers) and expire
+    when the publishing process stops refreshing them.
+    """
+    try:
+        snapshot = {"updated_at": int(time.time()), "values": values}
+        await redis.set(f"{METRICS_KEY_PREFIX}{component}", json.dumps(snapshot), ex=ttl)
+    except Exception as e:
+        logger.error(f"Failed to publish '{component}' metrics: {e}")
+
+
+async def read_metrics(redis: Redis, component: str) -> Dict[str, Any] | None:
+    """Returns the last metrics snapshot published for `component`, if any."""
+    raw = await redis.get(f"{METRICS_KEY_PREFIX}{component}")
+    if raw is None:
+        return None
+    return json.loads(raw)
+
+
+async def read_metrics_matching(redis: Redis, prefix: str) -> Dict[str, Any]:
+    """Returns every live snapshot whose component starts with `prefix`, keyed by component."""
+    keys = [key async for key in redis.scan_iter(match=f"{METRICS_KEY_PREFIX}{prefix}*", count=100)]
+    if not keys:
+        return {}
+    snapshots = {}
+    for key, raw in zip(keys, await redis.mget(keys)):
+        if raw is not None:
+            name = key.decode() if isinstance(key, bytes) else key
+            snapshots[name[len(METRICS_KEY_PREFIX):]] = json.loads(raw)
+    return snapshots
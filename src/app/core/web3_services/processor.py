@@ -1,56 +1,344 @@
+import asyncio
 import pickle
+import zlib
+from typing import Any, Dict, List, Tuple
+
 from redis.asyncio import Redis
+from sqlalchemy.orm import sessionmaker
 
 from app.core.logger import logging
+from app.core.config import settings
+from app.core.db.database import local_session
+from app.core.web3_services.codec import decode_message
+from app.core.web3_services.deadletter import DeadLetterQueue
+from app.core.web3_services.registry import (
+    LogHandler,
+    resolve_bulk_applier,
+    resolve_handler,
+    resolve_partitioner,
+    resolve_prefetcher
+)
+from app.core.web3_services.transport import create_transport
+from app.core.web3_services.transaction import defer_commits
+from app.core.web3_services.users import user_cache
+from app.core.web3_services.admins import admin_email_cache
 
 logger = logging.getLogger(__name__)
 
+# (transport entry id, or None for a dead-letter retry, decoded message)
+Work = Tuple[bytes | None, Dict[str, Any]]
 
 
 class BatchProcessor:
-    def __init__(self, redis_queue_name: str, redis_inprocess_queue: str, redis_connection: Redis):
+    """
+    Reads queued logs and applies them with a pool of `pool_size` consumers.
+
+    Every consumer owns a DB session. Logs are routed to consumers by the partition
+    key of their handler (user address for balance events, `(contract, match_id,
+    bet_id)` for prediction events...), so logs touching the same entity are applied
+    in queue order by one consumer while unrelated logs are applied in parallel.
+
+    Consumers own the transaction: with `group_by_block`, consecutive logs of the
+    same block are applied with a single commit, every event isolated in a
+    savepoint; otherwise every log is committed on its own. With `bulk`, consecutive
+    logs queued by a backfill are grouped across blocks instead, and handlers with a
+    bulk applier apply most of such a group with a few set-based statements first.
+    Live logs never take the bulk path.
+
+    Logs whose handler fails go to the dead-letter queue and come back through the
+    same partitions once their retry is due.
+    """
+
+    def __init__(
+        self,
+        redis_queue_name: str,
+        redis_inprocess_queue: str,
+        redis_connection: Redis,
+        pool_size: int = settings.INGEST_PROCESSOR_POOL_SIZE,
+        session_factory: sessionmaker = local_session,
+        group_by_block: bool = settings.INGEST_APPLY_MODE == "block",
+        max_group: int = settings.INGEST_APPLY_MAX_GROUP,
+        bulk: bool = settings.INGEST_APPLY_MODE != "event"
+    ):
         self.redis_queue_name = redis_queue_name
         self.inprocess_queue_name = redis_inprocess_queue
         self.redis = redis_connection
-    
-    async def batch_process_logs(self, db):
+        self.transport = create_transport(self.redis, self.redis_queue_name, self.inprocess_queue_name)
+        self.pool_size = max(1, pool_size)
+        self.session_factory = session_factory
+        self.group_by_block = group_by_block
+        self.bulk = bulk
+        self.max_group = max(1, max_group)
+        self.dead_letters = DeadLetterQueue(self.redis)
+        self.partitions: List[asyncio.Queue] = []
+        self.draining = False
+        self._consumers: List[asyncio.Task] = []
+        self._retries: asyncio.Task | None = None
+
+    async def batch_process_logs(self) -> None:
         """
         Fetch a batch of logs from Redis, process them, and store them in the database.
 
-        NOTE: I use BLMOVE which is blocking so as to save resources incase of no acivity.
+        NOTE: Reads block for up to `INGEST_READ_BLOCK_MS` so as to save resources incase of no acivity.
         """
+        await self.transport.setup()
+
+        self.partitions = [
+            asyncio.Queue(maxsize=settings.INGEST_PARTITION_QUEUE_SIZE) for _ in range(self.pool_size)
+        ]
+        consumers = self._consumers = [
+            asyncio.create_task(self._consume(index, partition))
+            for index, partition in enumerate(self.partitions)
+        ]
+        retries = self._retries = asyncio.create_task(self._schedule_retries())
+        invalidations = asyncio.gather(user_cache.listen(self.redis), admin_email_cache.listen(self.redis))
+        try:
+            await self._read_logs()
+            await retries
+            # Draining: let the consumers apply (and acknowledge) every log already read
+            await asyncio.wait_for(
+                asyncio.gather(*(partition.join() for partition in self.partitions)),
+                timeout=settings.INGEST_DRAIN_TIMEOUT
+            )
+            logger.info("Log consumers drained.")
+        except asyncio.TimeoutError:
+            logger.warning("Drain timed out, unacknowledged logs will be delivered again.")
+        finally:
+            for task in (retries, invalidations, *consumers):
+                task.cancel()
+            await asyncio.gather(retries, invalidations, *consumers, return_exceptions=True)
 
-        while True:
+    async def _read_logs(self) -> None:
+        """Routes every log read from the transport to the consumer owning its partition, until `stop()`."""
+        while not self.draining:
             try:
-                log = await self.redis.blmove(self.redis_queue_name, self.inprocess_queue_name, 0)
-                if log:
+                entries = await self.transport.read(settings.INGEST_READ_COUNT, settings.INGEST_READ_BLOCK_MS)
+                if not entries:
+                    logger.debug("Timeout occurred, no items to move.")
+                    continue
+
+                for entry_id, log in entries:
                     try:
-                        message = pickle.loads(log)
-
-                        sub_id = message["subscription"]
-                        if sub_id is None:
-                            logger.error("Message missing 'subscription' field.")
-                            continue
-                        
-                        subscription_data_bytes = await self.redis.get(sub_id)
-                        if subscription_data_bytes is None:
-                            logger.error(f"No subscription data found for sub_id: {sub_id}")
-                            continue
-
-                        subscription_data = pickle.loads(subscription_data_bytes)
-                        callback_function = subscription_data['callback']
-                        if callback_function:
-                            await callback_function(message, db)
-                        else:
-                            raise RuntimeError("No callback function returned")
-                        await self.redis.lrem(self.inprocess_queue_name, 0, log)
+                        message = decode_message(log)
+                        partition = self.partition_of(message)
                     except Exception as e:
-                        logger.error(f"Failed to process log: {e}")
-                else:
-                    logger.info("Timeout occurred, no items to move.")
+                        # Undecodable entries would only come back after the visibility timeout
+                        logger.error(f"Dropping undecodable log: {e}")
+                        await self.transport.ack([entry_id])
+                        continue
+                    # Waits when that consumer is behind, which throttles reads
+                    await self.partitions[partition].put((entry_id, message))
             except ConnectionError as conn_err:
                 logger.error(f"Redis connection error: {conn_err}")
             except TimeoutError as timeout_err:
                 logger.error(f"Redis timeout error: {timeout_err}")
             except Exception as e:
                 logger.error(f"Unexpected error: {e}")
+
+    async def _schedule_retries(self) -> None:
+        """Routes dead-lettered logs whose retry is due to their partitions, until `stop()`."""
+        while not self.draining:
+            try:
+                for message in await self.dead_letters.due(settings.INGEST_READ_COUNT):
+                    await self.partitions[self.partition_of(message)].put((None, message))
+            except Exception as e:
+                logger.error(f"Failed to schedule dead-letter retries: {e}")
+            await asyncio.sleep(settings.INGEST_RETRY_POLL_MS / 1000)
+
+    def alive(self) -> bool:
+        """False once a partition consumer, or the retry scheduler before draining, has exited."""
+        tasks = list(self._consumers)
+        if self._retries is not None and not self.draining:
+            tasks.append(self._retries)
+        return all(not task.done() for task in tasks)
+
+    def stop(self) -> None:
+        """Stops reading new logs; `batch_process_logs` returns once the read ones are applied."""
+        self.draining = True
+
+    def partition_of(self, message: Dict[str, Any]) -> int:
+        """Index of the consumer a message is routed to; stable for a given partition key."""
+        if self.pool_size == 1:
+            return 0
+        partitioner = resolve_partitioner(message["handler"])
+        key = partitioner(message) if partitioner is not None else message["result"]["address"].encode()
+        return zlib.crc32(key) % self.pool_size
+
+    async def _consume(self, index: int, partition: asyncio.Queue) -> None:
+        defer_commits()
+        carry: Work | None = None
+        async with self.session_factory() as db:
+            logger.info(f"Log consumer {index} started.")
+            while True:
+                group = [carry if carry is not None else await partition.get()]
+                carry = None
+                block_number = group[0][1]["result"]["blockNumber"]
+                bulk = self._is_bulk(group[0])
+
+                # Consecutive logs of the same block (of any block when backfilled) are applied in one transaction
+                while (self.group_by_block or bulk) and len(group) < self.max_group and not partition.empty():
+                    item = partition.get_nowait()
+                    if self._is_bulk(item) != bulk or (not bulk and item[1]["result"]["blockNumber"] != block_number):
+                        carry = item
+                        break
+                    group.append(item)
+
+                try:
+                    await self._apply(db, group, block_number, bulk)
+                except Exception as e:
+                    # e.g. the ack failed: the entries stay unacknowledged and are delivered
+                    # again by the reaper (or XAUTOCLAIM), so the consumer keeps going
+                    logger.error(f"Log consumer {index} failed to apply {len(group)} logs of block {block_number}: {e}")
+                finally:
+                    for _ in group:
+                        partition.task_done()
+
+    def _is_bulk(self, item: Work) -> bool:
+        return self.bulk and item[1].get("backfill", False)
+
+    async def _apply(self, db, group: List[Work], block_number: int, bulk: bool = False) -> None:
+        """
+        Applies a group of logs in one transaction, each inside its own savepoint.
+
+        A failing event only rolls back its savepoint; once the transaction commits it
+        is dead-lettered and acknowledged with the rest of the group. Nothing is
+        acknowledged when the commit itself fails, so the group is delivered again.
+        """
+        entry_ids: List[bytes] = []
+        retried: List[Dict[str, Any]] = []
+        failed: List[Tuple[Dict[str, Any], Exception]] = []
+        try:
+            if len(group) > 1:
+                await self._prefetch(db, group)
+            if bulk:
+                group = await self._apply_bulk(db, group, entry_ids, retried)
+
+            for entry_id, message in group:
+                try:
+                    callback_function = await self._callback(message)
+                except Exception as e:
+                    logger.error(f"Failed to process log: {e}")
+                    callback_function = None
+                if callback_function is None:
+                    # No handler will ever take it, so it is not delivered again
+                    if entry_id is not None:
+                        entry_ids.append(entry_id)
+                    continue
+
+                savepoint = await db.begin_nested()
+                try:
+                    await callback_function(message, db)
+                    await savepoint.commit()
+                    if entry_id is None:
+                        retried.append(message)
+                except Exception as e:
+                    await savepoint.rollback()
+                    log = message["result"]
+                    logger.error(f"Log {log['transactionHash'].hex()}:{log['logIndex']} rolled back: {e}")
+                    failed.append((message, e))
+                if entry_id is not None:
+                    entry_ids.append(entry_id)
+
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Failed to apply {len(group)} logs of block {block_number}: {e}")
+            return
+
+        await self._settle_dead_letters(retried, failed)
+        if entry_ids:
+            await self.transport.ack(entry_ids)
+
+    async def _prefetch(self, db, group: List[Work]) -> None:
+        """Lets every handler with a prefetcher load what its logs of the group look up, at once."""
+        by_handler: Dict[str, List[Dict[str, Any]]] = {}
+        for _, message in group:
+            by_handler.setdefault(message["handler"], []).append(message)
+
+        for key, messages in by_handler.items():
+            try:
+                prefetcher = resolve_prefetcher(key)
+                if prefetcher is not None:
+                    await prefetcher(messages, db)
+            except Exception as e:
+                logger.error(f"Failed to prefetch {len(messages)} '{key}' logs: {e}")
+
+    async def _apply_bulk(
+        self,
+        db,
+        group: List[Work],
+        entry_ids: List[bytes],
+        retried: List[Dict[str, Any]]
+    ) -> List[Work]:
+        """
+        Hands the logs of every handler with a bulk applier to it, in a savepoint.
+
+        Returns the logs left to apply one by one, in group order: those of other
+        handlers, those the applier left out, or all of them if it failed.
+        """
+        by_handler: Dict[str, List[int]] = {}
+        for position, (_, message) in enumerate(group):
+            by_handler.setdefault(message["handler"], []).append(position)
+
+        remaining = set(range(len(group)))
+        for key, positions in by_handler.items():
+            try:
+                applier = resolve_bulk_applier(key)
+            except Exception as e:
+                logger.error(f"Failed to resolve bulk applier: {e}")
+                continue
+            if applier is None:
+                continue
+
+            savepoint = await db.begin_nested()
+            try:
+                left = await applier([group[position][1] for position in positions], db)
+                await savepoint.commit()
+            except Exception as e:
+                await savepoint.rollback()
+                logger.warning(f"Bulk apply of {len(positions)} '{key}' logs failed, applying them one by one: {e}")
+                continue
+
+            left_positions = {positions[index] for index in left}
+            for position in positions:
+                if position in left_positions:
+                    continue
+                remaining.discard(position)
+                entry_id, message = group[position]
+                if entry_id is None:
+                    retried.append(message)
+                else:
+                    entry_ids.append(entry_id)
+
+        return [group[position] for position in sorted(remaining)]
+
+    async def _settle_dead_letters(
+        self,
+        retried: List[Dict[str, Any]],
+        failed: List[Tuple[Dict[str, Any], Exception]]
+    ) -> None:
+        try:
+            for message in retried:
+                await self.dead_letters.resolve(message)
+            for message, error in failed:
+                # Legacy logs carry no handler key to retry them with
+                if message["handler"] is not None:
+                    await self.dead_letters.fail(message, error)
+        except Exception as e:
+            logger.error(f"Failed to update dead letters: {e}")
+
+    async def _callback(self, message: Dict[str, Any]) -> LogHandler | None:
+        if message["handler"] is not None:
+            return resolve_handler(message["handler"])
+        return await self._legacy_callback(message["subscription"])
+
+    async def _legacy_callback(self, sub_id: str) -> LogHandler | None:
+        """
+        Recovers the callback of a log queued in the legacy (v1) format, which only
+        carried the subscription id the pickled callback was stored under.
+        """
+        subscription_data_bytes = await self.redis.get(sub_id)
+        if subscription_data_bytes is None:
+            logger.error(f"No subscription data found for sub_id: {sub_id}")
+            return None
+        return pickle.loads(subscription_data_bytes)['callback']
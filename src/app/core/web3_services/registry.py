@@ -0,0 +1,144 @@
+import importlib
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Tuple
+
+from app.core.exceptions.pipeline_exceptions import HandlerNotFoundError
+
+LogHandler = Callable[..., Awaitable[None]]
+LogPartitioner = Callable[[Mapping[str, Any]], bytes]
+# (messages, db) -> indexes of the messages it left to the per-log handler
+BulkLogApplier = Callable[[List[Dict[str, Any]], Any], Awaitable[List[int]]]
+# (messages, db) -> None
+LogPrefetcher = Callable[[List[Dict[str, Any]], Any], Awaitable[None]]
+
+# Short, stable keys carried by queued logs -> import path of the callback that processes them.
+# Renaming or moving a callback only touches this table, never the data already queued.
+LOG_HANDLERS: Dict[str, str] = {
+    "usdtv1_arb": "app.core.web3_services.arbitrum_one.callbacks.process_arbitrum_callbacklogs",
+}
+
+# Handler key -> import path of the function giving the partition key of a message.
+# Messages sharing a partition key are processed in queue order by the same consumer.
+LOG_PARTITIONERS: Dict[str, str] = {
+    "usdtv1_arb": "app.core.web3_services.arbitrum_one.callbacks.partition_arbitrum_log",
+}
+
+# Handler key -> import path of its set-based applier, used to apply many backfilled
+# logs with a few multi-row statements.
+LOG_BULK_APPLIERS: Dict[str, str] = {
+    "usdtv1_arb": "app.core.web3_services.arbitrum_one.callbacks.bulk_apply_arbitrum_logs",
+}
+
+# Handler key -> import path of the function loading what a group of its logs will
+# look up (the users they touch...) with a few queries, before the group is applied.
+LOG_PREFETCHERS: Dict[str, str] = {
+    "usdtv1_arb": "app.core.web3_services.arbitrum_one.callbacks.prefetch_arbitrum_users",
+}
+
+# Kind of registered callable -> (import paths, callables already imported), by handler key
+_REGISTRIES: Dict[str, Tuple[Dict[str, str], Dict[str, Callable]]] = {
+    "handler": (LOG_HANDLERS, {}),
+    "partitioner": (LOG_PARTITIONERS, {}),
+    "bulk applier": (LOG_BULK_APPLIERS, {}),
+    "prefetcher": (LOG_PREFETCHERS, {}),
+}
+
+
+def _path(func: Callable) -> str:
+    return f"{func.__module__}.{func.__qualname__}"
+
+
+def _import(path: str) -> Callable:
+    module_name, _, attr = path.rpartition(".")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+def _register(kind: str, key: str, func: Callable | str | None) -> None:
+    paths, resolved = _REGISTRIES[kind]
+    resolved.pop(key, None)
+    if func is None:
+        paths.pop(key, None)
+    elif isinstance(func, str):
+        paths[key] = func
+    else:
+        paths[key] = _path(func)
+        resolved[key] = func
+
+
+def _resolve(kind: str, key: str | None, required: bool = False) -> Callable | None:
+    """
+    Returns the `kind` callable registered for handler `key`, importing it on first use.
+
+    None when there is none, unless `required`: then HandlerNotFoundError is raised.
+    """
+    paths, resolved = _REGISTRIES[kind]
+    func = resolved.get(key)
+    if func is not None:
+        return func
+
+    path = paths.get(key)
+    if path is None:
+        if required:
+            raise HandlerNotFoundError(f"No log {kind} registered under '{key}'")
+        return None
+
+    try:
+        func = _import(path)
+    except (ImportError, AttributeError) as e:
+        raise HandlerNotFoundError(f"Log {kind} of '{key}' cannot be imported from {path}: {e}") from e
+
+    resolved[key] = func
+    return func
+
+
+def register_handler(
+    key: str,
+    handler: LogHandler | str,
+    partitioner: LogPartitioner | str | None = None,
+    bulk_applier: BulkLogApplier | str | None = None,
+    prefetcher: LogPrefetcher | str | None = None
+) -> None:
+    """
+    Registers a log handler under `key`, with its optional partitioner, bulk applier and
+    prefetcher. Each is a callable or an import path; those left out are unregistered.
+    """
+    if len(key.encode("utf-8")) > 255:
+        raise ValueError(f"Handler key too long: {key}")
+
+    _register("handler", key, handler)
+    _register("partitioner", key, partitioner)
+    _register("bulk applier", key, bulk_applier)
+    _register("prefetcher", key, prefetcher)
+
+
+def resolve_handler(key: str) -> LogHandler:
+    """Returns the handler registered under `key`, importing it on first use."""
+    return _resolve("handler", key, required=True)
+
+
+def resolve_partitioner(key: str | None) -> LogPartitioner | None:
+    """Returns the partitioner registered for handler `key`, or None when it has none."""
+    return _resolve("partitioner", key)
+
+
+def resolve_bulk_applier(key: str | None) -> BulkLogApplier | None:
+    """Returns the bulk applier registered for handler `key`, or None when it has none."""
+    return _resolve("bulk applier", key)
+
+
+def resolve_prefetcher(key: str | None) -> LogPrefetcher | None:
+    """Returns the prefetcher registered for handler `key`, or None when it has none."""
+    return _resolve("prefetcher", key)
+
+
+def handler_key(handler: LogHandler | str) -> str:
+    """Returns the registry key of `handler`; keys are returned as-is."""
+    if isinstance(handler, str):
+        if handler not in LOG_HANDLERS:
+            raise HandlerNotFoundError(f"No log handler registered under '{handler}'")
+        return handler
+
+    path = _path(handler)
+    for key, registered in LOG_HANDLERS.items():
+        if registered == path:
+            return key
+    raise HandlerNotFoundError(f"Log handler {path} is not registered")
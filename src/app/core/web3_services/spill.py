@@ -0,0 +1,206 @@
+import fcntl
+import itertools
+import mmap
+import os
+import socket
+import struct
+from typing import IO, List, Tuple
+
+from app.core.logger import logging
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# write offset | read offset
+_HEADER = struct.Struct(">QQ")
+# payload length
+_RECORD = struct.Struct(">I")
+SEGMENT_SUFFIX = ".seg"
+LOCK_FILE = ".lock"
+
+
+class SpillSegment:
+    """
+    Append-only, memory-mapped file of length-prefixed payloads.
+
+    The file is preallocated to `capacity` bytes. Its header keeps the write and
+    read offsets, so a segment reopened after a restart resumes where it stopped.
+    """
+
+    def __init__(self, path: str, capacity: int):
+        self.path = path
+        exists = os.path.exists(path)
+        self._file = open(path, "r+b" if exists else "w+b")
+        if not exists:
+            self._file.truncate(capacity)
+        self.capacity = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), self.capacity)
+
+        if exists:
+            self.write_offset, self.read_offset = _HEADER.unpack_from(self._map, 0)
+        if not exists or self.write_offset < _HEADER.size:
+            # New, or created by a run that stopped before writing the header
+            self.reset()
+
+    @property
+    def pending_bytes(self) -> int:
+        return self.write_offset - self.read_offset
+
+    @property
+    def drained(self) -> bool:
+        return self.read_offset >= self.write_offset
+
+    def append(self, payload: bytes) -> bool:
+        """Appends a payload; False when the segment has no room left for it."""
+        end = self.write_offset + _RECORD.size + len(payload)
+        if end > self.capacity:
+            return False
+        _RECORD.pack_into(self._map, self.write_offset, len(payload))
+        self._map[self.write_offset + _RECORD.size:end] = payload
+        self.write_offset = end
+        _HEADER.pack_into(self._map, 0, self.write_offset, self.read_offset)
+        return True
+
+    def read(self, max_count: int, offset: int | None = None) -> Tuple[List[bytes], int]:
+        """Returns up to `max_count` payloads from `offset` (default: read offset) and the offset after them."""
+        payloads: List[bytes] = []
+        offset = self.read_offset if offset is None else offset
+        while offset < self.write_offset and len(payloads) < max_count:
+            (size,) = _RECORD.unpack_from(self._map, offset)
+            start = offset + _RECORD.size
+            payloads.append(bytes(self._map[start:start + size]))
+            offset = start + size
+        return payloads, offset
+
+    def consume(self, offset: int) -> None:
+        """Marks everything before `offset` as drained."""
+        self.read_offset = min(offset, self.write_offset)
+        _HEADER.pack_into(self._map, 0, self.write_offset, self.read_offset)
+
+    def count(self) -> int:
+        """Number of payloads not drained yet (scans the segment)."""
+        count, offset = 0, self.read_offset
+        while offset < self.write_offset:
+            (size,) = _RECORD.unpack_from(self._map, offset)
+            offset += _RECORD.size + size
+            count += 1
+        return count
+
+    def reset(self) -> None:
+        self.write_offset = self.read_offset = _HEADER.size
+        _HEADER.pack_into(self._map, 0, self.write_offset, self.read_offset)
+
+    def flush(self) -> None:
+        self._map.flush()
+
+    def close(self) -> None:
+        self._map.flush()
+        self._map.close()
+        self._file.close()
+
+
+class DiskSpill:
+    """
+    FIFO of payloads spread over `SpillSegment` files.
+
+    Payloads are appended to the newest segment and read from the oldest; a new
+    segment is started when the newest is full and drained segments are deleted.
+
+    Each spill owns a directory `<host>-<name>` under `root` (`INGEST_SPILL_DIR`),
+    locked for as long as it is open: another process on the same host takes the
+    next free `<host>-<name>.<n>` instead. A restarted process claims the same
+    directory again and picks up the segments its previous run left over.
+    """
+
+    def __init__(
+        self,
+        name: str = "ingest",
+        root: str = settings.INGEST_SPILL_DIR,
+        segment_bytes: int = settings.INGEST_SPILL_SEGMENT_BYTES
+    ):
+        self.segment_bytes = segment_bytes
+        self.directory, self._lock = _claim_directory(os.path.join(root, f"{socket.gethostname()}-{name}"))
+
+        files = sorted(file for file in os.listdir(self.directory) if file.endswith(SEGMENT_SUFFIX))
+        self.segments: List[SpillSegment] = []
+        for file in files:
+            path = os.path.join(self.directory, file)
+            if os.path.getsize(path) < _HEADER.size:
+                os.remove(path)
+            else:
+                self.segments.append(SpillSegment(path, segment_bytes))
+        self._next_id = int(files[-1][:-len(SEGMENT_SUFFIX)]) + 1 if files else 0
+        self._drop_drained()
+        self.records = sum(segment.count() for segment in self.segments)
+        if self.records:
+            logger.warning(f"Recovered {self.records} spilled payloads from {self.directory}")
+
+    def __len__(self) -> int:
+        return self.records
+
+    @property
+    def pending_bytes(self) -> int:
+        return sum(segment.pending_bytes for segment in self.segments)
+
+    def append(self, payloads: List[bytes]) -> None:
+        for payload in payloads:
+            if not self.segments or not self.segments[-1].append(payload):
+                self._new_segment(len(payload)).append(payload)
+            self.records += 1
+
+    def read(self, max_count: int) -> Tuple[List[bytes], int]:
+        """Returns up to `max_count` of the oldest payloads and a cursor for `consume`."""
+        self._drop_drained()
+        if not self.segments:
+            return [], 0
+        return self.segments[0].read(max_count)
+
+    def consume(self, count: int, cursor: int) -> None:
+        """Drops the `count` payloads returned by `read` once they are safely in Redis."""
+        head = self.segments[0]
+        head.consume(cursor)
+        self.records -= count
+        if head.drained and len(self.segments) == 1:
+            head.reset()
+        self._drop_drained()
+
+    def flush(self) -> None:
+        for segment in self.segments:
+            segment.flush()
+
+    def close(self) -> None:
+        for segment in self.segments:
+            segment.close()
+        self.segments = []
+        if self._lock is not None:
+            self._lock.close()
+            self._lock = None
+
+    def _drop_drained(self) -> None:
+        """Deletes drained segments ahead of the newest, e.g. left over by a crash between consume and delete."""
+        while len(self.segments) > 1 and self.segments[0].drained:
+            head = self.segments.pop(0)
+            head.close()
+            os.remove(head.path)
+
+    def _new_segment(self, payload_size: int) -> SpillSegment:
+        path = os.path.join(self.directory, f"{self._next_id:012d}{SEGMENT_SUFFIX}")
+        self._next_id += 1
+        capacity = max(self.segment_bytes, _HEADER.size + _RECORD.size + payload_size)
+        segment = SpillSegment(path, capacity)
+        self.segments.append(segment)
+        return segment
+
+
+def _claim_directory(base: str) -> Tuple[str, IO]:
+    """Creates and locks the first of `base`, `base.1`, `base.2`, ... not locked by another process."""
+    for slot in itertools.count():
+        directory = base if slot == 0 else f"{base}.{slot}"
+        os.makedirs(directory, exist_ok=True)
+        lock = open(os.path.join(directory, LOCK_FILE), "a")
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock.close()
+            continue
+        return directory, lock
@@ -0,0 +1,18 @@
+from contextvars import ContextVar
+
+_commit_deferred: ContextVar[bool] = ContextVar("ingest_commit_deferred", default=False)
+
+
+def autocommit() -> bool:
+    """
+    Whether event handlers commit their own writes.
+
+    False inside log consumers: the processor owns the transaction there, isolates
+    every event in a savepoint and commits once per group of logs.
+    """
+    return not _commit_deferred.get()
+
+
+def defer_commits() -> None:
+    """Makes handlers running in the current task leave commits to the caller."""
+    _commit_deferred.set(True)
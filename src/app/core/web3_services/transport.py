@@ -0,0 +1,301 @@
+import os
+import time
+import socket
+from typing import List, Sequence, Tuple
+
+from redis.asyncio import Redis
+from redis.exceptions import ResponseError
+
+from app.core.logger import logging
+from app.core.config import settings
+from app.core.constants import ALCHEMY_INPROCESSING_QUEUE
+
+logger = logging.getLogger(__name__)
+
+# (entry id used for acknowledgement, encoded log)
+Entry = Tuple[bytes, bytes]
+
+
+def default_consumer_name() -> str:
+    """Unique-per-process consumer name, e.g. `worker-1-4242`."""
+    return settings.INGEST_CONSUMER_NAME or f"{socket.gethostname()}-{os.getpid()}"
+
+
+# Drains the consumer's landing list, then moves up to ARGV[1] entries in total from
+# the queue into its in-flight hash, each under a fresh id with a visibility deadline
+_CLAIM_SCRIPT = """
+local entries = {}
+local function claim(payload)
+    local id = redis.call('INCR', KEYS[5])
+    redis.call('HSET', KEYS[3], id, payload)
+    redis.call('ZADD', KEYS[4], ARGV[2], id)
+    entries[#entries + 1] = tostring(id)
+    entries[#entries + 1] = payload
+end
+local payload = redis.call('LPOP', KEYS[2])
+while payload do
+    claim(payload)
+    payload = redis.call('LPOP', KEYS[2])
+end
+for _ = #entries / 2 + 1, tonumber(ARGV[1]) do
+    payload = redis.call('LPOP', KEYS[1])
+    if not payload then break end
+    claim(payload)
+end
+redis.call('ZADD', KEYS[6], ARGV[3], ARGV[4])
+return entries
+"""
+
+# Puts a consumer's entries past their deadline back at the head of the queue, oldest
+# first. The landing list of a consumer gone for longer than the timeout goes too.
+_REAP_SCRIPT = """
+local ids = redis.call('ZRANGEBYSCORE', KEYS[4], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+table.sort(ids, function(a, b) return tonumber(a) < tonumber(b) end)
+local requeued = 0
+for i = #ids, 1, -1 do
+    local payload = redis.call('HGET', KEYS[3], ids[i])
+    if payload then
+        redis.call('LPUSH', KEYS[1], payload)
+        requeued = requeued + 1
+    end
+    redis.call('HDEL', KEYS[3], ids[i])
+    redis.call('ZREM', KEYS[4], ids[i])
+end
+local heartbeat = tonumber(redis.call('ZSCORE', KEYS[5], ARGV[3]) or '0')
+if heartbeat < tonumber(ARGV[4]) then
+    local payload = redis.call('RPOP', KEYS[2])
+    while payload do
+        redis.call('LPUSH', KEYS[1], payload)
+        requeued = requeued + 1
+        payload = redis.call('RPOP', KEYS[2])
+    end
+    if redis.call('HLEN', KEYS[3]) == 0 then
+        redis.call('ZREM', KEYS[5], ARGV[3])
+    end
+end
+return requeued
+"""
+
+
+class ListTransport:
+    """
+    Chain-log transport on a Redis list.
+
+    Producers `RPUSH`. A consumer `BLMOVE`s the first entry into its own landing list
+    (`<inprocess>:<consumer>`), then a script moves it and up to `count - 1` more
+    into its in-flight hash under fresh ids, with a deadline `visibility_timeout_ms`
+    away. Acknowledging is an `HDEL` + `ZREM` of those ids, so it does not scan a list.
+
+    Every consumer periodically reaps the in-flight entries of all consumers whose
+    deadline passed (e.g. a failed commit or a dead process) and puts them back at
+    the head of the queue, so several consumers can share the queue safely.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        queue_name: str,
+        inprocess_queue_name: str = ALCHEMY_INPROCESSING_QUEUE,
+        consumer_name: str | None = None,
+        visibility_timeout_ms: int = settings.INGEST_VISIBILITY_TIMEOUT_MS
+    ):
+        self.redis = redis
+        self.queue_name = queue_name
+        self.inprocess_queue_name = inprocess_queue_name
+        self.consumer_name = consumer_name or default_consumer_name()
+        self.visibility_timeout_ms = visibility_timeout_ms
+        self.consumers_key = f"{inprocess_queue_name}:consumers"
+        self.sequence_key = f"{inprocess_queue_name}:seq"
+        self._claim = redis.register_script(_CLAIM_SCRIPT)
+        self._reap_consumer = redis.register_script(_REAP_SCRIPT)
+        self._next_reap = 0.0
+
+    def _keys(self, consumer_name: str) -> Tuple[str, str, str]:
+        """Landing list, in-flight hash and deadline set of a consumer."""
+        prefix = f"{self.inprocess_queue_name}:{consumer_name}"
+        return prefix, f"{prefix}:inflight", f"{prefix}:deadlines"
+
+    async def setup(self) -> None:
+        """Puts back entries left in the single in-processing list of older versions."""
+        if await self.redis.type(self.inprocess_queue_name) not in (b"list", "list"):
+            return
+        moved = 0
+        while await self.redis.lmove(self.inprocess_queue_name, self.queue_name, "RIGHT", "LEFT") is not None:
+            moved += 1
+        logger.warning(f"Requeued {moved} entries from legacy {self.inprocess_queue_name}")
+
+    async def publish(self, payloads: Sequence[bytes]) -> None:
+        if payloads:
+            await self.redis.rpush(self.queue_name, *payloads)
+
+    async def read(self, count: int, block_ms: int) -> List[Entry]:
+        """Blocks for the first entry, then claims up to `count - 1` more without blocking."""
+        await self._reap()
+
+        landing, inflight, deadlines = self._keys(self.consumer_name)
+        now_ms = time.time() * 1000
+        first = await self.redis.blmove(self.queue_name, landing, block_ms / 1000)
+        if first is None:
+            # Idle consumers stay registered, so their landing list is left alone
+            await self.redis.zadd(self.consumers_key, {self.consumer_name: now_ms})
+            return []
+
+        response = await self._claim(
+            keys=[self.queue_name, landing, inflight, deadlines, self.sequence_key, self.consumers_key],
+            args=[count, now_ms + self.visibility_timeout_ms, now_ms, self.consumer_name]
+        )
+        return list(zip(response[::2], response[1::2]))
+
+    async def ack(self, entry_ids: Sequence[bytes]) -> None:
+        if not entry_ids:
+            return
+        _, inflight, deadlines = self._keys(self.consumer_name)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hdel(inflight, *entry_ids)
+            pipe.zrem(deadlines, *entry_ids)
+            await pipe.execute()
+
+    async def size(self) -> int:
+        return await self.redis.llen(self.queue_name)
+
+    async def inflight(self) -> int:
+        """Entries read by this consumer and not acknowledged yet."""
+        return await self.redis.hlen(self._keys(self.consumer_name)[1])
+
+    async def _reap(self) -> int:
+        """Runs the reaper over every registered consumer at most every half timeout."""
+        now = time.monotonic()
+        if now < self._next_reap:
+            return 0
+        self._next_reap = now + self.visibility_timeout_ms / 2000
+
+        now_ms = time.time() * 1000
+        requeued = 0
+        for consumer in await self.redis.zrange(self.consumers_key, 0, -1):
+            consumer_name = consumer.decode() if isinstance(consumer, bytes) else consumer
+            landing, inflight, deadlines = self._keys(consumer_name)
+            requeued += await self._reap_consumer(
+                keys=[self.queue_name, landing, inflight, deadlines, self.consumers_key],
+                args=[now_ms, settings.INGEST_READ_COUNT, consumer_name, now_ms - self.visibility_timeout_ms]
+            )
+        if requeued:
+            logger.warning(f"Requeued {requeued} entries past their visibility timeout on {self.queue_name}")
+        return requeued
+
+
+class StreamTransport:
+    """
+    Chain-log transport on a Redis Stream with a consumer group.
+
+    Producers `XADD`, every consumer reads its own share with `XREADGROUP ... COUNT`
+    and acknowledges with `XACK` + `XDEL` so the stream only holds unprocessed logs.
+    Entries left pending by a dead consumer for longer than `claim_idle_ms` are taken
+    over with `XAUTOCLAIM`, so several consumers can share the load without
+    processing the same entry twice.
+    """
+
+    FIELD = b"log"
+
+    def __init__(
+        self,
+        redis: Redis,
+        stream_name: str,
+        group_name: str = settings.INGEST_STREAM_GROUP,
+        consumer_name: str | None = None,
+        claim_idle_ms: int = settings.INGEST_STREAM_CLAIM_IDLE_MS
+    ):
+        self.redis = redis
+        self.queue_name = stream_name
+        self.group_name = group_name
+        self.consumer_name = consumer_name or default_consumer_name()
+        self.claim_idle_ms = claim_idle_ms
+        self._next_claim = 0.0
+
+    async def setup(self) -> None:
+        """Creates the consumer group (and the stream) if it does not exist yet."""
+        try:
+            await self.redis.xgroup_create(self.queue_name, self.group_name, id="0", mkstream=True)
+            logger.info(f"Created consumer group {self.group_name} on {self.queue_name}")
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    async def publish(self, payloads: Sequence[bytes]) -> None:
+        if not payloads:
+            return
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for payload in payloads:
+                pipe.xadd(self.queue_name, {self.FIELD: payload})
+            await pipe.execute()
+
+    async def read(self, count: int, block_ms: int) -> List[Entry]:
+        """Reclaims stale pending entries first, then reads new ones for this consumer."""
+        entries = await self._reclaim(count)
+        if entries:
+            return entries
+
+        response = await self.redis.xreadgroup(
+            self.group_name,
+            self.consumer_name,
+            {self.queue_name: ">"},
+            count=count,
+            block=block_ms
+        )
+        for _, messages in response or []:
+            entries.extend(self._entries(messages))
+        return entries
+
+    async def ack(self, entry_ids: Sequence[bytes]) -> None:
+        if not entry_ids:
+            return
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.xack(self.queue_name, self.group_name, *entry_ids)
+            pipe.xdel(self.queue_name, *entry_ids)
+            await pipe.execute()
+
+    async def size(self) -> int:
+        return await self.redis.xlen(self.queue_name)
+
+    async def _reclaim(self, count: int) -> List[Entry]:
+        """Runs `XAUTOCLAIM` at most every half idle period, unless the last run filled up."""
+        now = time.monotonic()
+        if now < self._next_claim:
+            return []
+
+        response = await self.redis.xautoclaim(
+            self.queue_name,
+            self.group_name,
+            self.consumer_name,
+            min_idle_time=self.claim_idle_ms,
+            start_id="0-0",
+            count=count
+        )
+        entries = self._entries(response[1])
+        if len(response[1]) < count:
+            self._next_claim = now + self.claim_idle_ms / 2000
+        if entries:
+            logger.warning(f"Reclaimed {len(entries)} stale entries from {self.queue_name}")
+        return entries
+
+    def _entries(self, messages) -> List[Entry]:
+        return [
+            (entry_id, fields[self.FIELD])
+            for entry_id, fields in messages
+            if fields and self.FIELD in fields
+        ]
+
+
+def create_transport(
+    redis: Redis,
+    queue_name: str,
+    inprocess_queue_name: str = ALCHEMY_INPROCESSING_QUEUE,
+    consumer_name: str | None = None
+) -> ListTransport | StreamTransport:
+    """
+    Returns the chain-log transport selected by `INGEST_TRANSPORT` ("list" or "stream").
+
+    NOTE: Both transports use `queue_name` as key, so drain the queue before switching.
+    """
+    if settings.INGEST_TRANSPORT == "stream":
+        return StreamTransport(redis, queue_name, consumer_name=consumer_name)
+    return ListTransport(redis, queue_name, inprocess_queue_name, consumer_name)
@@ -0,0 +1,117 @@
+import asyncio
+from collections import OrderedDict
+from typing import Dict, Iterable, NamedTuple
+
+from redis.asyncio import Redis
+from sqlalchemy import text
+
+from app.core.logger import logging
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+USER_INVALIDATION_CHANNEL = "ingest:users:invalidate"
+
+_SELECT_USER = text('SELECT public_address, id FROM "user" WHERE public_address = :address')
+_SELECT_USERS = text('SELECT public_address, id FROM "user" WHERE public_address = ANY(:addresses)')
+
+
+class CachedUser(NamedTuple):
+    id: int
+
+
+class UserCache:
+    """
+    Bounded LRU of `public_address -> user id` for event handlers.
+
+    Handlers resolve the user of an event with `get`; the processor fills the cache
+    for a whole group of logs with `prefetch`, a single `ANY(...)` query. Addresses
+    without a user are remembered too (so repeated events of an unknown wallet
+    do not query again) until `/auth/nonce` creates it and publishes the address on
+    `USER_INVALIDATION_CHANNEL`, which `listen` applies. User ids never change, so
+    entries need no other invalidation.
+    """
+
+    def __init__(self, capacity: int = settings.INGEST_USER_CACHE_CAPACITY):
+        self.capacity = max(1, capacity)
+        self._entries: OrderedDict[str, CachedUser | None] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.queries = 0
+
+    def _store(self, address: str, user: CachedUser | None) -> None:
+        self._entries[address] = user
+        self._entries.move_to_end(address)
+        if len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    async def get(self, db, address: str) -> CachedUser | None:
+        """User of `address` (lowercase), or None when it has no account."""
+        if address in self._entries:
+            self.hits += 1
+            self._entries.move_to_end(address)
+            return self._entries[address]
+
+        self.misses += 1
+        self.queries += 1
+        row = (await db.execute(_SELECT_USER, {"address": address})).first()
+        user = CachedUser(row.id) if row is not None else None
+        self._store(address, user)
+        return user
+
+    async def prefetch(self, db, addresses: Iterable[str]) -> None:
+        """Loads every address not cached yet with one query."""
+        missing = [address for address in dict.fromkeys(addresses) if address not in self._entries]
+        if not missing:
+            return
+
+        self.queries += 1
+        rows = (await db.execute(_SELECT_USERS, {"addresses": missing})).all()
+        found = {row.public_address: CachedUser(row.id) for row in rows}
+        for address in missing:
+            self._store(address, found.get(address))
+
+    def invalidate(self, address: str) -> None:
+        self._entries.pop(address, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def forget_missing(self) -> None:
+        """Drops the addresses remembered as unknown; they may have signed up since."""
+        for address in [address for address, user in self._entries.items() if user is None]:
+            del self._entries[address]
+
+    async def listen(self, redis: Redis) -> None:
+        """Drops the addresses published by `/auth/nonce` when it creates their user, until cancelled."""
+        while True:
+            try:
+                async with redis.pubsub() as pubsub:
+                    await pubsub.subscribe(USER_INVALIDATION_CHANNEL)
+                    # Users created while unsubscribed were never announced to this process
+                    self.forget_missing()
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self.invalidate(message["data"].decode())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"User cache invalidation listener failed, resubscribing: {e}")
+                await asyncio.sleep(1)
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses, "queries": self.queries}
+
+
+async def publish_user_created(redis: Redis | None, address: str) -> None:
+    """Tells the log consumers a user now exists for `address`."""
+    if redis is None:
+        return
+    try:
+        await redis.publish(USER_INVALIDATION_CHANNEL, address)
+    except Exception as e:
+        logger.error(f"Failed to publish new user {address}: {e}")
+
+
+# One cache per process, shared by the handlers of every consumer
+user_cache = UserCache()
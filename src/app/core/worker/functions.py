@@ -1,15 +1,13 @@
 import asyncio
 
 import uvloop
-from redis.asyncio import Redis
 from arq.worker import Worker
 from app.core.logger import logging
-from app.core.web3_services.processor import BatchProcessor
 from app.core.akabokisi.manager import MailboxManager
-from app.core.constants import ALCHEMY_REDIS_QUEUE_NAME, ALCHEMY_INPROCESSING_QUEUE
-from app.core.db.database import async_get_db
 from app.core.web3_services.arbitrum_one.functions import queue_missed_events_for_usdtv1_arb_alchemy
 from app.core.config import settings
+from app.core.utils.redis_queue import close_queue_redis, publish_pool_stats
+from app.core.akabokisi.transport import close_mail_transport
 
 logger = logging.getLogger(__name__)
 
@@ -44,29 +42,6 @@ async def send_email_manually(ctx: Worker, name: str) -> str:
         logger.error(f"Email sending failed due to: {e}")
     return f"Task {name} is complete!"
     
-async def process_data(ctx):
-    """Cron for continously processing data from block-chain"""
-
-    logger.info("Process Data Cron job started")
-    redis_connection: Redis = ctx['redis']
-
-    async for db in async_get_db():
-        bp = BatchProcessor(
-            ALCHEMY_REDIS_QUEUE_NAME,
-            ALCHEMY_INPROCESSING_QUEUE,
-            redis_connection
-        )
-
-        try:
-            await bp.batch_process_logs(db)
-        except asyncio.CancelledError as e:
-            logger.error(f"Cancelled: {e}")
-        except Exception as e:
-            logger.error(f"Unknown Error: {e}")
-        finally:
-            logger.info("Database connection released.") 
-        break
-
 async def call_usdtv1_arb_alchemy_fallback(
         ctx: Worker,
         name: str,
@@ -75,7 +50,7 @@ async def call_usdtv1_arb_alchemy_fallback(
     ) -> None:
     """Fetches data history. Should strictly be called when necessary"""
 
-    timeout = 2 * settings.WEBSOCKET_TIMEOUT
+    timeout = settings.INGEST_BACKFILL_TIMEOUT
     try:
         await asyncio.wait_for(
             queue_missed_events_for_usdtv1_arb_alchemy(from_block, to_block),
@@ -83,17 +58,23 @@ async def call_usdtv1_arb_alchemy_fallback(
         )
     except asyncio.TimeoutError:
         logger.error("Time Out")
+        raise
     except asyncio.CancelledError as e:
         logger.error(f"Cancelled: {e}")
         raise
     except Exception as e:
         logger.error(f"Unknown Error: {e}")
+        raise
     logger.info(f"Task `{name}` completed its run.")
     
 # -------- base functions --------
 async def startup(ctx: Worker) -> None:
+    ctx["pool_metrics"] = asyncio.create_task(publish_pool_stats("worker"))
     logger.info("Worker Started")
 
 
 async def shutdown(ctx: Worker) -> None:
+    ctx["pool_metrics"].cancel()
+    await close_queue_redis()
+    await close_mail_transport()
     logger.info("Worker end")
@@ -1,12 +1,12 @@
 from arq.connections import RedisSettings
 from arq.cron import cron
+from arq.worker import func
 
 from app.core.config import settings
 from app.core.worker.functions import (
     sample_background_task,
     shutdown,
     startup,
-    process_data,
     call_usdtv1_arb_alchemy_fallback,
     send_email,
     send_email_manually
@@ -23,7 +23,7 @@ one_minute_sequence = {i for i in range(60)}
 class WorkerSettings:
     functions = [
         sample_background_task,
-        call_usdtv1_arb_alchemy_fallback,
+        func(call_usdtv1_arb_alchemy_fallback, timeout=settings.INGEST_BACKFILL_TIMEOUT + 60),
         send_email_manually
     ]
     redis_settings = RedisSettings(host=REDIS_QUEUE_HOST, port=REDIS_QUEUE_PORT)
@@ -32,14 +32,6 @@ class WorkerSettings:
     handle_signals = False
 
     cron_jobs = [
-        cron(
-            process_data,
-            name="Process Data Cron",
-            minute=three_minute_squence,
-            run_at_startup=True,
-            timeout=180,
-            max_tries=1
-        ),
         cron(
             send_email,
             name="Automatic Emailing Cron",
@@ -0,0 +1,56 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import BigInteger, Index
+from sqlmodel import (
+    Column, SQLModel, Field, TIMESTAMP, text, DECIMAL, UniqueConstraint
+)
+
+class ProcessedEvent(SQLModel, table=True):
+    """Ledger of the chain logs already applied, written in the transaction applying them."""
+    __tablename__ = "processed_event"
+    __table_args__ = (
+        UniqueConstraint("chain", "tx_hash", "log_index", name="uq_processed_event_log"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    chain: str = Field(max_length=32)
+    tx_hash: str = Field(max_length=66)
+    log_index: int
+    block_number: int = Field(index=True)
+    event: str = Field(max_length=64)
+    created_at: Optional[datetime] = Field(sa_column=Column(
+        TIMESTAMP(timezone=True),
+        nullable=True,
+        server_default=text("CURRENT_TIMESTAMP"),
+    ))
+
+
+class BalanceLedger(SQLModel, table=True):
+    """
+    Insert-only log of on-chain balance movements, one row per applied event.
+
+    `deposit`/`claim` rows hold a signed amount, `snapshot` rows the balance the
+    contract reported. Rows are folded into `user.balance` asynchronously and
+    flagged `materialized`; the pending ones stay indexed per user, and every row
+    by its user and chain position for the fold.
+    """
+    __tablename__ = "balance_ledger"
+    __table_args__ = (
+        Index("ix_balance_ledger_pending", "id", postgresql_where=text("NOT materialized")),
+        Index("ix_balance_ledger_pending_user", "user_id", "id", postgresql_where=text("NOT materialized")),
+        Index("ix_balance_ledger_user_position", "user_id", "block_number", "log_index"),
+    )
+
+    id: Optional[int] = Field(default=None, sa_column=Column(BigInteger, primary_key=True, autoincrement=True))
+    user_id: int = Field(foreign_key="user.id")
+    kind: str = Field(max_length=16)
+    amount: float = Field(sa_column=Column(DECIMAL(precision=10, scale=2), nullable=False))
+    tx_hash: str = Field(max_length=66)
+    log_index: int
+    block_number: int
+    materialized: bool = Field(default=False, sa_column_kwargs={"server_default": text("false")})
+    created_at: Optional[datetime] = Field(sa_column=Column(
+        TIMESTAMP(timezone=True),
+        nullable=True,
+        server_default=text("CURRENT_TIMESTAMP"),
+    ))
@@ -1,6 +1,7 @@
 from datetime import datetime
 from typing import Optional, List
 
+from sqlalchemy import Index
 from sqlmodel import (
     Column, SQLModel, Field, Relationship, TIMESTAMP, text, DECIMAL, UniqueConstraint
 )
@@ -79,6 +80,12 @@ class Prediction(SQLModel, table=True):
 
 
 class Opponent(SQLModel, table=True):
+    # A back is identified by its prediction and the `Backed` log registering it;
+    # backs recorded before logs were tracked have no `tx_hash` and never collide
+    __table_args__ = (
+        Index("uq_opponent_back", "prediction_id", "tx_hash", "log_index", unique=True),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     prediction_id: int = Field(foreign_key="prediction.id")
     match_id: int = Field(index=True)
@@ -89,6 +96,8 @@ class Opponent(SQLModel, table=True):
     )
     result: int = Field(index=True)
     block_number: int = Field(index=True)
+    tx_hash: Optional[str] = Field(default=None, max_length=66)
+    log_index: Optional[int] = Field(default=None)
     created_at: Optional[datetime] = Field(sa_column=Column(
         TIMESTAMP(timezone=True),
         nullable=True,
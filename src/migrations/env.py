@@ -11,6 +11,7 @@ from app.models.user import User, Prediction, Opponent
 from app.models.games import Game
 from app.models.rate_limit import RateLimit
 from app.models.job import Job
+from app.models.events import ProcessedEvent, BalanceLedger
 from app.core.db.token_blacklist import TokenBlacklist
 
 # this is the Alembic Config object, which provides
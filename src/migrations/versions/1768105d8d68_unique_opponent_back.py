@@ -0,0 +1,55 @@
+"""Unique opponent back
+
+Revision ID: 1768105d8d68
+Revises: 8dc376b7bb33
+Create Date: 2026-10-18 10:12:44.318205
+
+"""
+from typing import Sequence, Union
+
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1768105d8d68'
+down_revision: Union[str, None] = '8dc376b7bb33'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('opponent', sa.Column('tx_hash', sqlmodel.sql.sqltypes.AutoString(length=66), nullable=True))
+    op.add_column('opponent', sa.Column('log_index', sa.Integer(), nullable=True))
+
+    # Existing backs have no log recorded and cannot be told apart reliably: the ones
+    # looking registered twice are only reported, for an operator to reconcile
+    suspects = op.get_bind().execute(sa.text("""
+    SELECT prediction_id, opponent_address, block_number, count(*) AS copies
+    FROM opponent
+    GROUP BY prediction_id, opponent_address, block_number, opponent_wager
+    HAVING count(*) > 1
+    """)).all()
+    for row in suspects:
+        logger.warning(
+            f"Possible duplicate back: prediction {row.prediction_id}, backer {row.opponent_address}, "
+            f"block {row.block_number} ({row.copies} rows)"
+        )
+
+    op.create_index(
+        'uq_opponent_back',
+        'opponent',
+        ['prediction_id', 'tx_hash', 'log_index'],
+        unique=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_opponent_back', table_name='opponent')
+    op.drop_column('opponent', 'log_index')
+    op.drop_column('opponent', 'tx_hash')
@@ -0,0 +1,40 @@
+"""Processed event ledger
+
+Revision ID: 73d23831fbff
+Revises: 1768105d8d68
+Create Date: 2026-10-18 11:02:17.640913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '73d23831fbff'
+down_revision: Union[str, None] = '1768105d8d68'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'processed_event',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('chain', sqlmodel.sql.sqltypes.AutoString(length=32), nullable=False),
+        sa.Column('tx_hash', sqlmodel.sql.sqltypes.AutoString(length=66), nullable=False),
+        sa.Column('log_index', sa.Integer(), nullable=False),
+        sa.Column('block_number', sa.Integer(), nullable=False),
+        sa.Column('event', sqlmodel.sql.sqltypes.AutoString(length=64), nullable=False),
+        sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('chain', 'tx_hash', 'log_index', name='uq_processed_event_log')
+    )
+    op.create_index(op.f('ix_processed_event_block_number'), 'processed_event', ['block_number'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_processed_event_block_number'), table_name='processed_event')
+    op.drop_table('processed_event')
@@ -0,0 +1,46 @@
+"""Balance ledger
+
+Revision ID: b4e1f07c9a52
+Revises: 73d23831fbff
+Create Date: 2026-10-18 13:26:41.208374
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4e1f07c9a52'
+down_revision: Union[str, None] = '73d23831fbff'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'balance_ledger',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('kind', sqlmodel.sql.sqltypes.AutoString(length=16), nullable=False),
+        sa.Column('amount', sa.DECIMAL(precision=10, scale=2), nullable=False),
+        sa.Column('tx_hash', sqlmodel.sql.sqltypes.AutoString(length=66), nullable=False),
+        sa.Column('log_index', sa.Integer(), nullable=False),
+        sa.Column('block_number', sa.Integer(), nullable=False),
+        sa.Column('materialized', sa.Boolean(), server_default=sa.text('false'), nullable=False),
+        sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_balance_ledger_pending', 'balance_ledger', ['id'], unique=False, postgresql_where=sa.text('NOT materialized'))
+    op.create_index('ix_balance_ledger_pending_user', 'balance_ledger', ['user_id', 'id'], unique=False, postgresql_where=sa.text('NOT materialized'))
+    op.create_index('ix_balance_ledger_user_position', 'balance_ledger', ['user_id', 'block_number', 'log_index'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_balance_ledger_user_position', table_name='balance_ledger')
+    op.drop_index('ix_balance_ledger_pending_user', table_name='balance_ledger', postgresql_where=sa.text('NOT materialized'))
+    op.drop_index('ix_balance_ledger_pending', table_name='balance_ledger', postgresql_where=sa.text('NOT materialized'))
+    op.drop_table('balance_ledger')
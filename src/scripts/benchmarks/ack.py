@@ -0,0 +1,99 @@
+"""
+Acknowledgement cost as the in-processing backlog grows: `LREM` on one shared list
+vs the per-consumer in-flight hash of `ListTransport`.
+
+Each run leaves `--backlog` entries unacknowledged (as failed handlers used to), then
+times acknowledging `--acks` more. Also checks that the reaper puts entries past
+their visibility timeout back on the queue, oldest first.
+
+Usage (from `src/`):
+    python -m scripts.benchmarks.ack --backlog 0 1000 10000 50000 --acks 1000
+"""
+import argparse
+import asyncio
+import time
+from typing import List
+
+from redis.asyncio import Redis
+
+from app.core.config import settings
+from app.core.web3_services.codec import encode_log
+from app.core.web3_services.transport import ListTransport
+from scripts.benchmarks.fixtures import SAMPLE_HANDLER, sample_payload
+
+BENCH_QUEUE = "bench_ack_queue"
+BENCH_INPROCESS_QUEUE = "bench_ack_inprocess"
+
+
+async def reset(redis: Redis) -> None:
+    await redis.delete(BENCH_QUEUE, *await redis.keys(f"{BENCH_INPROCESS_QUEUE}*"))
+
+
+async def fill(redis: Redis, logs: List[bytes]) -> None:
+    for i in range(0, len(logs), 1000):
+        await redis.rpush(BENCH_QUEUE, *logs[i:i + 1000])
+
+
+async def lrem_ack(redis: Redis, logs: List[bytes], backlog: int) -> float:
+    """Previous behaviour: entries moved into one list, acknowledged with `LREM`."""
+    await reset(redis)
+    await fill(redis, logs)
+    for _ in logs:
+        await redis.lmove(BENCH_QUEUE, BENCH_INPROCESS_QUEUE)
+
+    start = time.perf_counter()
+    for log in logs[backlog:]:
+        await redis.lrem(BENCH_INPROCESS_QUEUE, 0, log)
+    return time.perf_counter() - start
+
+
+async def inflight_ack(redis: Redis, logs: List[bytes], backlog: int) -> float:
+    await reset(redis)
+    await fill(redis, logs)
+    transport = ListTransport(redis, BENCH_QUEUE, BENCH_INPROCESS_QUEUE, "bench")
+    entries = []
+    while len(entries) < len(logs):
+        entries.extend(await transport.read(settings.INGEST_READ_COUNT, 100))
+
+    start = time.perf_counter()
+    for entry_id, _ in entries[backlog:]:
+        await transport.ack([entry_id])
+    elapsed = time.perf_counter() - start
+    assert await transport.inflight() == backlog
+    return elapsed
+
+
+async def check_reaper(redis: Redis, logs: List[bytes]) -> None:
+    await reset(redis)
+    await fill(redis, logs)
+    transport = ListTransport(redis, BENCH_QUEUE, BENCH_INPROCESS_QUEUE, "bench", visibility_timeout_ms=200)
+    entries = await transport.read(len(logs), 100)
+    await transport.ack([entry_id for entry_id, _ in entries[1::2]])
+
+    await asyncio.sleep(0.3)
+    assert await transport._reap() == len(entries[::2]), "unacknowledged entries were not reaped"
+    assert await redis.lrange(BENCH_QUEUE, 0, -1) == [log for _, log in entries[::2]], "reaped out of order"
+    assert await transport.inflight() == 0
+
+
+async def main(backlogs: List[int], acks: int) -> None:
+    redis = Redis(host=settings.REDIS_QUEUE_HOST, port=settings.REDIS_QUEUE_PORT, db=0)
+    try:
+        await check_reaper(redis, [encode_log(SAMPLE_HANDLER, sample_payload(i)["result"]) for i in range(100)])
+        print(f"{'backlog':>10}{'LREM µs/ack':>14}{'HDEL µs/ack':>14}")
+        for backlog in backlogs:
+            logs = [encode_log(SAMPLE_HANDLER, sample_payload(i)["result"]) for i in range(backlog + acks)]
+            before = await lrem_ack(redis, logs, backlog)
+            after = await inflight_ack(redis, logs, backlog)
+            print(f"{backlog:>10}{before / acks * 1e6:>14.0f}{after / acks * 1e6:>14.0f}")
+    finally:
+        await reset(redis)
+        await redis.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backlog", type=int, nargs="+", default=[0, 1_000, 10_000, 50_000])
+    parser.add_argument("--acks", type=int, default=1_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.backlog, args.acks))
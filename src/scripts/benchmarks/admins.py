@@ -0,0 +1,91 @@
+"""
+Admin email lookups per alert: `get_admin_emails` querying `"user"` on every call, as
+before the admin cache, vs `admin_email_cache` (in-process, shared through Redis).
+An invalidation halfway through, like an `AdminAdded` event, must be picked up.
+
+Runs against the configured Postgres and queue Redis, on benchmark admins created
+under random addresses and deleted afterwards.
+
+Usage (from `src/`):
+    python -m scripts.benchmarks.admins --alerts 5000
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from sqlalchemy import event, text
+
+from app.core.db.database import async_engine, local_session
+from app.core.utils.redis_queue import close_queue_redis
+from app.core.web3_services.admins import admin_email_cache, invalidate_admin_emails
+from app.core.web3_services.arbitrum_one.handlers.helper import get_admin_emails
+from app.schemas.users import QuickAdminRead
+
+
+class SelectCounter:
+    """Counts the statements reading the `"user"` table."""
+
+    def __init__(self):
+        self.count = 0
+        event.listen(async_engine.sync_engine, "before_cursor_execute", self)
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        if statement.lstrip().upper().startswith("SELECT") and '"user"' in statement:
+            self.count += 1
+
+
+async def lookups(alerts: int, cached: bool, counter: SelectCounter, added: str) -> tuple:
+    counter.count = 0
+    start = time.perf_counter()
+    async with local_session() as db:
+        for i in range(alerts):
+            if not cached:
+                admin_email_cache.clear()
+            if i == alerts // 2:
+                await db.execute(text('UPDATE "user" SET is_admin = true WHERE public_address = :address'), {"address": added})
+                await db.commit()
+                await invalidate_admin_emails()
+            emails = await get_admin_emails(db, QuickAdminRead)
+        assert f"{added}@bench" in emails, "the new admin was not picked up"
+    return counter.count, time.perf_counter() - start
+
+
+async def main(alerts: int) -> None:
+    admins = ["0x" + os.urandom(20).hex() for _ in range(3)]
+    counter = SelectCounter()
+
+    async with async_engine.begin() as conn:
+        await conn.execute(
+            text('INSERT INTO "user" (public_address, nonce, email, balance, prev_block_number, latest_block_number, '
+                 'is_superuser, is_admin) SELECT a, \'bench\', a || \'@bench\', 0, 0, 0, false, a <> :added '
+                 'FROM unnest(CAST(:addresses AS varchar[])) AS a'),
+            {"addresses": admins, "added": admins[-1]}
+        )
+    try:
+        await invalidate_admin_emails()
+        before, before_time = await lookups(alerts, False, counter, admins[-1])
+
+        async with async_engine.begin() as conn:
+            await conn.execute(text('UPDATE "user" SET is_admin = false WHERE public_address = :address'), {"address": admins[-1]})
+        await invalidate_admin_emails()
+        after, after_time = await lookups(alerts, True, counter, admins[-1])
+    finally:
+        async with async_engine.begin() as conn:
+            await conn.execute(text('DELETE FROM "user" WHERE public_address = ANY(:addresses)'), {"addresses": admins})
+        await invalidate_admin_emails()
+        await close_queue_redis()
+        await async_engine.dispose()
+
+    print(f"{'':20}{'per alert':>12}{'cached':>12}")
+    print(f"{'user SELECTs':20}{before:>12}{after:>12}")
+    print(f"{'lookups/s':20}{alerts / before_time:>12.0f}{alerts / after_time:>12.0f}")
+    print(f"cache: {admin_email_cache.stats()}")
+    print("new admin picked up after invalidation")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--alerts", type=int, default=5_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.alerts))
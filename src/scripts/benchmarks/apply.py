@@ -0,0 +1,134 @@
+"""
+Events/s applying queued logs with one commit per event vs one commit per block.
+
+Runs the real BatchProcessor against the configured Redis and Postgres. The stub
+handler writes like the USDTv1 handlers do: an insert and an atomic increment.
+Every `--fail-every`th event raises after writing, so its savepoint must be rolled
+back and dead-lettered. Each run checks that exactly the successful events were
+persisted.
+
+Usage (from `src/`):
+    python -m scripts.benchmarks.apply --blocks 200 --per-block 10
+"""
+import argparse
+import asyncio
+import time
+from typing import List
+
+from redis.asyncio import Redis
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.db.database import async_engine
+from app.core.web3_services.codec import encode_log
+from app.core.web3_services.deadletter import DeadLetterQueue
+from app.core.web3_services.processor import BatchProcessor
+from app.core.web3_services.registry import register_handler
+from scripts.benchmarks.fixtures import sample_payload
+
+BENCH_QUEUE = "bench_apply_queue"
+BENCH_INPROCESS_QUEUE = "bench_apply_inprocess"
+BENCH_HANDLER = "bench_apply"
+BENCH_DEAD_LETTERS = "bench_apply_dlq"
+
+
+class StubHandler:
+    def __init__(self, fail_every: int, expected: int):
+        self.fail_every = fail_every
+        self.expected = expected
+        self.count = 0
+        self.done = asyncio.Event()
+
+    async def __call__(self, message, db) -> None:
+        log = message["result"]
+        try:
+            await db.execute(
+                text("INSERT INTO bench_apply_event (block_number, log_index) VALUES (:block, :index)"),
+                {"block": log["blockNumber"], "index": log["logIndex"]}
+            )
+            await db.execute(text("UPDATE bench_apply_total SET events = events + 1"))
+            if self.fail_every and log["logIndex"] % self.fail_every == self.fail_every - 1:
+                raise RuntimeError("simulated handler failure")
+        finally:
+            self.count += 1
+            if self.count >= self.expected:
+                self.done.set()
+
+
+def sample_logs(blocks: int, per_block: int) -> List[bytes]:
+    logs = []
+    for i in range(blocks * per_block):
+        log = dict(sample_payload(i)["result"])
+        log["blockNumber"], log["logIndex"] = i // per_block, i
+        logs.append(encode_log(BENCH_HANDLER, log))
+    return logs
+
+
+async def reset_tables() -> None:
+    async with async_engine.begin() as conn:
+        await conn.execute(text("DROP TABLE IF EXISTS bench_apply_event, bench_apply_total"))
+        await conn.execute(text("CREATE TABLE bench_apply_event (id serial PRIMARY KEY, block_number bigint, log_index int)"))
+        await conn.execute(text("CREATE TABLE bench_apply_total (events bigint NOT NULL)"))
+        await conn.execute(text("INSERT INTO bench_apply_total VALUES (0)"))
+
+
+async def persisted() -> tuple:
+    async with async_engine.connect() as conn:
+        rows = (await conn.execute(text("SELECT count(*) FROM bench_apply_event"))).scalar_one()
+        total = (await conn.execute(text("SELECT events FROM bench_apply_total"))).scalar_one()
+    return rows, total
+
+
+async def run(redis: Redis, logs: List[bytes], group_by_block: bool, fail_every: int) -> float:
+    await reset_tables()
+    await redis.delete(BENCH_QUEUE, *await redis.keys(f"{BENCH_INPROCESS_QUEUE}*"), *await redis.keys(f"{BENCH_DEAD_LETTERS}*"))
+    for i in range(0, len(logs), 1000):
+        await redis.rpush(BENCH_QUEUE, *logs[i:i + 1000])
+
+    handler = StubHandler(fail_every, len(logs))
+    register_handler(BENCH_HANDLER, handler.__call__)
+    processor = BatchProcessor(BENCH_QUEUE, BENCH_INPROCESS_QUEUE, redis, pool_size=1, group_by_block=group_by_block)
+    # Retries are pushed past the end of the run, so every event is applied once
+    processor.dead_letters = DeadLetterQueue(redis, prefix=BENCH_DEAD_LETTERS, base_delay_ms=3_600_000)
+
+    start = time.perf_counter()
+    task = asyncio.create_task(processor.batch_process_logs())
+    await handler.done.wait()
+    # The last group commits after its final handler returned
+    await asyncio.gather(*(partition.join() for partition in processor.partitions))
+    elapsed = time.perf_counter() - start
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    failures = len(logs) // fail_every if fail_every else 0
+    assert await persisted() == (len(logs) - failures, len(logs) - failures), "failed events leaked writes"
+    assert (await processor.dead_letters.stats())["retrying"] == failures, "failed events were not dead-lettered"
+    return elapsed
+
+
+async def main(blocks: int, per_block: int, fail_every: int) -> None:
+    redis = Redis(host=settings.REDIS_QUEUE_HOST, port=settings.REDIS_QUEUE_PORT, db=0)
+    logs = sample_logs(blocks, per_block)
+    try:
+        per_event = await run(redis, logs, False, fail_every)
+        per_block_time = await run(redis, logs, True, fail_every)
+    finally:
+        await redis.delete(BENCH_QUEUE, *await redis.keys(f"{BENCH_INPROCESS_QUEUE}*"), *await redis.keys(f"{BENCH_DEAD_LETTERS}*"))
+        await redis.aclose()
+        async with async_engine.begin() as conn:
+            await conn.execute(text("DROP TABLE IF EXISTS bench_apply_event, bench_apply_total"))
+        await async_engine.dispose()
+
+    print(f"{'':16}{'per event':>12}{'per block':>12}")
+    print(f"{'events/s':16}{len(logs) / per_event:>12.0f}{len(logs) / per_block_time:>12.0f}")
+    print(f"{'commits':16}{len(logs):>12}{blocks:>12}")
+    print(f"block-grouped apply is {per_event / per_block_time:.1f}x faster")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--blocks", type=int, default=200)
+    parser.add_argument("--per-block", type=int, default=10)
+    parser.add_argument("--fail-every", type=int, default=25, help="0 disables simulated failures")
+    args = parser.parse_args()
+    asyncio.run(main(args.blocks, args.per_block, args.fail_every))
@@ -0,0 +1,181 @@
+"""
+Per-event latency of the `Backed` handler: the previous four round-trips (duplicate
+check, prediction lookup, opponent insert, `UPDATE prediction`) vs the single CTE
+statement.
+
+Runs against the configured Postgres (migrated to head): a benchmark user and its
+predictions are created under a random contract address and deleted afterwards.
+Every event is committed on its own, like the `event` apply mode. Both runs must
+leave identical opponents and prediction totals; duplicates are replayed too, and
+rejected by `uq_opponent_back` since the handler runs without the ledger here.
+
+Usage (from `src/`):
+    python -m scripts.benchmarks.backs --predictions 200 --backs 2000
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import time
+from typing import Any, Dict, List
+
+from sqlalchemy import text
+
+from app.core.db.database import async_engine, local_session
+from app.crud.crud_opponent import crud_opponent
+from app.crud.crud_predictions import crud_predictions
+from app.schemas.opponents import OpponentCreate, QuickOppRead
+from app.schemas.predictions import QuickPredRead
+from app.core.web3_services.arbitrum_one.event_topics import usdtv1_event_decoders
+from app.core.web3_services.arbitrum_one.handlers.helper import generate_unique_id, usdt_to_decimal
+from app.core.web3_services.arbitrum_one.handlers.usdtv1 import process_usdtv1_backs
+
+Backed = usdtv1_event_decoders()["Backed"]
+
+
+async def four_round_trips(payload, db, event) -> None:
+    """The handler as it was, minus logging."""
+    contract_address = payload['address'].lower()
+    opponent = await crud_opponent.get(
+        db=db, schema_to_select=QuickOppRead, match_id=event.game_id, prediction_index=event.prediction_id,
+        opponent_address=event.backer, block_number=payload['blockNumber']
+    )
+    if opponent:
+        raise Exception("Back already registered!")
+    pred = await crud_predictions.get(
+        db=db, schema_to_select=QuickPredRead,
+        hash_identifier=generate_unique_id(event.prediction_id, event.game_id, contract_address)
+    )
+    if pred is None:
+        raise Exception("No prediction")
+    amount = usdt_to_decimal(event.amount)
+    await crud_opponent.create(db, OpponentCreate(
+        prediction_id=pred['id'], match_id=event.game_id, prediction_index=event.prediction_id,
+        opponent_address=event.backer, opponent_wager=amount, result=event.result, block_number=payload['blockNumber']
+    ), commit=False)
+    await db.execute(text("""
+    UPDATE prediction
+    SET total_opponent_wager = total_opponent_wager + :amount,
+        f_matched = CASE WHEN total_opponent_wager + :amount >= amount THEN true ELSE f_matched END,
+        p_matched = true
+    WHERE index = :bet_id AND match_id = :gameid AND contract_address = :contract_address
+    RETURNING total_opponent_wager
+    """), {"amount": amount, "bet_id": event.prediction_id, "gameid": event.game_id, "contract_address": contract_address})
+
+
+def sample_backs(contract: str, predictions: int, backs: int) -> List[tuple]:
+    """(payload, event) pairs; every 20th back replays an earlier one."""
+    events = []
+    for i in range(backs):
+        if i and i % 20 == 0:
+            events.append(random.choice(events))
+            continue
+        bet_id = random.randrange(predictions)
+        backer = "0x" + os.urandom(20).hex()
+        event = Backed(bet_id, backer, bet_id % 50 + 1, random.randint(1, 50) * 10 ** 6, 2)
+        events.append((
+            {"address": contract, "blockNumber": i + 1, "transactionHash": os.urandom(32), "logIndex": 0}, event
+        ))
+    return events
+
+
+async def setup(contract: str, predictions: int) -> str:
+    address = "0x" + os.urandom(20).hex()
+    async with async_engine.begin() as conn:
+        user_id = (await conn.execute(text(
+            'INSERT INTO "user" (public_address, nonce, balance, prev_block_number, latest_block_number, '
+            "is_superuser, is_admin) VALUES (:address, 'bench', 0, 0, 0, false, false) RETURNING id"
+        ), {"address": address})).scalar_one()
+        await conn.execute(text(
+            "INSERT INTO prediction (user_id, index, layer, hash_identifier, contract_address, match_id, result, amount, "
+            "settled, total_opponent_wager, f_matched, p_matched, for_sale, sold, price) "
+            "VALUES (:user_id, :index, :layer, :hash, :contract, :match_id, 1, 1000, false, 0, false, false, false, false, 0)"
+        ), [
+            {"user_id": user_id, "index": bet_id, "layer": address, "contract": contract, "match_id": bet_id % 50 + 1,
+             "hash": generate_unique_id(bet_id, bet_id % 50 + 1, contract)}
+            for bet_id in range(predictions)
+        ])
+    return address
+
+
+async def snapshot(contract: str) -> tuple:
+    async with async_engine.connect() as conn:
+        predictions = (await conn.execute(text(
+            "SELECT hash_identifier, total_opponent_wager, f_matched, p_matched FROM prediction "
+            "WHERE contract_address = :contract ORDER BY hash_identifier"
+        ), {"contract": contract})).all()
+        opponents = (await conn.execute(text(
+            "SELECT o.match_id, o.prediction_index, o.opponent_address, o.block_number, o.opponent_wager "
+            "FROM opponent o JOIN prediction p ON p.id = o.prediction_id WHERE p.contract_address = :contract "
+            "ORDER BY 1, 2, 3, 4"
+        ), {"contract": contract})).all()
+    return tuple(predictions), tuple(opponents)
+
+
+async def reset(contract: str) -> None:
+    async with async_engine.begin() as conn:
+        await conn.execute(text(
+            "DELETE FROM opponent WHERE prediction_id IN (SELECT id FROM prediction WHERE contract_address = :contract)"
+        ), {"contract": contract})
+        await conn.execute(text(
+            "UPDATE prediction SET total_opponent_wager = 0, f_matched = false, p_matched = false "
+            "WHERE contract_address = :contract"
+        ), {"contract": contract})
+
+
+async def run(handler, events: List[tuple]) -> List[float]:
+    latencies = []
+    async with local_session() as db:
+        for payload, event in events:
+            start = time.perf_counter()
+            try:
+                await handler(payload, db, event)
+                await db.commit()
+            except Exception:
+                # Duplicates: rejected by both
+                await db.rollback()
+            latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def summary(latencies: List[float]) -> Dict[str, Any]:
+    ordered = sorted(latencies)
+    return {
+        "mean": statistics.fmean(ordered),
+        "p50": ordered[len(ordered) // 2],
+        "p95": ordered[int(len(ordered) * 0.95)],
+        "p99": ordered[int(len(ordered) * 0.99)],
+    }
+
+
+async def main(predictions: int, backs: int) -> None:
+    contract = "0x" + os.urandom(20).hex()
+    events = sample_backs(contract, predictions, backs)
+    address = await setup(contract, predictions)
+    try:
+        before = summary(await run(four_round_trips, events))
+        expected = await snapshot(contract)
+        await reset(contract)
+
+        after = summary(await run(process_usdtv1_backs, events))
+        assert await snapshot(contract) == expected, "single statement left different rows than four round-trips"
+    finally:
+        await reset(contract)
+        async with async_engine.begin() as conn:
+            await conn.execute(text("DELETE FROM prediction WHERE contract_address = :contract"), {"contract": contract})
+            await conn.execute(text('DELETE FROM "user" WHERE public_address = :address'), {"address": address})
+        await async_engine.dispose()
+
+    print(f"{'ms / event':12}{'4 round-trips':>15}{'1 statement':>13}")
+    for stat in before:
+        print(f"{stat:12}{before[stat]:>15.3f}{after[stat]:>13.3f}")
+    print(f"mean latency {before['mean'] / after['mean']:.1f}x lower over {len(events)} backs; rows match")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--predictions", type=int, default=200)
+    parser.add_argument("--backs", type=int, default=2_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.predictions, args.backs))
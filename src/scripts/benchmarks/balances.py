@@ -0,0 +1,119 @@
+"""
+Deposit throughput on a few hot users: `--consumers` concurrent consumers commit every
+deposit on its own, either as an `UPDATE "user" SET balance = balance + ...` (every
+consumer queues on the same user rows) or as an append to `balance_ledger`, folded
+into `user.balance` afterwards by `BalanceMaterializer`.
+
+Runs against the configured Postgres (migrated to head), on benchmark users created
+under random addresses and deleted afterwards. Both runs must leave the same balances.
+
+Usage (from `src/`):
+    python -m scripts.benchmarks.balances --deposits 5000 --users 5 --consumers 8
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+from decimal import Decimal
+from typing import Dict, List, Tuple
+
+from hexbytes import HexBytes
+from sqlalchemy import text
+
+from app.core.db.database import async_engine, local_session
+from app.core.web3_services.balances import DEPOSIT, BalanceMaterializer, record_movement
+
+# What the deposit handler ran before the ledger
+_UPDATE_QUERY = text("""
+UPDATE "user"
+SET balance = balance + :amount,
+    prev_block_number = CASE WHEN :block_number > latest_block_number
+                             THEN latest_block_number ELSE prev_block_number END,
+    latest_block_number = GREATEST(latest_block_number, :block_number)
+WHERE id = :user_id
+""")
+
+Deposit = Tuple[int, Decimal, int]
+
+
+async def update_rows(deposits: List[Deposit]) -> None:
+    async with local_session() as db:
+        for user_id, amount, block in deposits:
+            await db.execute(_UPDATE_QUERY, {"user_id": user_id, "amount": amount, "block_number": block})
+            await db.commit()
+
+
+async def append_ledger(deposits: List[Deposit]) -> None:
+    async with local_session() as db:
+        for user_id, amount, block in deposits:
+            log = {"transactionHash": HexBytes(os.urandom(32)), "logIndex": 0, "blockNumber": block}
+            await record_movement(db, user_id, DEPOSIT, amount, log)
+            await db.commit()
+
+
+async def run(apply, deposits: List[Deposit], consumers: int) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(*(apply(deposits[i::consumers]) for i in range(consumers)))
+    return time.perf_counter() - start
+
+
+async def balances(users: List[str]) -> Dict[str, Decimal]:
+    async with async_engine.connect() as conn:
+        return dict((await conn.execute(
+            text('SELECT public_address, balance FROM "user" WHERE public_address = ANY(:addresses)'),
+            {"addresses": users}
+        )).all())
+
+
+async def reset(users: List[str]) -> None:
+    async with async_engine.begin() as conn:
+        await conn.execute(text(
+            'DELETE FROM balance_ledger WHERE user_id IN (SELECT id FROM "user" WHERE public_address = ANY(:addresses))'
+        ), {"addresses": users})
+        await conn.execute(text(
+            'UPDATE "user" SET balance = 0, prev_block_number = 0, latest_block_number = 0 '
+            'WHERE public_address = ANY(:addresses)'
+        ), {"addresses": users})
+
+
+async def main(deposits_count: int, users_count: int, consumers: int) -> None:
+    users = ["0x" + os.urandom(20).hex() for _ in range(users_count)]
+    async with async_engine.begin() as conn:
+        ids = list((await conn.execute(
+            text('INSERT INTO "user" (public_address, nonce, balance, prev_block_number, latest_block_number, '
+                 'is_superuser, is_admin) SELECT unnest(CAST(:addresses AS varchar[])), \'bench\', 0, 0, 0, false, false '
+                 'RETURNING id'),
+            {"addresses": users}
+        )).scalars())
+    deposits = [(random.choice(ids), Decimal(random.randint(1, 1_000)), i + 1) for i in range(deposits_count)]
+    try:
+        updated = await run(update_rows, deposits, consumers)
+        expected = await balances(users)
+        await reset(users)
+
+        appended = await run(append_ledger, deposits, consumers)
+        start = time.perf_counter()
+        await BalanceMaterializer().fold_all()
+        folded = time.perf_counter() - start
+        assert await balances(users) == expected, "folded balances differ from the row updates"
+    finally:
+        await reset(users)
+        async with async_engine.begin() as conn:
+            await conn.execute(text('DELETE FROM "user" WHERE public_address = ANY(:addresses)'), {"addresses": users})
+        await async_engine.dispose()
+
+    print(f"{deposits_count} deposits on {users_count} users by {consumers} consumers")
+    print(f"{'row updates':20}{deposits_count / updated:>10.0f} deposits/s")
+    print(f"{'ledger appends':20}{deposits_count / appended:>10.0f} deposits/s")
+    print(f"{'ledger fold':20}{deposits_count / folded:>10.0f} deposits/s")
+    print("balances match")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--deposits", type=int, default=5_000)
+    parser.add_argument("--users", type=int, default=5)
+    parser.add_argument("--consumers", type=int, default=8)
+    args = parser.parse_args()
+    asyncio.run(main(args.deposits, args.users, args.consumers))
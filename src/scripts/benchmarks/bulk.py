@@ -0,0 +1,144 @@
+"""
+Replay throughput of `Predicted`/`Backed` logs: one handler call and one commit per
+event (the `event` apply mode) vs the set-based bulk applier used for backfilled logs.
+
+Runs against the configured Postgres: benchmark users, predictions, opponents and
+ledger entries are created under a random contract address and deleted afterwards. Both runs must leave
+identical predictions, opponents and aggregated `total_opponent_wager`.
+
+Usage (from `src/`):
+    python -m scripts.benchmarks.bulk --predictions 2000 --backs 4 --group 500
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+from typing import Any, Dict, List
+
+from eth_abi import encode
+from hexbytes import HexBytes
+from sqlalchemy import text
+
+from app.core.db.database import async_engine, local_session
+from app.core.web3_services.transaction import defer_commits
+from app.core.web3_services.arbitrum_one.callbacks import (
+    bulk_apply_arbitrum_logs,
+    process_arbitrum_callbacklogs,
+    usdtv1_dispatch_table
+)
+from app.core.web3_services.arbitrum_one.event_topics import usdtv1_event_topics_dict
+
+
+def sample_messages(contract: str, users: List[str], predictions: int, backs: int) -> List[Dict[str, Any]]:
+    """A lay per prediction, each followed (a few blocks later) by `backs` backs."""
+    topics = usdtv1_event_topics_dict()
+    messages, block = [], 1
+    for bet_id in range(predictions):
+        game_id = bet_id % 50 + 1
+        amount = random.randint(10, 1_000) * 10 ** 6
+        lay = [HexBytes(topics["Predicted"]), encode(["uint256"], [bet_id]), encode(["address"], [random.choice(users)]),
+               encode(["uint256"], [game_id])]
+        messages.append(_message(contract, lay, encode(["uint256", "uint256"], [amount, 1]), block))
+        for _ in range(backs):
+            block += 1
+            back = [HexBytes(topics["Backed"]), encode(["uint256"], [bet_id]), encode(["address"], [random.choice(users)]),
+                    encode(["uint256"], [game_id])]
+            wager = random.randint(1, amount // 10 ** 6 // backs + 1) * 10 ** 6
+            messages.append(_message(contract, back, encode(["uint256", "uint256"], [wager, 2]), block))
+    return messages
+
+
+def _message(contract: str, topics, data: bytes, block: int) -> Dict[str, Any]:
+    return {"handler": "usdtv1_arb", "result": {
+        "address": contract, "topics": [HexBytes(t) for t in topics], "data": HexBytes(data),
+        "blockNumber": block, "logIndex": 0, "transactionHash": HexBytes(os.urandom(32))
+    }}
+
+
+async def snapshot(contract: str) -> tuple:
+    async with async_engine.connect() as conn:
+        predictions = (await conn.execute(text(
+            "SELECT hash_identifier, total_opponent_wager, f_matched, p_matched FROM prediction "
+            "WHERE contract_address = :contract ORDER BY hash_identifier"
+        ), {"contract": contract})).all()
+        opponents = (await conn.execute(text(
+            "SELECT o.match_id, o.prediction_index, o.opponent_address, o.block_number, o.opponent_wager "
+            "FROM opponent o JOIN prediction p ON p.id = o.prediction_id WHERE p.contract_address = :contract "
+            "ORDER BY 1, 2, 3, 4"
+        ), {"contract": contract})).all()
+    return tuple(predictions), tuple(opponents)
+
+
+async def clear(contract: str, messages: List[Dict[str, Any]]) -> None:
+    """Deletes the benchmark rows, and the ledger entries that would make the next run skip every log."""
+    async with async_engine.begin() as conn:
+        await conn.execute(text("DELETE FROM processed_event WHERE tx_hash = ANY(:hashes)"), {
+            "hashes": ["0x" + bytes(m["result"]["transactionHash"]).hex() for m in messages]
+        })
+        await conn.execute(text(
+            "DELETE FROM opponent WHERE prediction_id IN (SELECT id FROM prediction WHERE contract_address = :contract)"
+        ), {"contract": contract})
+        await conn.execute(text("DELETE FROM prediction WHERE contract_address = :contract"), {"contract": contract})
+
+
+async def per_event(messages: List[Dict[str, Any]]) -> float:
+    start = time.perf_counter()
+    async with local_session() as db:
+        for message in messages:
+            await process_arbitrum_callbacklogs(message, db)
+            await db.commit()
+    return time.perf_counter() - start
+
+
+async def bulk(messages: List[Dict[str, Any]], group: int) -> float:
+    start = time.perf_counter()
+    async with local_session() as db:
+        for i in range(0, len(messages), group):
+            chunk = messages[i:i + group]
+            for position in await bulk_apply_arbitrum_logs(chunk, db):
+                await process_arbitrum_callbacklogs(chunk[position], db)
+            await db.commit()
+    return time.perf_counter() - start
+
+
+async def main(predictions: int, backs: int, group: int) -> None:
+    assert usdtv1_dispatch_table.route(usdtv1_event_topics_dict()["Backed"]).decoder is not None
+    defer_commits()
+    contract = "0x" + os.urandom(20).hex()
+    users = ["0x" + os.urandom(20).hex() for _ in range(200)]
+    messages = sample_messages(contract, users, predictions, backs)
+
+    async with async_engine.begin() as conn:
+        await conn.execute(
+            text('INSERT INTO "user" (public_address, nonce, balance, prev_block_number, latest_block_number, '
+                 'is_superuser, is_admin) SELECT unnest(CAST(:addresses AS varchar[])), \'bench\', 0, 0, 0, false, false'),
+            {"addresses": users}
+        )
+    try:
+        before = await per_event(messages)
+        expected = await snapshot(contract)
+        await clear(contract, messages)
+
+        after = await bulk(messages, group)
+        assert await snapshot(contract) == expected, "bulk apply left different rows than per-event apply"
+    finally:
+        await clear(contract, messages)
+        async with async_engine.begin() as conn:
+            await conn.execute(text('DELETE FROM "user" WHERE public_address = ANY(:addresses)'), {"addresses": users})
+        await async_engine.dispose()
+
+    count = len(messages)
+    print(f"{'':20}{'per event':>12}{'bulk':>12}")
+    print(f"{'events/s':20}{count / before:>12.0f}{count / after:>12.0f}")
+    print(f"{'1M events (min)':20}{1e6 / (count / before) / 60:>12.1f}{1e6 / (count / after) / 60:>12.1f}")
+    print(f"bulk apply is {before / after:.1f}x faster over {count} events; rows match")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--predictions", type=int, default=2_000)
+    parser.add_argument("--backs", type=int, default=4, help="backs per prediction")
+    parser.add_argument("--group", type=int, default=500, help="logs per bulk transaction")
+    args = parser.parse_args()
+    asyncio.run(main(args.predictions, args.backs, args.group))
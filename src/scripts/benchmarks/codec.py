@@ -0,0 +1,74 @@
+"""
+Encode/decode microbenchmarks for the queued log wire format, pickle vs compact codec,
+plus the Redis memory used per queued log.
+
+Usage (from `src/`):
+    python -m scripts.benchmarks.codec --logs 10000
+"""
+import argparse
+import asyncio
+import pickle
+import timeit
+
+from redis.asyncio import Redis
+
+from app.core.config import settings
+from app.core.web3_services.codec import encode_log, decode_message
+from scripts.benchmarks.fixtures import SAMPLE_HANDLER, sample_payload
+
+BENCH_QUEUE = "bench_codec_queue"
+
+
+def per_call_us(fn, arg, number: int) -> float:
+    return timeit.timeit(lambda: fn(arg), number=number) / number * 1e6
+
+
+async def redis_bytes_per_log(redis: Redis, entries) -> float:
+    """Returns `MEMORY USAGE` of a list holding `entries`, divided by the entry count."""
+    await redis.delete(BENCH_QUEUE)
+    try:
+        for i in range(0, len(entries), 1000):
+            await redis.rpush(BENCH_QUEUE, *entries[i:i + 1000])
+        usage = await redis.memory_usage(BENCH_QUEUE, samples=0)
+        return usage / len(entries)
+    finally:
+        await redis.delete(BENCH_QUEUE)
+
+
+async def main(count: int, number: int) -> None:
+    payloads = [sample_payload(i) for i in range(count)]
+    pickled = [pickle.dumps(p) for p in payloads]
+    encoded = [encode_log(SAMPLE_HANDLER, p["result"]) for p in payloads]
+
+    # Sanity check: the compact format round-trips every field handlers read
+    for payload, raw in zip(payloads, encoded):
+        message = decode_message(raw)
+        log, expected = message["result"], payload["result"]
+        assert message["handler"] == SAMPLE_HANDLER
+        assert log["address"] == expected["address"].lower()
+        assert log["topics"] == expected["topics"] and log["data"] == expected["data"]
+        assert log["blockNumber"] == expected["blockNumber"] and log["logIndex"] == expected["logIndex"]
+        assert log["transactionHash"] == expected["transactionHash"]
+
+    sample, sample_pickled, sample_encoded = payloads[0], pickled[0], encoded[0]
+    print(f"{'':16}{'pickle':>12}{'codec':>12}")
+    print(f"{'size (bytes)':16}{len(sample_pickled):>12}{len(sample_encoded):>12}")
+    print(f"{'encode (us)':16}{per_call_us(pickle.dumps, sample, number):>12.2f}{per_call_us(lambda p: encode_log(SAMPLE_HANDLER, p['result']), sample, number):>12.2f}")
+    print(f"{'decode (us)':16}{per_call_us(pickle.loads, sample_pickled, number):>12.2f}{per_call_us(decode_message, sample_encoded, number):>12.2f}")
+
+    redis = Redis(host=settings.REDIS_QUEUE_HOST, port=settings.REDIS_QUEUE_PORT, db=0)
+    try:
+        pickle_mem = await redis_bytes_per_log(redis, pickled)
+        codec_mem = await redis_bytes_per_log(redis, encoded)
+    finally:
+        await redis.aclose()
+    print(f"{'redis (B/log)':16}{pickle_mem:>12.1f}{codec_mem:>12.1f}")
+    print(f"redis memory per queued log reduced by {(1 - codec_mem / pickle_mem) * 100:.1f}%")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logs", type=int, default=10_000)
+    parser.add_argument("--number", type=int, default=20_000, help="iterations per microbenchmark")
+    args = parser.parse_args()
+    asyncio.run(main(args.logs, args.number))
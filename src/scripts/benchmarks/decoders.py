@@ -0,0 +1,136 @@
+"""
+Per-event decode cost: one `eth_abi.decode` call per topic plus one for `data` (as the
+handlers used to decode) vs the precompiled `__slots__` event decoders.
+
+Covers every event with a handler or a topic mapped for USDTv1, decoded with the ABI
+the dispatch table uses. Before timing, every decoder is checked against eth_abi on
+`--samples` random logs per event, including boundary values.
+
+Usage (from `src/`):
+    python -m scripts.benchmarks.decoders --iterations 20000
+"""
+import argparse
+import os
+import random
+import time
+from typing import Any, Callable, Dict, List, Mapping
+
+from eth_abi import decode, encode
+from hexbytes import HexBytes
+
+from app.core.web3_services.decoders import EventRecord
+from app.core.web3_services.utils import load_abi
+from app.core.web3_services.arbitrum_one.event_topics import (
+    USDTV1_ABI_PATH,
+    BALANCE_USDT_ABI_PATH,
+    GAMES_MANAGER,
+    usdtv1_event_decoders
+)
+from app.core.web3_services.arbitrum_one.handler import usdtv1_event_handlers
+
+ABI_PATHS = {"USDTv1": USDTV1_ABI_PATH, "UsdtManager": BALANCE_USDT_ABI_PATH, "GamesManager": GAMES_MANAGER}
+
+
+def event_abi(record: type[EventRecord]) -> Mapping[str, Any]:
+    """ABI entry a decoder was generated from, matched by signature."""
+    for path in ABI_PATHS.values():
+        for item in load_abi(path):
+            if item.get("type") != "event":
+                continue
+            signature = f"{item['name']}({','.join(i['type'] for i in item['inputs'])})"
+            if signature == record.signature and item["name"] == record.event:
+                return item
+    raise LookupError(record.signature)
+
+
+def random_value(abi_type: str, edge: bool) -> Any:
+    if abi_type == "address":
+        return "0x" + (bytes(20) if edge else os.urandom(20)).hex()
+    if abi_type == "bool":
+        return random.random() < 0.5
+    if abi_type.startswith("uint"):
+        bits = int(abi_type[4:] or 256)
+        return 2 ** bits - 1 if edge else random.getrandbits(bits)
+    if abi_type.startswith("int"):
+        bits = int(abi_type[3:] or 256)
+        return -(2 ** (bits - 1)) if edge else random.getrandbits(bits - 1) - 2 ** (bits - 2)
+    if abi_type.startswith("bytes"):
+        return os.urandom(int(abi_type[5:]))
+    raise ValueError(abi_type)
+
+
+def sample_log(abi: Mapping[str, Any], topic0: bytes, edge: bool = False) -> Dict[str, Any]:
+    inputs = abi["inputs"]
+    values = [random_value(i["type"], edge) for i in inputs]
+    indexed = [(i["type"], v) for i, v in zip(inputs, values) if i["indexed"]]
+    data = [(i["type"], v) for i, v in zip(inputs, values) if not i["indexed"]]
+    return {
+        "topics": [HexBytes(topic0)] + [HexBytes(encode([t], [v])) for t, v in indexed],
+        "data": HexBytes(encode([t for t, _ in data], [v for _, v in data])),
+    }
+
+
+def eth_abi_decoder(abi: Mapping[str, Any]) -> Callable[[Mapping[str, Any]], List[Any]]:
+    """Previous approach: a separate `decode` per indexed topic, then one for `data`."""
+    indexed = [i["type"] for i in abi["inputs"] if i["indexed"]]
+    data_types = [i["type"] for i in abi["inputs"] if not i["indexed"]]
+    order = [i["indexed"] for i in abi["inputs"]]
+
+    def decode_log(payload: Mapping[str, Any]) -> List[Any]:
+        topics = [decode([t], payload["topics"][n + 1])[0] for n, t in enumerate(indexed)]
+        data = list(decode(data_types, payload["data"])) if data_types else []
+        return [topics.pop(0) if is_indexed else data.pop(0) for is_indexed in order]
+
+    return decode_log
+
+
+def normalized(values) -> tuple:
+    return tuple(v.lower() if isinstance(v, str) else v for v in values)
+
+
+def check(record: type[EventRecord], abi: Mapping[str, Any], samples: int) -> None:
+    reference = eth_abi_decoder(abi)
+    for n in range(samples):
+        payload = sample_log(abi, record.topic, edge=n == 0)
+        decoded = record.decode(payload)
+        assert type(decoded) is record and not hasattr(decoded, "__dict__")
+        assert decoded.values() == normalized(reference(payload)), f"{record.signature} decodes differently"
+
+
+def per_call(function: Callable, payload, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        function(payload)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main(iterations: int, samples: int) -> None:
+    decoders = usdtv1_event_decoders()
+    mapped = list(dict.fromkeys([*decoders, *usdtv1_event_handlers()]))
+
+    print(f"{'event':30}{'eth_abi µs':>12}{'compiled µs':>13}{'speedup':>9}")
+    total_before = total_after = 0.0
+    for name in mapped:
+        record = decoders.get(name)
+        if record is None:
+            print(f"{name:30}{'not in the ABIs, skipped':>34}")
+            continue
+        abi = event_abi(record)
+        check(record, abi, samples)
+
+        payload = sample_log(abi, record.topic)
+        before = per_call(eth_abi_decoder(abi), payload, iterations)
+        after = per_call(record.decode, payload, iterations)
+        total_before += before
+        total_after += after
+        print(f"{name:30}{before:>12.2f}{after:>13.2f}{before / after:>8.0f}x")
+
+    print(f"all decodable events match eth_abi; {total_before / total_after:.0f}x faster overall")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20_000)
+    parser.add_argument("--samples", type=int, default=200, help="random logs checked per event")
+    args = parser.parse_args()
+    main(args.iterations, args.samples)
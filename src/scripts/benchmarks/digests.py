@@ -0,0 +1,76 @@
+"""
+Emails sent for a settlement wave: notifications grouped only by identical
+`(subject, body)`, as before digests, vs per-recipient digests (`DigestCoalescer`).
+
+`--users` users each get a `PredictionSettled` notification per prediction
+(`--predictions`, over `--matches` matches) plus a lay confirmation. Sends are counted
+by a `LocalMailTransport`, one per recipient of each request.
+
+Usage (from `src/`):
+    python -m scripts.benchmarks.digests --users 500 --predictions 50 --matches 3
+"""
+import argparse
+import asyncio
+import random
+
+from redis.asyncio import Redis
+
+from app.core.config import settings
+from app.core.constants import MAIL_QUEUE, lay_notify, pred_settled_notify
+from app.core.akabokisi.digest import DIGEST_ITEMS_PREFIX, DIGEST_PENDING_KEY, DIGEST_STATS_KEY, digest_stats
+from app.core.akabokisi.manager import MailboxManager
+from app.core.akabokisi.messages import on_lay, on_pred_settlement
+from app.core.akabokisi.transport import LocalMailTransport
+
+
+async def enqueue(manager: MailboxManager, users: int, predictions: int, matches: int) -> int:
+    subject = pred_settled_notify()[0]
+    for user in range(users):
+        address = f"user{user}@example.com"
+        for _ in range(predictions):
+            await manager.add_data_to_list([address], MAIL_QUEUE, subject, on_pred_settlement(random.randint(1, matches)))
+        await manager.add_data_to_list([address], MAIL_QUEUE, lay_notify()[0], on_lay(10))
+    return users * (predictions + 1)
+
+
+async def reset(redis: Redis) -> None:
+    await redis.delete(MAIL_QUEUE, DIGEST_PENDING_KEY, DIGEST_STATS_KEY, *await redis.keys(f"{DIGEST_ITEMS_PREFIX}*"))
+
+
+async def main(users: int, predictions: int, matches: int) -> None:
+    redis = Redis(host=settings.REDIS_QUEUE_HOST, port=settings.REDIS_QUEUE_PORT, db=0)
+    await reset(redis)
+    try:
+        grouped = LocalMailTransport(keep=0)
+        manager = MailboxManager(redis, grouped)
+        manager.digests.window = 0
+        notifications = await enqueue(manager, users, predictions, matches)
+        await manager.process_emails()
+
+        digested = LocalMailTransport(keep=0)
+        manager = MailboxManager(redis, digested)
+        manager.digests.window = 1
+        await enqueue(manager, users, predictions, matches)
+        await manager.process_emails()
+        assert digested.sent == 0, "digests were sent before their window closed"
+        await asyncio.sleep(manager.digests.window + 0.1)
+        await manager.process_emails()
+    finally:
+        await reset(redis)
+        await redis.aclose()
+
+    assert grouped.sent == notifications and digested.sent == users
+    print(f"{notifications} notifications for {users} users")
+    print(f"{'':20}{'grouped':>10}{'digests':>10}")
+    print(f"{'emails sent':20}{grouped.sent:>10}{digested.sent:>10}")
+    print(f"{'requests':20}{grouped.requests:>10}{digested.requests:>10}")
+    print(f"digests: {digest_stats(notifications, digested.sent, manager.digests.window)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--predictions", type=int, default=50)
+    parser.add_argument("--matches", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.predictions, args.matches))
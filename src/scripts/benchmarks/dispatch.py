@@ -0,0 +1,83 @@
+"""
+Dispatch cost per log: topics rebuilt from the ABIs and scanned linearly (previous
+behaviour) vs the precompiled topic0 dispatch table.
+
+Handlers are replaced by no-ops so only the routing itself is measured.
+
+Usage (from `src/`):
+    python -m scripts.benchmarks.dispatch --logs 5000
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from hexbytes import HexBytes
+
+from app.core.web3_services.dispatch import DispatchTable
+from app.core.web3_services.arbitrum_one.event_topics import usdtv1_event_topics_dict
+from app.core.web3_services.arbitrum_one.handler import usdtv1_event_handlers
+
+
+async def noop(payload, db) -> None:
+    return None
+
+
+def sample_logs(topics, count: int):
+    """Logs cycling over every known event, plus one unknown topic in ten."""
+    known = list(topics.values())
+    return [
+        {"topics": [HexBytes(os.urandom(32)) if i % 10 == 9 else known[i % len(known)]]}
+        for i in range(count)
+    ]
+
+
+async def linear_scan(logs, handlers) -> float:
+    """Previous behaviour of `process_arbitrum_callbacklogs`."""
+    start = time.perf_counter()
+    for payload in logs:
+        event_topics = usdtv1_event_topics_dict()
+        for event, topic in event_topics.items():
+            if payload["topics"][0] == topic:
+                if handler := handlers.get(event):
+                    await handler(payload, None)
+                break
+    return time.perf_counter() - start
+
+
+async def table_dispatch(logs, table: DispatchTable) -> float:
+    start = time.perf_counter()
+    for payload in logs:
+        route = table.route(payload["topics"][0])
+        if route is not None and route.handler is not None:
+            await route.handler(payload, None)
+    return time.perf_counter() - start
+
+
+async def main(count: int) -> None:
+    topics = usdtv1_event_topics_dict()
+    handlers = {event: noop for event in usdtv1_event_handlers()}
+    table = DispatchTable("bench")
+    table.extend(topics, handlers)
+
+    # Sanity check: the table routes every event exactly like the linear scan
+    for event, topic in topics.items():
+        route = table.route(HexBytes(topic))
+        assert route is not None and route.name == event
+        assert (route.handler is None) == (event not in handlers)
+    assert table.route(HexBytes(os.urandom(32))) is None
+
+    logs = sample_logs(topics, count)
+    scan = await linear_scan(logs, handlers)
+    routed = await table_dispatch(logs, table)
+
+    print(f"{'':16}{'scan':>12}{'table':>12}")
+    print(f"{'per log (us)':16}{scan / count * 1e6:>12.2f}{routed / count * 1e6:>12.2f}")
+    print(f"dispatch {scan / routed:.0f}x faster over {count} logs ({len(table)} routes)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logs", type=int, default=5_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.logs))
@@ -0,0 +1,98 @@
+"""
+Notification queue drain: `LRANGE 0 -1` + `LTRIM`, as before, vs chunked `LPOP`
+(`MailboxManager._drain_queue`), with a producer pushing while the queue drains.
+
+Reports notifications lost (pushed between `LRANGE` and `LTRIM`) and the peak Python
+memory of the drain (tracemalloc). Mail goes to a `LocalMailTransport`.
+
+Usage (from `src/`):
+    python -m scripts.benchmarks.drain --queued 50000 --pushed 5000 --chunk 500
+"""
+import argparse
+import asyncio
+import pickle
+import time
+import tracemalloc
+from typing import Awaitable, Callable, Tuple
+
+from redis.asyncio import Redis
+
+from app.core.config import settings
+from app.core.akabokisi.manager import MailboxManager
+from app.core.akabokisi.transport import LocalMailTransport
+
+BENCH_QUEUE = "bench_drain_queue"
+
+
+async def fill(redis: Redis, count: int, start: int = 0) -> None:
+    for i in range(start, start + count, 1000):
+        await redis.rpush(BENCH_QUEUE, *(
+            pickle.dumps({"address": f"user{n}@example.com", "subject": f"subject {n % 20}", "body": "body"})
+            for n in range(i, min(i + 1000, start + count))
+        ))
+
+
+async def produce(redis: Redis, queued: int, pushed: int) -> None:
+    """Keeps pushing notifications while a drain runs, like handlers during a settlement wave."""
+    for i in range(queued, queued + pushed, 100):
+        await fill(redis, min(100, queued + pushed - i), i)
+        await asyncio.sleep(0)
+
+
+async def run(redis: Redis, drain: Callable[[], Awaitable[None]], transport: LocalMailTransport,
+              queued: int, pushed: int) -> Tuple[int, int, float]:
+    """Drains until the queue stays empty; returns (lost notifications, peak bytes, seconds)."""
+    await redis.delete(BENCH_QUEUE)
+    await fill(redis, queued)
+    tracemalloc.start()
+    start = time.perf_counter()
+    await asyncio.gather(drain(), produce(redis, queued, pushed))
+    while await redis.llen(BENCH_QUEUE):
+        await drain()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return queued + pushed - transport.sent, peak, elapsed
+
+
+async def main(queued: int, pushed: int, chunk: int) -> None:
+    redis = Redis(host=settings.REDIS_QUEUE_HOST, port=settings.REDIS_QUEUE_PORT, db=0)
+
+    before_transport = LocalMailTransport(keep=0)
+    before_manager = MailboxManager(redis, before_transport)
+
+    async def lrange_ltrim() -> None:
+        data = await redis.lrange(BENCH_QUEUE, 0, -1)
+        await asyncio.sleep(0.05)  # grouping and sending; producers keep pushing meanwhile
+        await redis.ltrim(BENCH_QUEUE, 1, 0)
+        for (subject, body), emails in before_manager._group_emails_by_content(data).items():
+            await before_manager._process_emails(emails, subject, body)
+
+    after_transport = LocalMailTransport(keep=0)
+    after_manager = MailboxManager(redis, after_transport)
+
+    async def chunked() -> None:
+        await after_manager._drain_queue(BENCH_QUEUE, chunk)
+
+    try:
+        before = await run(redis, lrange_ltrim, before_transport, queued, pushed)
+        after = await run(redis, chunked, after_transport, queued, pushed)
+    finally:
+        await redis.delete(BENCH_QUEUE)
+        await redis.aclose()
+
+    print(f"{queued} queued, {pushed} pushed while draining, chunks of {chunk}")
+    print(f"{'':22}{'LRANGE+LTRIM':>14}{'chunked LPOP':>14}")
+    print(f"{'lost notifications':22}{before[0]:>14}{after[0]:>14}")
+    print(f"{'peak memory (MiB)':22}{before[1] / 2 ** 20:>14.1f}{after[1] / 2 ** 20:>14.1f}")
+    print(f"{'notifications/s':22}{(queued + pushed) / before[2]:>14.0f}{(queued + pushed) / after[2]:>14.0f}")
+    assert after[0] == 0, "the chunked drain lost notifications"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queued", type=int, default=50_000)
+    parser.add_argument("--pushed", type=int, default=5_000)
+    parser.add_argument("--chunk", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(main(args.queued, args.pushed, args.chunk))
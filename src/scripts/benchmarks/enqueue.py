@@ -0,0 +1,73 @@
+"""
+Compares the websocket enqueue path before and after batching against a local Redis.
+
+Usage (from `src/`):
+    python -m scripts.benchmarks.enqueue --payloads 20000
+"""
+import argparse
+import asyncio
+import logging
+import pickle
+import time
+
+from redis.asyncio import Redis
+
+from app.core.config import settings
+from app.core.web3_services.buffer import EnqueueBuffer
+from app.core.web3_services.codec import encode_log
+from app.core.web3_services.transport import ListTransport
+from scripts.benchmarks.fixtures import SAMPLE_HANDLER, sample_payload
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+BENCH_QUEUE = "bench_alchemy_logs_queue"
+
+
+async def one_by_one(redis: Redis, payloads) -> float:
+    """Previous behaviour: one pickle, one awaited RPUSH and one INFO log per payload."""
+    start = time.perf_counter()
+    for payload in payloads:
+        await redis.rpush(BENCH_QUEUE, pickle.dumps(payload))
+        logger.info(f"Added data to queue: {BENCH_QUEUE}")
+    return time.perf_counter() - start
+
+
+async def buffered(redis: Redis, payloads, batch: int, latency_ms: int) -> float:
+    buffer = EnqueueBuffer(ListTransport(redis, BENCH_QUEUE), max_batch=batch, max_latency_ms=latency_ms)
+    start = time.perf_counter()
+    for payload in payloads:
+        await buffer.add(encode_log(SAMPLE_HANDLER, payload["result"]))
+    await buffer.close()
+    return time.perf_counter() - start
+
+
+async def main(count: int, batch: int, latency_ms: int) -> None:
+    redis = Redis(host=settings.REDIS_QUEUE_HOST, port=settings.REDIS_QUEUE_PORT, db=0)
+    payloads = [sample_payload(i) for i in range(count)]
+
+    try:
+        await redis.delete(BENCH_QUEUE)
+        before = await one_by_one(redis, payloads)
+        assert await redis.llen(BENCH_QUEUE) == count
+
+        await redis.delete(BENCH_QUEUE)
+        after = await buffered(redis, payloads, batch, latency_ms)
+        assert await redis.llen(BENCH_QUEUE) == count
+    finally:
+        await redis.delete(BENCH_QUEUE)
+        await redis.aclose()
+
+    print(f"payloads:            {count}")
+    print(f"one-by-one RPUSH:    {count / before:,.0f} payloads/s")
+    print(f"batched (n={batch}, {latency_ms}ms): {count / after:,.0f} payloads/s")
+    print(f"speed-up:            x{before / after:.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--payloads", type=int, default=20_000)
+    parser.add_argument("--batch", type=int, default=settings.INGEST_BATCH_SIZE)
+    parser.add_argument("--latency-ms", type=int, default=settings.INGEST_FLUSH_INTERVAL_MS)
+    args = parser.parse_args()
+    asyncio.run(main(args.payloads, args.batch, args.latency_ms))
@@ -0,0 +1,26 @@
+"""Synthetic chain data shared by the pipeline benchmarks."""
+import os
+
+from hexbytes import HexBytes
+from web3.datastructures import AttributeDict
+
+# Registry key queued logs carry (see app.core.web3_services.registry)
+SAMPLE_HANDLER = "usdtv1_arb"
+
+
+def sample_payload(i: int) -> AttributeDict:
+    """Builds a websocket payload shaped like an Alchemy `logs` notification."""
+    return AttributeDict({
+        "subscription": "0x9ce59a13059e417087c02d3236a0b1cc",
+        "result": AttributeDict({
+            "address": "0xE236FB05214747B3491F5f6d7AcE4574026995f8",
+            "topics": [HexBytes(os.urandom(32)) for _ in range(4)],
+            "data": HexBytes(os.urandom(64)),
+            "blockNumber": 90_000_000 + i // 8,
+            "blockHash": HexBytes(os.urandom(32)),
+            "transactionHash": HexBytes(os.urandom(32)),
+            "transactionIndex": i % 8,
+            "logIndex": i % 8,
+            "removed": False,
+        }),
+    })
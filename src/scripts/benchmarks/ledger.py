@@ -0,0 +1,119 @@
+"""
+Idempotency of chain-log application through the processed-events ledger.
+
+Every `Deposited` log is applied by `--consumers` concurrent consumers (like parallel
+consumers, or several providers delivering the same log), then replayed once more.
+Users deposit several times per block, which `validate_block_number` used to reject.
+Each balance must end up as the sum of its deposits, applied exactly once, once the
+balance ledger is folded.
+
+Runs the real handlers against the configured Postgres (migrated to head), on
+benchmark users created under random addresses and deleted afterwards.
+
+Usage (from `src/`):
+    python -m scripts.benchmarks.ledger --deposits 2000 --users 100 --consumers 3
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+from decimal import Decimal
+from typing import Any, Dict, List
+
+from eth_abi import encode
+from hexbytes import HexBytes
+from sqlalchemy import text
+
+from app.core.db.database import async_engine, local_session
+from app.core.web3_services.transaction import defer_commits
+from app.core.web3_services.balances import BalanceMaterializer
+from app.core.web3_services.arbitrum_one.callbacks import process_arbitrum_callbacklogs
+from app.core.web3_services.arbitrum_one.event_topics import usdtv1_event_topics_dict
+from app.core.web3_services.arbitrum_one.handlers.helper import usdt_to_decimal
+
+
+def sample_deposits(users: List[str], deposits: int) -> List[Dict[str, Any]]:
+    """Deposits packed a few per block, so users often deposit twice in one block."""
+    topic = usdtv1_event_topics_dict()["Deposited"]
+    messages = []
+    for i in range(deposits):
+        amount = random.randint(1, 1_000) * 10 ** 6
+        messages.append({"handler": "usdtv1_arb", "result": {
+            "address": "0x" + bytes(20).hex(),
+            "topics": [HexBytes(topic), HexBytes(encode(["address"], [random.choice(users)]))],
+            "data": HexBytes(encode(["uint256"], [amount])),
+            "blockNumber": i // 20 + 1, "logIndex": i % 20, "transactionHash": HexBytes(os.urandom(32))
+        }})
+    return messages
+
+
+async def consume(messages: List[Dict[str, Any]]) -> None:
+    """Applies and commits every log on its own, like the `event` apply mode."""
+    defer_commits()
+    async with local_session() as db:
+        for message in messages:
+            await process_arbitrum_callbacklogs(message, db)
+            await db.commit()
+
+
+async def main(deposits: int, users_count: int, consumers: int) -> None:
+    users = ["0x" + os.urandom(20).hex() for _ in range(users_count)]
+    messages = sample_deposits(users, deposits)
+    expected: Dict[str, Decimal] = {user: Decimal(0) for user in users}
+    for message in messages:
+        user = "0x" + bytes(message["result"]["topics"][1][12:]).hex()
+        expected[user] += usdt_to_decimal(int.from_bytes(message["result"]["data"], "big"))
+
+    async with async_engine.begin() as conn:
+        await conn.execute(
+            text('INSERT INTO "user" (public_address, nonce, balance, prev_block_number, latest_block_number, '
+                 'is_superuser, is_admin) SELECT unnest(CAST(:addresses AS varchar[])), \'bench\', 0, 0, 0, false, false'),
+            {"addresses": users}
+        )
+    try:
+        start = time.perf_counter()
+        # Every consumer gets every log, each in its own order
+        await asyncio.gather(*(consume(random.sample(messages, len(messages))) for _ in range(consumers)))
+        concurrent = time.perf_counter() - start
+
+        start = time.perf_counter()
+        await consume(messages)
+        replay = time.perf_counter() - start
+
+        await BalanceMaterializer().fold_all()
+        async with async_engine.connect() as conn:
+            balances = dict((await conn.execute(
+                text('SELECT public_address, balance FROM "user" WHERE public_address = ANY(:addresses)'),
+                {"addresses": users}
+            )).all())
+            recorded = (await conn.execute(
+                text("SELECT count(*) FROM processed_event WHERE tx_hash = ANY(:hashes)"),
+                {"hashes": ["0x" + bytes(m["result"]["transactionHash"]).hex() for m in messages]}
+            )).scalar_one()
+        assert balances == expected, "a deposit was applied twice or not at all"
+        assert recorded == deposits, "ledger entries do not match the applied logs"
+    finally:
+        async with async_engine.begin() as conn:
+            await conn.execute(text("DELETE FROM processed_event WHERE tx_hash = ANY(:hashes)"), {
+                "hashes": ["0x" + bytes(m["result"]["transactionHash"]).hex() for m in messages]
+            })
+            await conn.execute(text(
+                'DELETE FROM balance_ledger WHERE user_id IN (SELECT id FROM "user" WHERE public_address = ANY(:addresses))'
+            ), {"addresses": users})
+            await conn.execute(text('DELETE FROM "user" WHERE public_address = ANY(:addresses)'), {"addresses": users})
+        await async_engine.dispose()
+
+    deliveries = deposits * consumers
+    print(f"{deliveries} deliveries of {deposits} deposits by {consumers} consumers: {deliveries / concurrent:.0f} logs/s")
+    print(f"replay of {deposits} already applied deposits: {deposits / replay:.0f} logs/s")
+    print("every deposit applied exactly once")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--deposits", type=int, default=2_000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--consumers", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(main(args.deposits, args.users, args.consumers))
@@ -0,0 +1,71 @@
+"""
+Mail dispatch throughput offline: the blocking `SendGridAPIClient.send` call per batch,
+as before the mail transport, vs `MailboxManager` on a `LocalMailTransport`.
+
+Every request takes `--latency-ms`. The blocking run stands in for the SDK with a
+`time.sleep` on the event loop; a ticker task measures how long the loop stalls.
+
+Usage (from `src/`):
+    python -m scripts.benchmarks.mail --batches 200 --recipients 50 --latency-ms 150 --concurrency 8
+"""
+import argparse
+import asyncio
+import time
+from typing import Awaitable, Callable, List, Tuple
+
+from app.core.akabokisi.manager import MailboxManager
+from app.core.akabokisi.transport import LocalMailTransport
+
+
+async def ticker(stalls: List[float], interval: float = 0.01) -> None:
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        stalls.append(time.perf_counter() - start - interval)
+
+
+async def measure(send: Callable[[], Awaitable[None]]) -> Tuple[float, float]:
+    stalls: List[float] = []
+    tick = asyncio.create_task(ticker(stalls))
+    start = time.perf_counter()
+    await send()
+    elapsed = time.perf_counter() - start
+    tick.cancel()
+    return elapsed, max(stalls, default=elapsed)
+
+
+async def main(batches: int, recipients: int, latency_ms: int, concurrency: int) -> None:
+    groups = [([f"user{b}-{r}@example.com" for r in range(recipients)], f"subject {b}", f"body {b}") for b in range(batches)]
+    emails = batches * recipients
+
+    async def blocking() -> None:
+        for _ in groups:
+            # One synchronous HTTPS round-trip on the event loop per batch
+            time.sleep(latency_ms / 1000)
+            await asyncio.sleep(0)
+
+    transport = LocalMailTransport(concurrency=concurrency, latency_ms=latency_ms)
+    manager = MailboxManager(redis=object(), transport=transport)
+
+    async def pooled() -> None:
+        await asyncio.gather(*(manager._process_emails(*group) for group in groups))
+
+    before, before_stall = await measure(blocking)
+    after, after_stall = await measure(pooled)
+    assert transport.sent == emails, "the transport did not accept every recipient"
+
+    print(f"{emails} emails in {batches} batches, {latency_ms} ms per request, concurrency {concurrency}")
+    print(f"{'':22}{'blocking':>12}{'async pool':>12}")
+    print(f"{'emails/s':22}{emails / before:>12.0f}{emails / after:>12.0f}")
+    print(f"{'max loop stall (ms)':22}{before_stall * 1000:>12.1f}{after_stall * 1000:>12.1f}")
+    print(f"requests sent: {transport.requests}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batches", type=int, default=200)
+    parser.add_argument("--recipients", type=int, default=50)
+    parser.add_argument("--latency-ms", type=int, default=150)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+    asyncio.run(main(args.batches, args.recipients, args.latency_ms, args.concurrency))
@@ -0,0 +1,126 @@
+"""
+Throughput of the partitioned BatchProcessor pool as its size grows.
+
+Handlers are replaced by a stub awaiting `--db-latency-ms` per log (one DB round-trip),
+and sessions by no-op contexts, so the benchmark needs Redis but no database. Every
+run also checks that logs of the same entity were applied in queue order.
+
+Usage (from `src/`):
+    python -m scripts.benchmarks.processor_pool --logs 2000 --entities 200 --sizes 1 2 4 8 16
+"""
+import argparse
+import asyncio
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+from hexbytes import HexBytes
+from redis.asyncio import Redis
+
+from app.core.config import settings
+from app.core.web3_services.codec import encode_log
+from app.core.web3_services.processor import BatchProcessor
+from app.core.web3_services.registry import register_handler
+from scripts.benchmarks.fixtures import sample_payload
+
+BENCH_QUEUE = "bench_pool_queue"
+BENCH_INPROCESS_QUEUE = "bench_pool_inprocess"
+BENCH_HANDLER = "bench_pool"
+
+
+class NullSession:
+    """Session stand-in: transactions and savepoints are no-ops."""
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        return None
+
+    async def begin_nested(self):
+        return self
+
+    async def commit(self) -> None:
+        return None
+
+    async def rollback(self) -> None:
+        return None
+
+
+class StubHandler:
+    """Records the order logs of each entity were applied in."""
+
+    def __init__(self, latency: float, expected: int):
+        self.latency = latency
+        self.expected = expected
+        self.applied: Dict[bytes, List[int]] = defaultdict(list)
+        self.count = 0
+        self.done = asyncio.Event()
+
+    async def __call__(self, message, db) -> None:
+        await asyncio.sleep(self.latency)
+        log = message["result"]
+        self.applied[bytes(log["topics"][1])].append(log["blockNumber"])
+        self.count += 1
+        if self.count >= self.expected:
+            self.done.set()
+
+
+def entity_partition(message) -> bytes:
+    return bytes(message["result"]["topics"][1])
+
+
+def sample_logs(count: int, entities: int) -> List[bytes]:
+    logs = []
+    for i in range(count):
+        log = dict(sample_payload(i)["result"])
+        log["blockNumber"] = i
+        log["topics"] = [log["topics"][0], HexBytes((i % entities).to_bytes(32, "big"))]
+        logs.append(encode_log(BENCH_HANDLER, log))
+    return logs
+
+
+async def run_pool(redis: Redis, logs: List[bytes], pool_size: int, latency: float) -> float:
+    await redis.delete(BENCH_QUEUE, *await redis.keys(f"{BENCH_INPROCESS_QUEUE}*"))
+    for i in range(0, len(logs), 1000):
+        await redis.rpush(BENCH_QUEUE, *logs[i:i + 1000])
+
+    handler = StubHandler(latency, len(logs))
+    register_handler(BENCH_HANDLER, handler.__call__, entity_partition)
+    processor = BatchProcessor(BENCH_QUEUE, BENCH_INPROCESS_QUEUE, redis, pool_size, session_factory=NullSession)
+
+    start = time.perf_counter()
+    task = asyncio.create_task(processor.batch_process_logs())
+    await handler.done.wait()
+    elapsed = time.perf_counter() - start
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    for blocks in handler.applied.values():
+        assert blocks == sorted(blocks), "logs of an entity were applied out of order"
+    return elapsed
+
+
+async def main(count: int, entities: int, sizes: List[int], latency_ms: float) -> None:
+    redis = Redis(host=settings.REDIS_QUEUE_HOST, port=settings.REDIS_QUEUE_PORT, db=0)
+    logs = sample_logs(count, entities)
+    try:
+        baseline = None
+        print(f"{'pool size':>10}{'logs/s':>12}{'speedup':>10}")
+        for size in sizes:
+            elapsed = await run_pool(redis, logs, size, latency_ms / 1000)
+            baseline = baseline or elapsed
+            print(f"{size:>10}{count / elapsed:>12.0f}{baseline / elapsed:>9.1f}x")
+    finally:
+        await redis.delete(BENCH_QUEUE, *await redis.keys(f"{BENCH_INPROCESS_QUEUE}*"))
+        await redis.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logs", type=int, default=2_000)
+    parser.add_argument("--entities", type=int, default=200, help="distinct partition keys")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--db-latency-ms", type=float, default=2.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.logs, args.entities, args.sizes, args.db_latency_ms))
@@ -0,0 +1,74 @@
+"""
+Connections opened by per-event `MailboxManager`s: a new `Redis` client per manager,
+as before the shared pool, vs every manager on `get_queue_redis()`.
+
+`--events` handlers run `--concurrency` at a time, each queueing one email. Opened
+connections are read from the server's `total_connections_received`; `connected_clients`
+shows the connections still held when the run ends (unclosed clients keep theirs).
+
+Usage (from `src/`):
+    python -m scripts.benchmarks.redis_pool --events 5000 --concurrency 50
+"""
+import argparse
+import asyncio
+import gc
+import time
+from typing import Callable, Tuple
+
+from redis.asyncio import Redis
+
+from app.core.config import settings
+from app.core.akabokisi.manager import MailboxManager
+from app.core.utils.redis_queue import close_queue_redis, get_queue_redis, pool_stats
+
+BENCH_QUEUE = "bench_mail_queue"
+
+
+async def run(new_manager: Callable[[], MailboxManager], events: int, concurrency: int) -> Tuple[int, int, float]:
+    admin = Redis(host=settings.REDIS_QUEUE_HOST, port=settings.REDIS_QUEUE_PORT, db=0)
+    before = (await admin.info("stats"))["total_connections_received"]
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def handle(i: int) -> None:
+        async with semaphore:
+            mail = new_manager()
+            await mail.add_data_to_list([f"user{i}@example.com"], BENCH_QUEUE, "subject", "body")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(handle(i) for i in range(events)))
+    elapsed = time.perf_counter() - start
+
+    opened = (await admin.info("stats"))["total_connections_received"] - before
+    held = (await admin.info("clients"))["connected_clients"] - 1
+    await admin.delete(BENCH_QUEUE)
+    await admin.aclose()
+    return opened, held, elapsed
+
+
+def client_per_event() -> MailboxManager:
+    return MailboxManager(Redis(host=settings.REDIS_QUEUE_HOST, port=settings.REDIS_QUEUE_PORT, db=0))
+
+
+async def main(events: int, concurrency: int) -> None:
+    before = await run(client_per_event, events, concurrency)
+    # Let the abandoned clients go before measuring the shared pool
+    gc.collect()
+    await asyncio.sleep(1)
+
+    after = await run(lambda: MailboxManager(get_queue_redis()), events, concurrency)
+    stats = pool_stats()
+    await close_queue_redis()
+
+    print(f"{'':24}{'per event':>12}{'shared pool':>14}")
+    print(f"{'connections opened':24}{before[0]:>12}{after[0]:>14}")
+    print(f"{'connections held':24}{before[1]:>12}{after[1]:>14}")
+    print(f"{'events/s':24}{events / before[2]:>12.0f}{events / after[2]:>14.0f}")
+    print(f"shared pool: {stats}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=5_000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.events, args.concurrency))
@@ -0,0 +1,161 @@
+"""
+`"user"` SELECTs per event of the handlers resolving a user (`Predicted`, `Deposited`,
+`Claimed`, `UserBalance`): one lookup per event, as before the user cache, vs the LRU
+cache filled once per group of logs with a single `ANY(...)` query.
+
+Runs the real handlers against the configured Postgres, on benchmark users created
+under random addresses and deleted afterwards. Both runs must leave identical
+balances (once the balance ledger is folded), block numbers and predictions.
+
+Usage (from `src/`):
+    python -m scripts.benchmarks.users --events 5000 --users 500 --group 100
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+from typing import Any, Dict, List
+
+from eth_abi import encode
+from hexbytes import HexBytes
+from sqlalchemy import event, text
+
+from app.core.db.database import async_engine, local_session
+from app.core.web3_services.transaction import defer_commits
+from app.core.web3_services.users import user_cache
+from app.core.web3_services.balances import BalanceMaterializer
+from app.core.web3_services.arbitrum_one.callbacks import prefetch_arbitrum_users, process_arbitrum_callbacklogs
+from app.core.web3_services.arbitrum_one.event_topics import usdtv1_event_topics_dict
+
+
+class SelectCounter:
+    """Counts the statements reading the `"user"` table."""
+
+    def __init__(self):
+        self.count = 0
+        event.listen(async_engine.sync_engine, "before_cursor_execute", self)
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        if statement.lstrip().upper().startswith("SELECT") and '"user"' in statement:
+            self.count += 1
+
+
+def sample_messages(contract: str, users: List[str], events: int) -> List[Dict[str, Any]]:
+    """A mix of balance events and lays, every log in its own block."""
+    topics = usdtv1_event_topics_dict()
+    messages = []
+    for i in range(events):
+        user, block = random.choice(users), i + 1
+        name = random.choice(("Deposited", "Claimed", "UserBalance", "Predicted"))
+        amount = random.randint(1, 1_000) * 10 ** 6
+        if name == "Predicted":
+            log_topics = [topics[name], encode(["uint256"], [i]), encode(["address"], [user]), encode(["uint256"], [i % 50 + 1])]
+            data = encode(["uint256", "uint256"], [amount, 1])
+        else:
+            log_topics = [topics[name], encode(["address"], [user])]
+            data = encode(["uint256"], [amount])
+        messages.append({"handler": "usdtv1_arb", "result": {
+            "address": contract, "topics": [HexBytes(t) for t in log_topics], "data": HexBytes(data),
+            "blockNumber": block, "logIndex": 0, "transactionHash": HexBytes(os.urandom(32))
+        }})
+    return messages
+
+
+async def snapshot(contract: str, users: List[str]) -> tuple:
+    await BalanceMaterializer().fold_all()
+    async with async_engine.connect() as conn:
+        balances = (await conn.execute(text(
+            'SELECT public_address, balance, prev_block_number, latest_block_number FROM "user" '
+            'WHERE public_address = ANY(:addresses) ORDER BY public_address'
+        ), {"addresses": users})).all()
+        predictions = (await conn.execute(text(
+            "SELECT hash_identifier, user_id, amount FROM prediction WHERE contract_address = :contract "
+            "ORDER BY hash_identifier"
+        ), {"contract": contract})).all()
+    return tuple(balances), tuple(predictions)
+
+
+async def reset(contract: str, users: List[str], messages: List[Dict[str, Any]]) -> None:
+    async with async_engine.begin() as conn:
+        await conn.execute(text("DELETE FROM processed_event WHERE tx_hash = ANY(:hashes)"), {
+            "hashes": ["0x" + bytes(m["result"]["transactionHash"]).hex() for m in messages]
+        })
+        await conn.execute(text("DELETE FROM prediction WHERE contract_address = :contract"), {"contract": contract})
+        await conn.execute(text(
+            'DELETE FROM balance_ledger WHERE user_id IN (SELECT id FROM "user" WHERE public_address = ANY(:addresses))'
+        ), {"addresses": users})
+        await conn.execute(text(
+            'UPDATE "user" SET balance = 0, prev_block_number = 0, latest_block_number = 0 '
+            'WHERE public_address = ANY(:addresses)'
+        ), {"addresses": users})
+    user_cache.clear()
+
+
+async def per_event(messages: List[Dict[str, Any]], group: int, counter: SelectCounter) -> tuple:
+    counter.count = 0
+    start = time.perf_counter()
+    async with local_session() as db:
+        for i in range(0, len(messages), group):
+            for message in messages[i:i + group]:
+                # Every event looks its user up again, like `crud_users.get` did
+                user_cache.clear()
+                await process_arbitrum_callbacklogs(message, db)
+            await db.commit()
+    return counter.count, time.perf_counter() - start
+
+
+async def cached(messages: List[Dict[str, Any]], group: int, counter: SelectCounter) -> tuple:
+    counter.count = 0
+    start = time.perf_counter()
+    async with local_session() as db:
+        for i in range(0, len(messages), group):
+            chunk = messages[i:i + group]
+            await prefetch_arbitrum_users(chunk, db)
+            for message in chunk:
+                await process_arbitrum_callbacklogs(message, db)
+            await db.commit()
+    return counter.count, time.perf_counter() - start
+
+
+async def main(events: int, users_count: int, group: int) -> None:
+    defer_commits()
+    contract = "0x" + os.urandom(20).hex()
+    users = ["0x" + os.urandom(20).hex() for _ in range(users_count)]
+    messages = sample_messages(contract, users, events)
+    counter = SelectCounter()
+
+    async with async_engine.begin() as conn:
+        await conn.execute(
+            text('INSERT INTO "user" (public_address, nonce, balance, prev_block_number, latest_block_number, '
+                 'is_superuser, is_admin) SELECT unnest(CAST(:addresses AS varchar[])), \'bench\', 0, 0, 0, false, false'),
+            {"addresses": users}
+        )
+    try:
+        before, before_time = await per_event(messages, group, counter)
+        expected = await snapshot(contract, users)
+        await reset(contract, users, messages)
+
+        after, after_time = await cached(messages, group, counter)
+        assert await snapshot(contract, users) == expected, "cached lookups left different rows"
+    finally:
+        await reset(contract, users, messages)
+        async with async_engine.begin() as conn:
+            await conn.execute(text('DELETE FROM "user" WHERE public_address = ANY(:addresses)'), {"addresses": users})
+        await async_engine.dispose()
+
+    print(f"{'':20}{'per event':>12}{'cached':>12}")
+    print(f"{'user SELECTs':20}{before:>12}{after:>12}")
+    print(f"{'SELECTs / event':20}{before / events:>12.3f}{after / events:>12.3f}")
+    print(f"{'events/s':20}{events / before_time:>12.0f}{events / after_time:>12.0f}")
+    print(f"cache: {user_cache.stats()}")
+    print(f"{before - after} fewer user SELECTs ({1 - after / before:.1%}) over {events} events; rows match")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=5_000)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--group", type=int, default=100, help="logs per transaction (and per prefetch)")
+    args = parser.parse_args()
+    asyncio.run(main(args.events, args.users, args.group))
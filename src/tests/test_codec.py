@@ -0,0 +1,108 @@
+import pytest
+from hexbytes import HexBytes
+
+from app.core.exceptions.pipeline_exceptions import LogCodecError
+from app.core.web3_services.codec import (
+    _HEADER,
+    FLAG_REMOVED,
+    LEGACY_CODEC_VERSION,
+    decode_message,
+    encode_log,
+    encode_message,
+)
+
+LOG = {
+    "address": "0x5fbdb2315678afecb367f032d93f642f64180aa3",
+    "topics": [HexBytes(bytes([i]) * 32) for i in range(1, 4)],
+    "data": HexBytes(bytes(range(64))),
+    "blockNumber": 21_000_123,
+    "blockHash": HexBytes(b"\xab" * 32),
+    "transactionHash": HexBytes(b"\xcd" * 32),
+    "logIndex": 7,
+    "removed": False,
+}
+
+
+def test_round_trip():
+    message = decode_message(encode_log("usdtv1:Deposited", LOG))
+
+    assert message == {"handler": "usdtv1:Deposited", "backfill": False, "result": LOG}
+
+
+def test_round_trip_flags():
+    log = {**LOG, "removed": True}
+    message = decode_message(encode_log("usdtv1:Deposited", log, backfill=True))
+
+    assert message["backfill"] is True
+    assert message["result"] == log
+
+
+def test_round_trip_hex_strings_and_missing_fields():
+    log = {
+        "address": "0x5FbDB2315678afecb367f032d93F642f64180aa3",
+        "topics": ["0x" + "11" * 32],
+        "blockNumber": 1,
+        "transactionHash": "0x" + "22" * 32,
+        "logIndex": 0,
+    }
+    result = decode_message(encode_log("games:GameRegistered", log))["result"]
+
+    assert result["address"] == log["address"].lower()
+    assert result["topics"] == [HexBytes("0x" + "11" * 32)]
+    assert result["data"] == HexBytes(b"")
+    assert result["blockHash"] is None
+    assert result["transactionHash"] == HexBytes(log["transactionHash"])
+    assert result["removed"] is False
+
+
+def test_encode_message_round_trip():
+    message = {"handler": "usdtv1:Predicted", "backfill": True, "result": LOG}
+
+    assert decode_message(encode_message(message)) == message
+
+
+def test_decode_legacy_v1():
+    subscription = "0x9cef478923ff08bf67fde552c1d8b0d3"
+    key = subscription.encode("utf-8")
+    raw = b"".join((
+        _HEADER.pack(
+            LEGACY_CODEC_VERSION,
+            FLAG_REMOVED,
+            LOG["blockNumber"],
+            LOG["logIndex"],
+            bytes.fromhex(LOG["address"][2:]),
+            bytes(LOG["blockHash"]),
+            bytes(LOG["transactionHash"]),
+            len(LOG["topics"]),
+            len(key)
+        ),
+        key,
+        *(bytes(t) for t in LOG["topics"]),
+        bytes(LOG["data"]),
+    ))
+    message = decode_message(raw)
+
+    assert message["handler"] is None
+    assert message["subscription"] == subscription
+    assert message["backfill"] is False
+    assert message["result"] == {**LOG, "removed": True}
+
+
+@pytest.mark.parametrize("raw", [
+    b"",
+    encode_log("usdtv1:Deposited", LOG)[:_HEADER.size - 1],
+    encode_log("usdtv1:Deposited", LOG)[:_HEADER.size + 40],
+    bytes([9]) + encode_log("usdtv1:Deposited", LOG)[1:],
+])
+def test_decode_rejects_malformed(raw):
+    with pytest.raises(LogCodecError):
+        decode_message(raw)
+
+
+def test_encode_rejects_malformed():
+    with pytest.raises(LogCodecError):
+        encode_log("usdtv1:Deposited", {**LOG, "topics": LOG["topics"] * 2})
+    with pytest.raises(LogCodecError):
+        encode_log("usdtv1:Deposited", {**LOG, "address": "0x1234"})
+    with pytest.raises(LogCodecError):
+        encode_log("usdtv1:Deposited", {k: v for k, v in LOG.items() if k != "blockNumber"})
@@ -0,0 +1,97 @@
+import random
+
+import pytest
+from eth_abi import decode, encode
+from eth_utils import keccak
+from hexbytes import HexBytes
+
+from app.core.exceptions.pipeline_exceptions import LogCodecError
+from app.core.web3_services.arbitrum_one.event_topics import (
+    BALANCE_USDT_ABI_PATH,
+    GAMES_MANAGER,
+    USDTV1_ABI_PATH,
+    usdtv1_event_decoders,
+)
+from app.core.web3_services.utils import load_abi
+
+DECODERS = usdtv1_event_decoders()
+
+
+def _signature(event_abi):
+    return f"{event_abi['name']}({','.join(i['type'] for i in event_abi['inputs'])})"
+
+
+def _event_abi(record):
+    """ABI entry the record was compiled from."""
+    for path in (USDTV1_ABI_PATH, BALANCE_USDT_ABI_PATH, GAMES_MANAGER):
+        for item in load_abi(path):
+            if item.get("type") == "event" and _signature(item) == record.signature:
+                return item
+    raise LookupError(record.signature)
+
+
+def _value(abi_type, rng):
+    if abi_type == "address":
+        return "0x" + rng.randbytes(20).hex()
+    if abi_type == "bool":
+        return rng.random() < 0.5
+    if abi_type.startswith("uint"):
+        return rng.getrandbits(int(abi_type[4:] or 256))
+    raise AssertionError(f"Unexpected ABI type in the usdtv1 events: {abi_type}")
+
+
+def _log(event_abi, rng):
+    """A log of the event with random input values, as the node would return it."""
+    inputs = event_abi["inputs"]
+    values = [_value(i["type"], rng) for i in inputs]
+    topics = [HexBytes(keccak(text=_signature(event_abi)))] + [
+        HexBytes(encode([i["type"]], [v])) for i, v in zip(inputs, values) if i["indexed"]
+    ]
+    data = encode([i["type"] for i in inputs if not i["indexed"]], [v for i, v in zip(inputs, values) if not i["indexed"]])
+    return {"topics": topics, "data": HexBytes(data)}
+
+
+def _eth_abi_values(event_abi, log):
+    """Input values decoded by eth_abi, in ABI order."""
+    inputs = event_abi["inputs"]
+    topics = iter(log["topics"][1:])
+    data = iter(decode([i["type"] for i in inputs if not i["indexed"]], bytes(log["data"])))
+    return [
+        decode([i["type"]], bytes(next(topics)))[0] if i["indexed"] else next(data)
+        for i in inputs
+    ]
+
+
+def _normalized(value):
+    return value.lower() if isinstance(value, str) else value
+
+
+def test_every_event_has_a_decoder():
+    assert len(DECODERS) == 18
+
+
+@pytest.mark.parametrize("name", sorted(DECODERS))
+def test_decoder_matches_eth_abi(name):
+    record = DECODERS[name]
+    event_abi = _event_abi(record)
+    rng = random.Random(name)
+    assert record.topic == keccak(text=_signature(event_abi))
+
+    for _ in range(50):
+        log = _log(event_abi, rng)
+        decoded = record.decode(log)
+        expected = _eth_abi_values(event_abi, log)
+
+        assert type(decoded) is record
+        assert len(decoded.values()) == len(event_abi["inputs"])
+        for field, value, want in zip(record.__slots__, decoded.values(), expected):
+            assert value == _normalized(want), f"{record.signature}.{field}"
+
+
+@pytest.mark.parametrize("name", sorted(DECODERS))
+def test_decoder_rejects_mismatched_log(name):
+    record = DECODERS[name]
+    log = _log(_event_abi(record), random.Random(name))
+
+    with pytest.raises(LogCodecError):
+        record.decode({**log, "topics": log["topics"] + [HexBytes(bytes(32))]})